@@ -1,17 +1,27 @@
 from config import setup_page_config
-from ui import render_header, render_footer, render_real_estate_section
+from ui import render_header, render_footer, render_real_estate_section, render_portfolio_section, render_debug_panel
 from i18n import get_current_language
 import streamlit as st
+import profiling
 
 def main():
     # Inizializza la lingua di default se non esiste
     if 'language' not in st.session_state:
         st.session_state.language = 'it'
-    
-    setup_page_config()
-    render_header()
-    render_real_estate_section()
-    render_footer()
+
+    # Misure della sola sessione corrente: il toggle del pannello di debug vale già
+    # per questa esecuzione e non tocca le altre sessioni
+    if 'debug_raccolta' not in st.session_state:
+        st.session_state.debug_raccolta = profiling.Collector()
+    raccolta = st.session_state.debug_raccolta if st.session_state.get('debug_profiling') else None
+
+    with profiling.collecting(raccolta):
+        setup_page_config()
+        render_header()
+        render_real_estate_section()
+        render_portfolio_section()
+        render_footer()
+        render_debug_panel()
 
 if __name__ == "__main__":
     main()
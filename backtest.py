@@ -0,0 +1,106 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from batch import calculate_real_estate_investment_batch, CHIAVE_CRESCITA_AFFITTI
+from montecarlo import summarize_distribution, PERCENTILI_DEFAULT
+
+# Colonne dei file delle serie storiche: anno, variazioni annue in percentuale e, per
+# i canoni, in alternativa alla crescita un indice di livello
+COLONNA_ANNO = 'anno'
+COLONNA_CITTA = 'citta'
+COLONNA_INDICE_AFFITTI = 'indice_affitti'
+SERIE_STORICHE = ('rivalutazione_annua', 'inflazione_perc', CHIAVE_CRESCITA_AFFITTI)
+
+METRICHE_BACKTEST = ('tir_nominale', 'tir_reale', 'cagr_nominale', 'cagr_reale', 'valore_finale_nominale')
+
+
+def load_series(percorso, citta=None):
+    """
+    Legge un file CSV di serie storiche annuali
+
+    Il file ha la colonna 'anno' e almeno una di SERIE_STORICHE (la crescita dei canoni
+    può essere data come livello 'indice_affitti'); con la colonna 'citta' contiene più
+    città. Sono tenuti gli anni in cui tutte le serie presenti sono note.
+
+    Args:
+        percorso: Percorso o file CSV
+        citta: Città da selezionare (obbligatoria se il file ne contiene più d'una)
+
+    Returns:
+        dict: 'anni' (array consecutivo) e per ogni serie presente un array in percentuale
+
+    Raises:
+        ValueError: Colonne mancanti, città ambigua o non trovata, anni non consecutivi
+    """
+    import pandas as pd
+    tabella = pd.read_csv(percorso)
+    if COLONNA_ANNO not in tabella.columns:
+        raise ValueError(f"Colonna mancante nel file delle serie: {COLONNA_ANNO}")
+    if COLONNA_CITTA in tabella.columns:
+        elenco = sorted(tabella[COLONNA_CITTA].dropna().unique())
+        if citta is None and len(elenco) > 1:
+            raise ValueError(f"Il file contiene più città, indicarne una tra: {', '.join(map(str, elenco))}")
+        if citta is not None:
+            if citta not in elenco:
+                raise ValueError(f"Città non trovata nel file delle serie: {citta}")
+            tabella = tabella[tabella[COLONNA_CITTA] == citta]
+    tabella = tabella.sort_values(COLONNA_ANNO).set_index(COLONNA_ANNO)
+
+    if CHIAVE_CRESCITA_AFFITTI not in tabella.columns and COLONNA_INDICE_AFFITTI in tabella.columns:
+        # Crescita dell'anno t = indice(t) / indice(t - 1) - 1: il primo anno resta ignoto
+        indice = tabella[COLONNA_INDICE_AFFITTI]
+        consecutivo = np.diff(tabella.index.to_numpy(), prepend=np.nan) == 1
+        tabella[CHIAVE_CRESCITA_AFFITTI] = np.where(consecutivo, (indice / indice.shift(1) - 1) * 100, np.nan)
+    presenti = [serie for serie in SERIE_STORICHE if serie in tabella.columns]
+    if not presenti:
+        raise ValueError(f"Nessuna serie nel file: attese una o più colonne tra {', '.join(SERIE_STORICHE)}")
+
+    tabella = tabella[presenti].dropna()
+    anni = tabella.index.to_numpy(dtype=int)
+    if anni.size == 0 or np.any(np.diff(anni) != 1):
+        raise ValueError("Le serie storiche devono coprire anni consecutivi")
+    serie = {'anni': anni}
+    for nome in presenti:
+        serie[nome] = tabella[nome].to_numpy(dtype=float)
+    return serie
+
+
+def backtest_rolling(params, serie, percentili=PERCENTILI_DEFAULT):
+    """
+    Investimento ripetuto per ogni anno di partenza possibile con i valori storici
+
+    Per l'anno di partenza s l'anno k dell'investimento usa i valori realizzati
+    nell'anno s + k - 1; le serie assenti restano le costanti di params. Le finestre
+    sono viste a scorrimento (sliding_window_view) sugli array delle serie, senza
+    copie per finestra, e sono valutate tutte insieme dal motore vettoriale.
+
+    Args:
+        params: Dizionario params scalare (l'orizzonte è anni_investimento)
+        serie: Dizionario come restituito da load_series
+        percentili: Percentili da riportare
+
+    Returns:
+        dict: 'anni_partenza', per ogni metrica di METRICHE_BACKTEST l'array dei valori
+        per anno di partenza e in 'sintesi' le statistiche (montecarlo.summarize_distribution)
+
+    Raises:
+        ValueError: Se le serie coprono meno anni dell'orizzonte
+    """
+    anni = int(params['anni_investimento'])
+    disponibili = len(serie['anni'])
+    if disponibili < anni:
+        raise ValueError(f"Le serie coprono {disponibili} anni, l'orizzonte ne richiede {anni}")
+    percorsi = {
+        nome: sliding_window_view(np.asarray(serie[nome], dtype=float), anni)
+        for nome in SERIE_STORICHE if nome in serie
+    }
+    risultati = calculate_real_estate_investment_batch(params, percorsi)
+
+    esito = {
+        'anni_partenza': np.asarray(serie['anni'][:disponibili - anni + 1]),
+        'percentili': tuple(percentili),
+        'sintesi': {},
+    }
+    for metrica in METRICHE_BACKTEST:
+        esito[metrica] = risultati[metrica]
+        esito['sintesi'][metrica] = summarize_distribution(risultati[metrica], percentili)
+    return esito
@@ -0,0 +1,485 @@
+import numpy as np
+from irr import solve_irr_batch, IRR_CONVERGED
+from mortgage import calculate_leverage_batch
+from events import scatter_events_annual
+
+# Chiavi numeriche del dizionario params costruito da ui.render_real_estate_section
+CHIAVI_NUMERICHE = (
+    'valore_immobile',
+    'costo_acquisto',
+    'costo_ristrutturazione',
+    'affitto_lordo',
+    'rivalutazione_annua',
+    'anni_investimento',
+    'costi_assicurazione_euro',
+    'costi_gestione_euro',
+    'rata_mutuo_mensile',
+    'anni_restanti_mutuo',
+    'debito_residuo_mutuo',
+    'manutenzione_straordinaria_perc',
+    'tassazione_affitti_perc',
+    'tassa_catastale_perc',
+    'periodo_sfitto_perc',
+    'inflazione_perc',
+    'adeguamento_affitto_anni',
+    'commissione_iniziale',
+    'commissione_finale',
+)
+
+CHIAVI_INTERE = ('anni_investimento', 'anni_restanti_mutuo', 'adeguamento_affitto_anni')
+
+# Chiavi opzionali (params.get(..., 0) nella versione scalare)
+CHIAVI_OPZIONALI = ('costo_acquisto', 'costo_ristrutturazione', 'debito_residuo_mutuo')
+
+# Chiavi che non entrano nelle componenti annuali (calculate_annual_components_batch):
+# se varia solo una di queste le componenti possono essere riusate
+CHIAVI_SOLO_FINALI = ('costo_acquisto', 'costo_ristrutturazione', 'commissione_iniziale', 'commissione_finale', 'debito_residuo_mutuo')
+
+TIPI_ADEGUAMENTO = ("Valore Immobile", "Inflazione", "Nessun Adeguamento")
+
+
+def params_to_batch(lista_params):
+    """
+    Converte una lista di dizionari params in una struttura di array
+    (un array NumPy per ogni chiave), adatta a calculate_real_estate_investment_batch
+
+    Args:
+        lista_params: Lista di dizionari params come quelli costruiti dalla UI
+
+    Returns:
+        dict: Chiave params -> array di lunghezza len(lista_params)
+    """
+    params_batch = {}
+    for chiave in CHIAVI_NUMERICHE:
+        valori = [p.get(chiave, 0) if chiave in CHIAVI_OPZIONALI else p[chiave] for p in lista_params]
+        params_batch[chiave] = np.asarray(valori, dtype=int if chiave in CHIAVI_INTERE else float)
+    params_batch['tipo_adeguamento'] = np.asarray([p['tipo_adeguamento'] for p in lista_params], dtype=object)
+    return params_batch
+
+
+def normalize_batch(params_batch, n=None):
+    """
+    Porta tutti gli array di params_batch alla stessa lunghezza (broadcast degli scalari)
+
+    Args:
+        params_batch: Dizionario chiave params -> array o scalare
+        n: Numero di scenari desiderato; se None è dedotto dagli array
+
+    Returns:
+        tuple: (dict con array 1-D di lunghezza n, n)
+    """
+    colonne = {}
+    for chiave in CHIAVI_NUMERICHE:
+        if chiave in params_batch:
+            valore = params_batch[chiave]
+        elif chiave in CHIAVI_OPZIONALI:
+            valore = 0
+        else:
+            raise KeyError(chiave)
+        colonne[chiave] = np.atleast_1d(np.asarray(valore, dtype=int if chiave in CHIAVI_INTERE else float))
+    colonne['tipo_adeguamento'] = np.atleast_1d(np.asarray(params_batch['tipo_adeguamento'], dtype=object))
+
+    nomi = list(colonne)
+    if n is None:
+        allineati = np.broadcast_arrays(*colonne.values())
+        n = allineati[0].shape[0]
+    else:
+        allineati = [np.broadcast_to(arr, (n,)) for arr in colonne.values()]
+    p = {nome: np.ascontiguousarray(arr) for nome, arr in zip(nomi, allineati)}
+
+    if np.any(p['anni_investimento'] < 1):
+        raise ValueError("anni_investimento deve essere almeno 1 per ogni scenario")
+    if np.any(p['adeguamento_affitto_anni'] < 1):
+        raise ValueError("adeguamento_affitto_anni deve essere almeno 1 per ogni scenario")
+    return p, n
+
+
+def _investimento_iniziale(p):
+    """Investimento iniziale reale: costi sostenuti se inseriti, altrimenti valore immobile"""
+    costi_inseriti = (p['costo_acquisto'] > 0) | (p['costo_ristrutturazione'] > 0)
+    return np.where(
+        costi_inseriti,
+        p['costo_acquisto'] + p['costo_ristrutturazione'] + p['commissione_iniziale'],
+        p['valore_immobile'] + p['commissione_iniziale'],
+    )
+
+
+def calculate_roi_roe_metrics_batch(p, rendimento_totale_nominale, rendimento_totale_reale, deflatore_finale=None):
+    """
+    Versione vettoriale di calcoli.calculate_roi_roe_metrics (senza roe_note)
+
+    deflatore_finale è l'indice di inflazione all'orizzonte di ogni scenario; se None
+    è calcolato dall'inflazione costante inflazione_perc.
+    """
+    investimento_iniziale = _investimento_iniziale(p)
+    con_mutuo = p['rata_mutuo_mensile'] > 0
+    anni_con_mutuo = np.minimum(p['anni_restanti_mutuo'], p['anni_investimento'])
+    costi_mutuo_totali = np.where(con_mutuo, p['rata_mutuo_mensile'] * 12 * anni_con_mutuo, 0.0)
+
+    positivo = investimento_iniziale > 0
+    divisore = np.where(positivo, investimento_iniziale, 1.0)
+    roi_nominale = np.where(positivo, (rendimento_totale_nominale + costi_mutuo_totali) / divisore * 100, 0.0)
+    roi_reale = np.where(positivo, (rendimento_totale_reale + costi_mutuo_totali) / divisore * 100, 0.0)
+
+    # ROE sul capitale proprio effettivo dove il debito residuo del mutuo è noto
+    leva = calculate_leverage_batch(
+        p['debito_residuo_mutuo'], p['rata_mutuo_mensile'], p['anni_restanti_mutuo'], p['anni_investimento']
+    )
+    con_leva = con_mutuo & leva['valido']
+    if deflatore_finale is None:
+        deflatore_finale = (1 + p['inflazione_perc'] / 100) ** p['anni_investimento']
+    debito_iniziale = np.where(con_leva, p['debito_residuo_mutuo'], 0.0)
+    capitale_proprio = investimento_iniziale - debito_iniziale
+    rendimento_capitale_nominale = rendimento_totale_nominale + debito_iniziale - leva['debito_finale']
+    rendimento_capitale_reale = rendimento_totale_reale + debito_iniziale - leva['debito_finale'] / deflatore_finale
+
+    positivo_capitale = capitale_proprio > 0
+    divisore_capitale = np.where(positivo_capitale, capitale_proprio, 1.0)
+    roe_nominale = np.where(positivo_capitale, rendimento_capitale_nominale / divisore_capitale * 100, 0.0)
+    roe_reale = np.where(positivo_capitale, rendimento_capitale_reale / divisore_capitale * 100, 0.0)
+
+    return {
+        'roi_nominale': roi_nominale,
+        'roi_reale': roi_reale,
+        'roe_nominale': roe_nominale,
+        'roe_reale': roe_reale,
+        'investimento_iniziale': investimento_iniziale,
+        'capitale_proprio': capitale_proprio,
+        'tasso_implicito_mutuo': np.where(con_leva, leva['tasso_implicito_perc'], np.nan),
+        'debito_finale_mutuo': np.where(con_leva, leva['debito_finale'], 0.0),
+    }
+
+
+# Parametri che possono essere forniti come percorso annuale (n_scenari, anni)
+CHIAVI_PERCORSO = ('rivalutazione_annua', 'inflazione_perc', 'periodo_sfitto_perc')
+
+# Percorso facoltativo della crescita annua dei canoni di mercato (percentuale): se
+# presente, gli affitti indicizzati (tipo diverso da "Nessun Adeguamento") seguono
+# l'indice dei canoni invece di valore immobile o inflazione
+CHIAVE_CRESCITA_AFFITTI = 'crescita_affitti_perc'
+
+# Percorsi facoltativi del ciclo di vita degli inquilini (tenant.py): moltiplicatore
+# dell'affitto lordo (canone riallineato a ogni nuova locazione) e mesi di affitto
+# lordo pagati nell'anno come costi di rilocazione
+CHIAVE_FATTORE_AFFITTO = 'fattore_affitto'
+CHIAVE_MESI_RILOCAZIONE = 'mesi_rilocazione'
+
+# Calendario facoltativo degli eventi straordinari datati (events.make_events): importi
+# sparsi sommati agli affitti netti dell'anno, fuori dalla base imponibile dell'affitto
+CHIAVE_EVENTI = 'eventi'
+
+
+def _percorso(percorsi, chiave, n, anni_max):
+    """Restituisce il percorso indicato come matrice (n, anni_max) nelle sue unità"""
+    valori = np.asarray(percorsi[chiave], dtype=float)
+    if valori.shape[-1] < anni_max:
+        raise ValueError(f"Il percorso '{chiave}' copre {valori.shape[-1]} anni, ne servono {anni_max}")
+    return np.broadcast_to(valori[..., :anni_max], (n, anni_max))
+
+
+def _percorso_decimale(p, percorsi, chiave, n, anni_max):
+    """Restituisce il parametro percentuale come matrice decimale (n, anni_max)"""
+    if percorsi is not None and chiave in percorsi:
+        return _percorso(percorsi, chiave, n, anni_max) / 100
+    return np.broadcast_to((p[chiave] / 100)[:, None], (n, anni_max))
+
+
+def _scenari_percorsi(percorsi):
+    """Numero di scenari imposto dai percorsi 2-D (None se assenti)"""
+    if not percorsi:
+        return None
+    return max((np.shape(v)[0] for k, v in percorsi.items() if k != CHIAVE_EVENTI and np.ndim(v) == 2), default=None)
+
+
+def calculate_annual_components_batch(p, n, percorsi=None):
+    """
+    Componenti annuali di ricavi e costi, condivise dal motore annuale e da quello mensile
+
+    Args:
+        p: Dizionario normalizzato da normalize_batch
+        n: Numero di scenari
+        percorsi: Come in calculate_real_estate_investment_batch
+
+    Returns:
+        dict: Matrici (n, anni_max) di valori, affitti lordi ed effettivi, ogni voce di
+        costo, affitti netti (eventi straordinari inclusi), indice di inflazione e
+        decimali di sfitto; 'eventi_annuali' (None senza eventi); 'attivo' (anni entro
+        l'orizzonte) e 'anni_max'
+    """
+    manutenzione_decimal = p['manutenzione_straordinaria_perc'] / 100
+    tassazione_decimal = p['tassazione_affitti_perc'] / 100
+    tassa_catastale_decimal = p['tassa_catastale_perc'] / 100
+
+    anni_investimento = p['anni_investimento']
+    anni_max = int(anni_investimento.max())
+    anni = np.arange(1, anni_max + 1)
+    attivo = anni[None, :] <= anni_investimento[:, None]
+
+    rivalutazione_decimal = _percorso_decimale(p, percorsi, 'rivalutazione_annua', n, anni_max)
+    inflazione_decimal = _percorso_decimale(p, percorsi, 'inflazione_perc', n, anni_max)
+    periodo_sfitto_decimal = _percorso_decimale(p, percorsi, 'periodo_sfitto_perc', n, anni_max)
+
+    # Indici cumulativi di rivalutazione e inflazione (anno 1..anni_max)
+    indice_rivalutazione = np.cumprod(1 + rivalutazione_decimal, axis=1)
+    indice_inflazione = np.cumprod(1 + inflazione_decimal, axis=1)
+
+    valori_annuali = p['valore_immobile'][:, None] * indice_rivalutazione
+    costi_gestione_annuali = p['costi_gestione_euro'][:, None] * indice_inflazione
+    costi_assicurazione_annuali = p['costi_assicurazione_euro'][:, None] * indice_inflazione
+
+    # Adeguamento affitto: l'affitto vale quello fissato all'ultimo anno di adeguamento
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rapporto_affitto_iniziale = p['affitto_lordo'] / p['valore_immobile']
+    adeguamento = p['adeguamento_affitto_anni'][:, None]
+    ultimo_adeguamento = (anni[None, :] // adeguamento) * adeguamento
+    adeguato = ultimo_adeguamento > 0
+    indice_adeguamento = np.maximum(ultimo_adeguamento - 1, 0)
+
+    tipo = p['tipo_adeguamento']
+    maschera_valore = (tipo == "Valore Immobile")[:, None] & adeguato
+    maschera_inflazione = (tipo == "Inflazione")[:, None] & adeguato
+
+    affitto_base = np.broadcast_to(p['affitto_lordo'][:, None], (n, anni_max))
+    affitto_da_valore = np.take_along_axis(valori_annuali, indice_adeguamento, axis=1) * rapporto_affitto_iniziale[:, None]
+    affitto_da_inflazione = np.take_along_axis(indice_inflazione, indice_adeguamento, axis=1) * p['affitto_lordo'][:, None]
+    affitti_lordi_annuali = np.where(
+        maschera_valore, affitto_da_valore,
+        np.where(maschera_inflazione, affitto_da_inflazione, affitto_base)
+    )
+    if percorsi is not None and CHIAVE_CRESCITA_AFFITTI in percorsi:
+        indice_affitti = np.cumprod(1 + _percorso_decimale(p, percorsi, CHIAVE_CRESCITA_AFFITTI, n, anni_max), axis=1)
+        affitto_da_indice = np.take_along_axis(indice_affitti, indice_adeguamento, axis=1) * p['affitto_lordo'][:, None]
+        affitti_lordi_annuali = np.where(maschera_valore | maschera_inflazione, affitto_da_indice, affitti_lordi_annuali)
+    if percorsi is not None and CHIAVE_FATTORE_AFFITTO in percorsi:
+        affitti_lordi_annuali = affitti_lordi_annuali * _percorso(percorsi, CHIAVE_FATTORE_AFFITTO, n, anni_max)
+
+    rata_mutuo_annua = np.where(p['rata_mutuo_mensile'] > 0, p['rata_mutuo_mensile'] * 12, 0.0)
+    costi_mutuo_annuali = np.where(
+        anni[None, :] <= p['anni_restanti_mutuo'][:, None], rata_mutuo_annua[:, None], 0.0
+    )
+
+    tassa_catastale = valori_annuali * tassa_catastale_decimal[:, None]
+    affitto_effettivo = affitti_lordi_annuali * (1 - periodo_sfitto_decimal)
+    tasse_affitto = affitto_effettivo * tassazione_decimal[:, None]
+    manutenzione_annua = valori_annuali * manutenzione_decimal[:, None]
+
+    costi_totali_annui = (
+        costi_assicurazione_annuali
+        + costi_gestione_annuali
+        + manutenzione_annua
+        + tassa_catastale
+        + tasse_affitto
+        + costi_mutuo_annuali
+    )
+    if percorsi is not None and CHIAVE_MESI_RILOCAZIONE in percorsi:
+        mesi_rilocazione = _percorso(percorsi, CHIAVE_MESI_RILOCAZIONE, n, anni_max)
+        costi_totali_annui = costi_totali_annui + affitti_lordi_annuali / 12 * mesi_rilocazione
+    affitti_netti_annuali = affitto_effettivo - costi_totali_annui
+    eventi_annuali = None
+    if percorsi is not None and CHIAVE_EVENTI in percorsi:
+        eventi_annuali = scatter_events_annual(percorsi[CHIAVE_EVENTI], indice_inflazione)
+        affitti_netti_annuali = affitti_netti_annuali + eventi_annuali
+
+    return {
+        'anni_max': anni_max,
+        'attivo': attivo,
+        'indice_inflazione': indice_inflazione,
+        'periodo_sfitto_decimal': periodo_sfitto_decimal,
+        'valori_annuali': valori_annuali,
+        'affitti_lordi_annuali': affitti_lordi_annuali,
+        'affitto_effettivo': affitto_effettivo,
+        'costi_assicurazione_annuali': costi_assicurazione_annuali,
+        'costi_gestione_annuali': costi_gestione_annuali,
+        'manutenzione_annua': manutenzione_annua,
+        'tassa_catastale': tassa_catastale,
+        'tasse_affitto': tasse_affitto,
+        'costi_mutuo_annuali': costi_mutuo_annuali,
+        'eventi_annuali': eventi_annuali,
+        'affitti_netti_annuali': affitti_netti_annuali,
+    }
+
+
+def calculate_real_estate_investment_batch(params_batch, percorsi=None, componenti=None, fallback_irr=True):
+    """
+    Versione vettoriale di calcoli.calculate_real_estate_investment_improved
+
+    Elabora n scenari in un solo passaggio: la crescita di valore e costi è calcolata
+    con prodotti cumulativi e l'adeguamento dell'affitto con maschere, senza cicli
+    Python sugli anni.
+
+    Args:
+        params_batch: Dizionario chiave params -> array (o scalare, replicato su tutti
+            gli scenari). 'tipo_adeguamento' è un array di stringhe. Gli orizzonti
+            'anni_investimento' possono differire tra scenari.
+        percorsi: Dizionario opzionale con chiavi in CHIAVI_PERCORSO e valori percentuali
+            anno per anno, array (n_scenari, anni) o (anni,). Sostituiscono la costante
+            corrispondente di params_batch; l'adeguamento all'inflazione e i valori
+            reali usano l'inflazione cumulata effettiva del percorso. Può contenere
+            anche CHIAVE_CRESCITA_AFFITTI (crescita dei canoni di mercato),
+            CHIAVE_FATTORE_AFFITTO e CHIAVE_MESI_RILOCAZIONE (valori non percentuali)
+            e CHIAVE_EVENTI (calendario sparso di events.make_events, distribuito
+            sugli anni con un solo bincount).
+        componenti: Risultato di calculate_annual_components_batch per gli stessi
+            scenari, da riusare quando tra una chiamata e l'altra cambiano solo
+            chiavi di CHIAVI_SOLO_FINALI; None = calcolate qui
+        fallback_irr: Passato a irr.solve_irr_batch; False lascia NaN i TIR senza
+            intervallo nella griglia invece di risolverli uno per uno con fsolve
+
+    Returns:
+        dict: Stesse chiavi della versione scalare (eccetto 'roe_note'). Le serie annuali
+        sono array (n_scenari, anni) con anni = max(anni_investimento); gli anni oltre
+        l'orizzonte di uno scenario valgono NaN. I flussi di cassa sono array
+        (n_scenari, anni + 1) completati con zeri. Le metriche finali sono array (n_scenari,).
+    """
+    p, n = normalize_batch(params_batch, _scenari_percorsi(percorsi))
+    if componenti is None:
+        componenti = calculate_annual_components_batch(p, n, percorsi)
+    anni_investimento = p['anni_investimento']
+    anni_max = componenti['anni_max']
+    righe = np.arange(n)
+    attivo = componenti['attivo']
+    valori_annuali = componenti['valori_annuali']
+    indice_inflazione = componenti['indice_inflazione']
+    costi_gestione_annuali = componenti['costi_gestione_annuali']
+    affitti_lordi_annuali = componenti['affitti_lordi_annuali']
+    costi_mutuo_annuali = componenti['costi_mutuo_annuali']
+    affitti_netti_annuali = componenti['affitti_netti_annuali']
+
+    valore_positivo = p['valore_immobile'] > 0
+    rendimenti_annuali = np.where(
+        valore_positivo[:, None],
+        affitti_netti_annuali / np.where(valore_positivo, p['valore_immobile'], 1.0)[:, None] * 100,
+        0.0,
+    )
+
+    # Valori finali all'orizzonte di ciascuno scenario
+    indice_finale = anni_investimento - 1
+    valore_finale_nominale = valori_annuali[righe, indice_finale]
+    deflatore_finale = indice_inflazione[righe, indice_finale]
+    valore_finale_reale = valore_finale_nominale / deflatore_finale
+
+    affitti_netti_attivi = np.where(attivo, affitti_netti_annuali, 0.0)
+    affitti_netti_reali = affitti_netti_attivi / indice_inflazione
+    totale_affitti_netti = affitti_netti_attivi.sum(axis=1)
+    totale_affitti_netti_reale = affitti_netti_reali.sum(axis=1)
+    totale_costi_mutuo = np.where(attivo, costi_mutuo_annuali, 0.0).sum(axis=1)
+    rendimento_medio_annuo = np.where(attivo, rendimenti_annuali, 0.0).sum(axis=1) / anni_investimento
+
+    costi_inseriti = (p['costo_acquisto'] > 0) | (p['costo_ristrutturazione'] > 0)
+    plusvalore_minusvalore_iniziale = np.where(
+        costi_inseriti, p['valore_immobile'] - (p['costo_acquisto'] + p['costo_ristrutturazione']), 0.0
+    )
+    investimento_iniziale_totale = _investimento_iniziale(p)
+
+    guadagno_capitale_nominale = valore_finale_nominale - p['valore_immobile']
+    guadagno_capitale_reale = valore_finale_reale - p['valore_immobile']
+
+    rendimento_totale_nominale = (
+        totale_affitti_netti + guadagno_capitale_nominale + plusvalore_minusvalore_iniziale
+        - p['commissione_iniziale'] - p['commissione_finale']
+    )
+    rendimento_totale_reale = (
+        totale_affitti_netti_reale + guadagno_capitale_reale + plusvalore_minusvalore_iniziale
+        - p['commissione_iniziale'] - p['commissione_finale']
+    )
+
+    valore_finale_totale_nominale = valore_finale_nominale + totale_affitti_netti - p['commissione_finale']
+    valore_finale_totale_reale = valore_finale_reale + totale_affitti_netti_reale - p['commissione_finale']
+
+    investimento_positivo = investimento_iniziale_totale > 0
+    divisore_investimento = np.where(investimento_positivo, investimento_iniziale_totale, 1.0)
+    with np.errstate(invalid='ignore'):
+        cagr_nominale = np.where(
+            investimento_positivo,
+            (valore_finale_totale_nominale / divisore_investimento) ** (1 / anni_investimento) - 1, 0.0
+        )
+        cagr_reale = np.where(
+            investimento_positivo,
+            (valore_finale_totale_reale / divisore_investimento) ** (1 / anni_investimento) - 1, 0.0
+        )
+
+    affitto_iniziale = p['affitto_lordo']
+    affitto_finale = affitti_lordi_annuali[righe, indice_finale]
+    affitto_positivo = affitto_iniziale > 0
+    rapporto_affitto = affitto_finale / np.where(affitto_positivo, affitto_iniziale, 1.0)
+    crescita_affitto_totale = np.where(affitto_positivo, (rapporto_affitto - 1) * 100, 0.0)
+    crescita_affitto_annua = np.where(
+        affitto_positivo, (rapporto_affitto ** (1 / anni_investimento) - 1) * 100, 0.0
+    )
+
+    costi_gestione_finali = costi_gestione_annuali[righe, indice_finale]
+    gestione_positiva = p['costi_gestione_euro'] > 0
+    crescita_costi_gestione = np.where(
+        gestione_positiva,
+        (costi_gestione_finali / np.where(gestione_positiva, p['costi_gestione_euro'], 1.0) - 1) * 100, 0.0
+    )
+
+    roi_roe_metrics = calculate_roi_roe_metrics_batch(
+        p, rendimento_totale_nominale, rendimento_totale_reale, deflatore_finale
+    )
+
+    # Flussi di cassa per il TIR: anno 0 investimento, anno N affitto + valore finale - commissione
+    cash_flows_nominal = np.zeros((n, anni_max + 1))
+    cash_flows_nominal[:, 0] = -investimento_iniziale_totale
+    cash_flows_nominal[:, 1:] = affitti_netti_attivi
+    cash_flows_nominal[righe, anni_investimento] += valore_finale_nominale - p['commissione_finale']
+
+    cash_flows_real = np.zeros((n, anni_max + 1))
+    cash_flows_real[:, 0] = -investimento_iniziale_totale
+    cash_flows_real[:, 1:] = affitti_netti_reali
+    cash_flows_real[righe, anni_investimento] += valore_finale_reale - p['commissione_finale']
+
+    # TIR nominale e reale di tutti gli scenari in un'unica risoluzione
+    soluzione = solve_irr_batch(np.vstack([cash_flows_nominal, cash_flows_real]), fallback=fallback_irr)
+    tir = np.where(soluzione['status'] == IRR_CONVERGED, soluzione['irr'] * 100, np.nan)
+    tir_nominale, tir_reale = tir[:n], tir[n:]
+
+    # Serie annuali oltre l'orizzonte dello scenario: NaN
+    def _serie(valori):
+        return np.where(attivo, valori, np.nan)
+
+    return {
+        'valori_annuali': _serie(valori_annuali),
+        'affitti_lordi_annuali': _serie(affitti_lordi_annuali),
+        'affitti_netti_annuali': _serie(affitti_netti_annuali),
+        'rendimenti_annuali': _serie(rendimenti_annuali),
+        'costi_gestione_annuali': _serie(costi_gestione_annuali),
+        'costi_mutuo_annuali': _serie(costi_mutuo_annuali),
+        'valore_finale_nominale': valore_finale_nominale,
+        'valore_finale_reale': valore_finale_reale,
+        'totale_affitti_netti': totale_affitti_netti,
+        'totale_affitti_netti_reale': totale_affitti_netti_reale,
+        'totale_costi_mutuo': totale_costi_mutuo,
+        'rendimento_medio_annuo': rendimento_medio_annuo,
+        'guadagno_capitale_nominale': guadagno_capitale_nominale,
+        'guadagno_capitale_reale': guadagno_capitale_reale,
+        'rendimento_totale_nominale': rendimento_totale_nominale,
+        'rendimento_totale_reale': rendimento_totale_reale,
+        'cagr_nominale': cagr_nominale,
+        'cagr_reale': cagr_reale,
+        'affitto_finale': affitto_finale,
+        'crescita_affitto_totale': crescita_affitto_totale,
+        'crescita_affitto_annua': crescita_affitto_annua,
+        'costi_gestione_finali': costi_gestione_finali,
+        'crescita_costi_gestione': crescita_costi_gestione,
+        'commissione_iniziale': p['commissione_iniziale'],
+        'commissione_finale': p['commissione_finale'],
+        'plusvalore_minusvalore_iniziale': plusvalore_minusvalore_iniziale,
+        'costo_acquisto': p['costo_acquisto'],
+        'costo_ristrutturazione': p['costo_ristrutturazione'],
+        'investimento_iniziale_reale': investimento_iniziale_totale,
+        # ROI e ROE
+        'roi_nominale': roi_roe_metrics['roi_nominale'],
+        'roi_reale': roi_roe_metrics['roi_reale'],
+        'roe_nominale': roi_roe_metrics['roe_nominale'],
+        'roe_reale': roi_roe_metrics['roe_reale'],
+        'investimento_iniziale': roi_roe_metrics['investimento_iniziale'],
+        'capitale_proprio': roi_roe_metrics['capitale_proprio'],
+        # TIR/IRR (NaN se non calcolabile, motivo in tir_status_*)
+        'tir_nominale': tir_nominale,
+        'tir_reale': tir_reale,
+        'tir_status_nominale': soluzione['status'][:n],
+        'tir_status_reale': soluzione['status'][n:],
+        'cash_flows_nominal': cash_flows_nominal,
+        'cash_flows_real': cash_flows_real,
+    }
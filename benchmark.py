@@ -0,0 +1,508 @@
+"""
+Benchmark del motore di calcolo e del rendering dei risultati
+
+Esempi:
+    python benchmark.py import
+    python benchmark.py run --output bench_nuovo.json
+    python benchmark.py compare bench_base.json bench_nuovo.json --soglia 10
+    python benchmark.py scaling
+    python benchmark.py parallel --scenari 1000000
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+
+# Tempo massimo di import a freddo del motore (secondi): il totale è confrontato con
+# l'import di solo NumPy misurato sulla stessa macchina (da solo 60-100 ms e molto
+# variabile) più un margine; il motore al netto di NumPy con una soglia assoluta
+MARGINE_IMPORT = 0.030
+SOGLIA_IMPORT_MOTORE = 0.025
+
+_SCRIPT_IMPORT = """
+import sys, time, json
+inizio = time.perf_counter()
+import numpy
+intermedio = time.perf_counter()
+import core
+fine = time.perf_counter()
+print(json.dumps({
+    'totale': fine - inizio,
+    'motore': fine - intermedio,
+    'caricati': [m for m in core.MODULI_ESCLUSI if m in sys.modules],
+}))
+"""
+
+_SCRIPT_IMPORT_NUMPY = """
+import time
+inizio = time.perf_counter()
+import numpy
+print(time.perf_counter() - inizio)
+"""
+
+
+def benchmark_import(ripetizioni=5):
+    """
+    Misura l'import a freddo di core in processi Python nuovi
+
+    L'avvio dell'interprete è escluso: si cronometra solo l'import. Il tempo 'motore'
+    esclude NumPy (che da solo pesa gran parte del totale). La soglia del totale è
+    l'import di solo NumPy, misurato in processi alternati a quelli di core, più
+    MARGINE_IMPORT. L'esito usa i minimi delle ripetizioni, meno sensibili al rumore
+    del sistema.
+
+    Returns:
+        dict: durate totali, del solo motore e di solo NumPy (s), minimi, mediane,
+        soglia del totale, moduli esclusi caricati comunque, esito
+    """
+    totali, motore, numpy_soli = [], [], []
+    caricati = set()
+    for _ in range(ripetizioni):
+        uscita = subprocess.run(
+            [sys.executable, '-c', _SCRIPT_IMPORT], capture_output=True, text=True, check=True
+        )
+        misura = json.loads(uscita.stdout)
+        totali.append(misura['totale'])
+        motore.append(misura['motore'])
+        caricati.update(misura['caricati'])
+        uscita = subprocess.run(
+            [sys.executable, '-c', _SCRIPT_IMPORT_NUMPY], capture_output=True, text=True, check=True
+        )
+        numpy_soli.append(float(uscita.stdout))
+    soglia_totale = min(numpy_soli) + MARGINE_IMPORT
+    return {
+        'totali': totali,
+        'motore': motore,
+        'numpy': numpy_soli,
+        'minimo_totale': min(totali),
+        'mediana_totale': float(np.median(totali)),
+        'minimo_motore': min(motore),
+        'mediana_motore': float(np.median(motore)),
+        'minimo_numpy': min(numpy_soli),
+        'soglia_totale': soglia_totale,
+        'moduli_esclusi_caricati': sorted(caricati),
+        'ok': min(totali) < soglia_totale and min(motore) < SOGLIA_IMPORT_MOTORE and not caricati,
+    }
+
+
+# Scenario di riferimento: valori di default della UI
+PARAMS_BENCHMARK = {
+    'valore_immobile': 200000.0,
+    'costo_acquisto': 0.0,
+    'costo_ristrutturazione': 0.0,
+    'affitto_lordo': 1000.0,
+    'rivalutazione_annua': 2.0,
+    'anni_investimento': 10,
+    'costi_assicurazione_euro': 250.0,
+    'costi_gestione_euro': 250.0,
+    'rata_mutuo_mensile': 0.0,
+    'anni_restanti_mutuo': 0,
+    'manutenzione_straordinaria_perc': 1.0,
+    'tassazione_affitti_perc': 21.0,
+    'tassa_catastale_perc': 0.8,
+    'periodo_sfitto_perc': 5.0,
+    'inflazione_perc': 2.0,
+    'adeguamento_affitto_anni': 4,
+    'tipo_adeguamento': "Inflazione",
+    'commissione_iniziale': 0.0,
+    'commissione_finale': 0.0,
+}
+
+LUNGHEZZE_IRR = (5, 10, 25, 50, 100, 200, 400, 600)
+ORIZZONTI_MODELLO = (1, 5, 10, 25, 50, 100)
+MUTUO_BENCHMARK = {'rata_mutuo_mensile': 600.0, 'anni_restanti_mutuo': 20}
+# Numero di mutui per chiamata nei casi della suite 'mutuo' (studi di leva)
+MUTUI_BENCHMARK = 1000
+# Immobili del portafoglio nella suite 'portafoglio' (obiettivo: ben sotto il secondo)
+IMMOBILI_PORTAFOGLIO = 10_000
+# Eventi straordinari distribuiti sugli stessi immobili nella suite 'eventi'
+EVENTI_PORTAFOGLIO = 100_000
+
+SUITE = ('irr', 'irr_real_estate', 'modello', 'mensile', 'mutuo', 'portafoglio', 'eventi', 'ui')
+PERCENTILI_LATENZA = (50, 90, 99)
+
+# Peggioramento percentuale della latenza mediana oltre cui il confronto fallisce
+SOGLIA_REGRESSIONE_PERC = 10.0
+
+# Scalabilità rispetto all'orizzonte: periodi dei flussi (fino a 100 anni mensili)
+# e anni del modello completo
+PERIODI_SCALING = (12, 60, 120, 300, 600, 1200)
+ANNI_SCALING = (10, 25, 50, 100, 200, 400)
+# Esponente massimo di t ~ periodi^k ammesso (1 = lineare)
+SOGLIA_ESPONENTE = 1.2
+
+# Scenari del confronto tra il batch unico e parallel.evaluate_parallel
+SCENARI_PARALLELO = 400_000
+
+
+def _misura(funzione, tempo_minimo=0.3, min_ripetizioni=5, max_ripetizioni=10000):
+    """
+    Cronometra funzione() ripetutamente e ne misura il picco di memoria
+
+    Le ripetizioni proseguono fino a tempo_minimo secondi (almeno min_ripetizioni).
+    Il picco di memoria è misurato con tracemalloc in una chiamata separata, per non
+    rallentare le misure di tempo.
+
+    Returns:
+        dict: ripetizioni, throughput (scenari/s), latenze in ms (media e percentili),
+        picco_memoria_kb
+    """
+    funzione()  # riscaldamento
+    latenze = []
+    inizio = time.perf_counter()
+    while len(latenze) < max_ripetizioni and (len(latenze) < min_ripetizioni or time.perf_counter() - inizio < tempo_minimo):
+        t0 = time.perf_counter()
+        funzione()
+        latenze.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    funzione()
+    _, picco = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latenze = np.asarray(latenze) * 1000
+    risultato = {
+        'ripetizioni': len(latenze),
+        'throughput': float(1000 / latenze.mean()),
+        'latenza_media_ms': float(latenze.mean()),
+        'picco_memoria_kb': picco / 1024,
+    }
+    for percentile, valore in zip(PERCENTILI_LATENZA, np.percentile(latenze, PERCENTILI_LATENZA)):
+        risultato[f'latenza_p{percentile}_ms'] = float(valore)
+    return risultato
+
+
+def _flussi_irr(lunghezza):
+    """Flussi di cassa deterministici: investimento iniziale e rientri crescenti"""
+    flussi = 80.0 * 1.02 ** np.arange(lunghezza)
+    flussi[0] = -1000.0
+    flussi[-1] += 1200.0
+    return flussi.tolist()
+
+
+def _params_modello(anni, mutuo):
+    params = dict(PARAMS_BENCHMARK, anni_investimento=anni)
+    if mutuo:
+        params.update(MUTUO_BENCHMARK)
+    return params
+
+
+def _casi_irr():
+    from calcoli import calculate_irr
+    for lunghezza in LUNGHEZZE_IRR:
+        flussi = _flussi_irr(lunghezza)
+        yield f'irr/len={lunghezza}', lambda flussi=flussi: calculate_irr(flussi)
+
+
+def _casi_irr_real_estate():
+    from calcoli import calculate_irr_for_real_estate, calculate_real_estate_investment_improved
+    for anni in (10, 30):
+        params = _params_modello(anni, False)
+        risultati = calculate_real_estate_investment_improved(params)
+        argomenti = (params, risultati['affitti_netti_annuali'], risultati['valore_finale_nominale'], risultati['valore_finale_reale'])
+        yield f'irr_real_estate/anni={anni}', lambda argomenti=argomenti: calculate_irr_for_real_estate(*argomenti)
+
+
+def _casi_modello():
+    from calcoli import calculate_real_estate_investment_improved
+    for mutuo in (False, True):
+        for anni in ORIZZONTI_MODELLO:
+            params = _params_modello(anni, mutuo)
+            nome = f"modello/anni={anni}/{'mutuo' if mutuo else 'senza_mutuo'}"
+            yield nome, lambda params=params: calculate_real_estate_investment_improved(params)
+
+
+def _casi_mensile():
+    from monthly import calculate_monthly_cash_flows
+    for anni in (10, 30, 100):
+        params = _params_modello(anni, True)
+        yield f'mensile/anni={anni}', lambda params=params: calculate_monthly_cash_flows(params)
+
+
+def _casi_mutuo():
+    from mortgage import amortization_schedule_batch
+    generatore = np.random.default_rng(0)
+    capitale = generatore.uniform(50000, 500000, MUTUI_BENCHMARK)
+    durata_mesi = 12 * generatore.integers(10, 31, MUTUI_BENCHMARK)
+    tasso_fisso = generatore.uniform(1, 6, MUTUI_BENCHMARK)
+    # Tasso variabile rivisto ogni anno e rimborsi anticipati sparsi
+    tasso_variabile = np.repeat(np.round(generatore.uniform(1, 6, (MUTUI_BENCHMARK, 30)), 1), 12, axis=1)
+    rimborsi = np.where(generatore.random((MUTUI_BENCHMARK, 360)) < 0.005, 10000.0, 0.0)
+    yield f'mutuo/fisso/n={MUTUI_BENCHMARK}', lambda: amortization_schedule_batch(capitale, tasso_fisso, durata_mesi)
+    yield f'mutuo/variabile_rimborsi/n={MUTUI_BENCHMARK}', lambda: amortization_schedule_batch(
+        capitale, tasso_variabile, durata_mesi, rimborsi
+    )
+
+
+def _batch_portafoglio(generatore, n=IMMOBILI_PORTAFOGLIO):
+    """n immobili casuali attorno a PARAMS_BENCHMARK"""
+    from batch import params_to_batch
+    params_batch = params_to_batch([PARAMS_BENCHMARK])
+    params_batch.update({
+        'valore_immobile': generatore.uniform(50000, 500000, n),
+        'affitto_lordo': generatore.uniform(3000, 30000, n),
+        'anni_investimento': generatore.integers(5, 31, n),
+        'rata_mutuo_mensile': np.where(generatore.random(n) < 0.5, 600.0, 0.0),
+        'anni_restanti_mutuo': generatore.integers(0, 25, n),
+    })
+    return params_batch
+
+
+def _casi_portafoglio():
+    from portfolio import calculate_portfolio_batch
+    generatore = np.random.default_rng(0)
+    params_batch = _batch_portafoglio(generatore)
+    anni_acquisto = generatore.integers(1995, 2025, IMMOBILI_PORTAFOGLIO)
+    yield f'portafoglio/n={IMMOBILI_PORTAFOGLIO}', lambda: calculate_portfolio_batch(params_batch, anni_acquisto)
+
+
+def _casi_eventi():
+    """Motore sugli stessi immobili senza e con eventi straordinari: il costo è la differenza"""
+    from batch import calculate_real_estate_investment_batch, CHIAVE_EVENTI
+    from events import make_events
+    generatore = np.random.default_rng(0)
+    params_batch = _batch_portafoglio(generatore)
+    eventi = make_events(
+        generatore.integers(1, 31, EVENTI_PORTAFOGLIO),
+        generatore.uniform(-30000, 10000, EVENTI_PORTAFOGLIO),
+        riga=generatore.integers(0, IMMOBILI_PORTAFOGLIO, EVENTI_PORTAFOGLIO),
+    )
+    yield f'eventi/n={IMMOBILI_PORTAFOGLIO}/senza', lambda: calculate_real_estate_investment_batch(params_batch)
+    yield (f'eventi/n={IMMOBILI_PORTAFOGLIO}/eventi={EVENTI_PORTAFOGLIO}',
+           lambda: calculate_real_estate_investment_batch(params_batch, {CHIAVE_EVENTI: eventi}))
+
+
+def _script_render(results, params):
+    """Script eseguito da AppTest: solo il rendering dei risultati"""
+    from ui import display_real_estate_results_simplified
+    display_real_estate_results_simplified(results, params)
+
+
+def _casi_ui():
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return
+    from calcoli import calculate_real_estate_investment_improved
+    for anni in (10, 30):
+        params = _params_modello(anni, False)
+        risultati = calculate_real_estate_investment_improved(params)
+        app = AppTest.from_function(_script_render, args=(risultati, params), default_timeout=60)
+        yield f'ui/render/anni={anni}', lambda app=app: _esegui_app(app)
+
+
+def _esegui_app(app):
+    app.run()
+    if app.exception:
+        raise RuntimeError(f"Errore nel rendering: {app.exception[0].value}")
+
+
+CASI_SUITE = {
+    'irr': _casi_irr,
+    'irr_real_estate': _casi_irr_real_estate,
+    'modello': _casi_modello,
+    'mensile': _casi_mensile,
+    'mutuo': _casi_mutuo,
+    'portafoglio': _casi_portafoglio,
+    'eventi': _casi_eventi,
+    'ui': _casi_ui,
+}
+
+
+def run_benchmarks(suite=SUITE, tempo_minimo=0.3):
+    """
+    Esegue le suite di benchmark richieste
+
+    Returns:
+        dict: 'meta' (ambiente e data) e 'risultati' (nome caso -> misure di _misura)
+    """
+    risultati = {}
+    for nome_suite in suite:
+        for nome, funzione in CASI_SUITE[nome_suite]():
+            risultati[nome] = dict(_misura(funzione, tempo_minimo), suite=nome_suite)
+    return {
+        'meta': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'piattaforma': platform.platform(),
+        },
+        'risultati': risultati,
+    }
+
+
+def compare_benchmarks(base, nuovo, soglia_perc=SOGLIA_REGRESSIONE_PERC, metrica='latenza_p50_ms'):
+    """
+    Confronta due esecuzioni di run_benchmarks sui casi comuni
+
+    Returns:
+        tuple: (lista di dict caso, base, nuovo, variazione_perc, regressione; lista regressioni)
+    """
+    confronto = []
+    for nome, misure in nuovo['risultati'].items():
+        if nome not in base['risultati']:
+            continue
+        valore_base = base['risultati'][nome][metrica]
+        valore_nuovo = misure[metrica]
+        variazione = (valore_nuovo - valore_base) / valore_base * 100 if valore_base > 0 else 0.0
+        confronto.append({
+            'caso': nome,
+            'base': valore_base,
+            'nuovo': valore_nuovo,
+            'variazione_perc': variazione,
+            'regressione': variazione > soglia_perc,
+        })
+    return confronto, [riga for riga in confronto if riga['regressione']]
+
+
+def benchmark_scaling(tempo_minimo=0.2):
+    """
+    Verifica che il costo cresca al più linearmente con l'orizzonte
+
+    Misura la latenza mediana di calculate_irr su PERIODI_SCALING e del modello completo
+    (con mutuo) su ANNI_SCALING, e stima l'esponente k di t ~ periodi^k con una
+    regressione log-log. Un costo fisso per chiamata porta k sotto 1.
+
+    Returns:
+        dict: per 'irr' e 'modello' le lunghezze, le latenze p50 (ms), l'esponente
+        e l'esito rispetto a SOGLIA_ESPONENTE
+    """
+    from calcoli import calculate_irr, calculate_real_estate_investment_improved
+    casi = {
+        'irr': (PERIODI_SCALING, lambda periodi: (lambda flussi=_flussi_irr(periodi): calculate_irr(flussi))),
+        'modello': (ANNI_SCALING, lambda anni: (lambda params=_params_modello(anni, True): calculate_real_estate_investment_improved(params))),
+    }
+    risultato = {}
+    for nome, (lunghezze, costruttore) in casi.items():
+        latenze = [_misura(costruttore(lunghezza), tempo_minimo)['latenza_p50_ms'] for lunghezza in lunghezze]
+        esponente = float(np.polyfit(np.log(lunghezze), np.log(latenze), 1)[0])
+        risultato[nome] = {
+            'lunghezze': list(lunghezze),
+            'latenze_p50_ms': latenze,
+            'esponente': esponente,
+            'ok': esponente <= SOGLIA_ESPONENTE,
+        }
+    return risultato
+
+
+def benchmark_parallel(n=SCENARI_PARALLELO, workers=None, ripetizioni=3):
+    """
+    Accelerazione di parallel.evaluate_parallel rispetto al batch vettoriale unico
+
+    Ogni configurazione è misurata ripetizioni volte (tempo minimo), avvio del pool
+    incluso. Di default i processi sono 1, 2, 4, ... fino al numero di CPU.
+
+    Returns:
+        dict: 'n', 'cpu', 'batch_unico_s' e per ogni numero di processi il tempo,
+        l'accelerazione e l'efficienza (accelerazione / processi)
+    """
+    from batch import calculate_real_estate_investment_batch
+    from parallel import evaluate_parallel
+    cpu = os.cpu_count() or 1
+    if workers is None:
+        workers = sorted({min(2 ** k, cpu) for k in range(cpu.bit_length() + 1)})
+    params_batch = _batch_portafoglio(np.random.default_rng(0), n)
+
+    def _tempo(funzione):
+        tempi = []
+        for _ in range(ripetizioni):
+            inizio = time.perf_counter()
+            funzione()
+            tempi.append(time.perf_counter() - inizio)
+        return min(tempi)
+
+    base = _tempo(lambda: calculate_real_estate_investment_batch(params_batch))
+    risultato = {'n': n, 'cpu': cpu, 'batch_unico_s': base, 'processi': {}}
+    for processi in workers:
+        tempo = _tempo(lambda: evaluate_parallel(params_batch, workers=processi))
+        risultato['processi'][processi] = {
+            'tempo_s': tempo,
+            'accelerazione': base / tempo,
+            'efficienza': base / tempo / processi,
+        }
+    return risultato
+
+
+def _stampa_risultati(risultati):
+    print(f"{'caso':<34}{'scenari/s':>12}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'picco KB':>10}")
+    for nome, misure in risultati['risultati'].items():
+        print(f"{nome:<34}{misure['throughput']:>12.1f}{misure['latenza_p50_ms']:>10.3f}"
+              f"{misure['latenza_p90_ms']:>10.3f}{misure['latenza_p99_ms']:>10.3f}{misure['picco_memoria_kb']:>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del motore di calcolo")
+    sottocomandi = parser.add_subparsers(dest='comando', required=True)
+    sottocomando = sottocomandi.add_parser('import', help="Tempo di import a freddo di core")
+    sottocomando.add_argument('--ripetizioni', type=int, default=5)
+    sottocomando = sottocomandi.add_parser('run', help="Esegue le suite e salva le misure in JSON")
+    sottocomando.add_argument('--suite', nargs='+', choices=SUITE, default=list(SUITE))
+    sottocomando.add_argument('--tempo-minimo', type=float, default=0.3, help="Secondi di misura per caso")
+    sottocomando.add_argument('--output', help="File JSON dei risultati")
+    sottocomando = sottocomandi.add_parser('scaling', help="Scalabilità del costo rispetto all'orizzonte")
+    sottocomando.add_argument('--tempo-minimo', type=float, default=0.2, help="Secondi di misura per caso")
+    sottocomando = sottocomandi.add_parser('parallel', help="Accelerazione del pool di processi sul batch unico")
+    sottocomando.add_argument('--scenari', type=int, default=SCENARI_PARALLELO, help="Scenari valutati")
+    sottocomando.add_argument('--workers', type=int, nargs='+', help="Processi da provare (default potenze di 2 fino alle CPU)")
+    sottocomando.add_argument('--ripetizioni', type=int, default=3)
+    sottocomando = sottocomandi.add_parser('compare', help="Confronta due file JSON di risultati")
+    sottocomando.add_argument('base')
+    sottocomando.add_argument('nuovo')
+    sottocomando.add_argument('--soglia', type=float, default=SOGLIA_REGRESSIONE_PERC,
+                              help="Peggioramento massimo ammesso della latenza mediana (%%)")
+    args = parser.parse_args(argv)
+
+    if args.comando == 'import':
+        risultato = benchmark_import(args.ripetizioni)
+        print(f"Import core: minimo {risultato['minimo_totale'] * 1000:.1f} ms, "
+              f"mediana {risultato['mediana_totale'] * 1000:.1f} ms (soglia {risultato['soglia_totale'] * 1000:.0f} ms: "
+              f"solo NumPy {risultato['minimo_numpy'] * 1000:.1f} ms + {MARGINE_IMPORT * 1000:.0f} ms)")
+        print(f"Solo motore (NumPy escluso): minimo {risultato['minimo_motore'] * 1000:.1f} ms, "
+              f"mediana {risultato['mediana_motore'] * 1000:.1f} ms (soglia {SOGLIA_IMPORT_MOTORE * 1000:.0f} ms)")
+        if risultato['moduli_esclusi_caricati']:
+            print(f"Moduli non ammessi caricati: {', '.join(risultato['moduli_esclusi_caricati'])}")
+        return 0 if risultato['ok'] else 1
+
+    if args.comando == 'run':
+        risultati = run_benchmarks(args.suite, args.tempo_minimo)
+        _stampa_risultati(risultati)
+        if args.output:
+            with open(args.output, 'w') as file:
+                json.dump(risultati, file, indent=2)
+        return 0
+
+    if args.comando == 'scaling':
+        risultato = benchmark_scaling(args.tempo_minimo)
+        for nome, misure in risultato.items():
+            print(f"{nome}: esponente {misure['esponente']:.2f} (soglia {SOGLIA_ESPONENTE})")
+            for lunghezza, latenza in zip(misure['lunghezze'], misure['latenze_p50_ms']):
+                print(f"  {lunghezza:>6} periodi  {latenza:>9.3f} ms")
+        return 0 if all(misure['ok'] for misure in risultato.values()) else 1
+
+    if args.comando == 'parallel':
+        risultato = benchmark_parallel(args.scenari, args.workers, args.ripetizioni)
+        print(f"{risultato['n']:,} scenari, {risultato['cpu']} CPU; batch unico {risultato['batch_unico_s']:.2f} s")
+        print(f"{'processi':>10}{'tempo s':>10}{'accel.':>10}{'effic.':>10}")
+        for processi, misure in risultato['processi'].items():
+            print(f"{processi:>10}{misure['tempo_s']:>10.2f}{misure['accelerazione']:>10.2f}{misure['efficienza']:>10.2f}")
+        return 0
+
+    with open(args.base) as file:
+        base = json.load(file)
+    with open(args.nuovo) as file:
+        nuovo = json.load(file)
+    confronto, regressioni = compare_benchmarks(base, nuovo, args.soglia)
+    for riga in confronto:
+        segnale = "  REGRESSIONE" if riga['regressione'] else ""
+        print(f"{riga['caso']:<34}{riga['base']:>10.3f}{riga['nuovo']:>10.3f} ms{riga['variazione_perc']:>+9.1f}%{segnale}")
+    return 1 if regressioni else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from calcoli import calculate_real_estate_investment_improved
+
+CHIAVI_INTERE_CACHE = ('anni_investimento', 'anni_restanti_mutuo', 'adeguamento_affitto_anni')
+
+# Regole di arrotondamento per la chiave: importi al centesimo, percentuali a 1e-6
+DECIMALI_IMPORTI = 2
+DECIMALI_PERCENTUALI = 6
+
+# Limite di memoria di default (MB), modificabile con la variabile d'ambiente
+MEMORIA_MASSIMA_MB = float(os.environ.get('IMMOBILIARE_CACHE_MB', 64))
+
+
+def canonical_params(params):
+    """
+    Normalizza un dizionario params: tipi coerenti, chiavi opzionali esplicite e
+    valori float arrotondati (importi al centesimo, percentuali a 1e-6)
+
+    Due dizionari che differiscono solo per arrotondamenti o per int/float
+    producono lo stesso dizionario canonico.
+    """
+    canonico = {'costo_acquisto': 0.0, 'costo_ristrutturazione': 0.0, 'debito_residuo_mutuo': 0.0}
+    for chiave, valore in params.items():
+        if chiave in CHIAVI_INTERE_CACHE:
+            canonico[chiave] = int(valore)
+        elif isinstance(valore, str):
+            canonico[chiave] = valore
+        else:
+            decimali = DECIMALI_PERCENTUALI if chiave.endswith('_perc') or chiave == 'rivalutazione_annua' else DECIMALI_IMPORTI
+            # + 0.0 trasforma -0.0 in 0.0
+            canonico[chiave] = round(float(valore), decimali) + 0.0
+    return canonico
+
+
+def params_key(params):
+    """Hash SHA-256 della forma canonica di params"""
+    testo = json.dumps(canonical_params(params), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(testo.encode('utf-8')).hexdigest()
+
+
+def _stima_dimensione(valore):
+    """Stima approssimativa della memoria occupata da un risultato (byte)"""
+    if isinstance(valore, dict):
+        return sys.getsizeof(valore) + sum(_stima_dimensione(k) + _stima_dimensione(v) for k, v in valore.items())
+    if isinstance(valore, (list, tuple)):
+        return sys.getsizeof(valore) + sum(_stima_dimensione(v) for v in valore)
+    return sys.getsizeof(valore)
+
+
+class ResultCache:
+    """
+    Cache LRU dei risultati condivisa nel processo (quindi tra le sessioni Streamlit)
+
+    Le voci sono rimosse dalla meno recente quando la memoria stimata supera
+    max_bytes. Thread-safe: Streamlit esegue ogni sessione in un thread.
+    """
+
+    def __init__(self, max_bytes=int(MEMORIA_MASSIMA_MB * 1024 * 1024)):
+        self.max_bytes = max_bytes
+        self._voci = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, chiave):
+        """Restituisce il risultato in cache (None se assente) e lo segna come recente"""
+        with self._lock:
+            voce = self._voci.get(chiave)
+            if voce is None:
+                self.misses += 1
+                return None
+            self._voci.move_to_end(chiave)
+            self.hits += 1
+            return voce[0]
+
+    def put(self, chiave, risultato):
+        dimensione = _stima_dimensione(risultato)
+        with self._lock:
+            if chiave in self._voci:
+                self.bytes -= self._voci.pop(chiave)[1]
+            if dimensione > self.max_bytes:
+                return
+            self._voci[chiave] = (risultato, dimensione)
+            self.bytes += dimensione
+            while self.bytes > self.max_bytes:
+                _, (_, liberati) = self._voci.popitem(last=False)
+                self.bytes -= liberati
+                self.evictions += 1
+
+    def get_or_compute(self, params, funzione):
+        """
+        Risultato di funzione(params canonici), calcolato solo alla prima richiesta
+
+        Il risultato restituito è condiviso: il chiamante non deve modificarlo.
+        """
+        chiave = params_key(params)
+        risultato = self.get(chiave)
+        if risultato is None:
+            risultato = funzione(canonical_params(params))
+            self.put(chiave, risultato)
+        return risultato
+
+    def clear(self):
+        with self._lock:
+            self._voci.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Contatori di utilizzo della cache"""
+        with self._lock:
+            richieste = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / richieste if richieste else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._voci),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+# Istanza unica del processo
+RESULT_CACHE = ResultCache()
+
+
+def cached_real_estate_investment(params):
+    """calculate_real_estate_investment_improved con cache condivisa dei risultati"""
+    return RESULT_CACHE.get_or_compute(params, calculate_real_estate_investment_improved)
@@ -1,7 +1,8 @@
 import numpy as np
-from scipy.optimize import fsolve
-import warnings
+from irr import solve_irr_batch, IRR_CONVERGED
 from utils import format_currency
+from mortgage import calculate_leverage_batch
+from profiling import profiled
 
 def calculate_irr(cash_flows):
     """
@@ -13,36 +14,28 @@ def calculate_irr(cash_flows):
     Returns:
         float: TIR come percentuale (es. 0.05 = 5%) o None se non calcolabile
     """
-    try:
-        # Controlla se ci sono flussi positivi e negativi
-        if not any(cf > 0 for cf in cash_flows) or not any(cf < 0 for cf in cash_flows):
-            return None
-        
-        # Funzione NPV da minimizzare
-        def npv(rate, cash_flows):
-            return sum(cf / (1 + rate) ** i for i, cf in enumerate(cash_flows))
-        
-        # Stima iniziale del TIR
-        initial_guess = 0.1  # 10%
-        
-        # Risolvi per trovare il tasso che rende NPV = 0
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            irr = fsolve(npv, initial_guess, args=(cash_flows,))[0]
-        
-        # Verifica che la soluzione sia ragionevole (-100% < IRR < 1000%)
-        if -1 < irr < 10:
-            return irr
-        else:
-            return None
-            
-    except:
+    risultato = solve_irr_batch(np.asarray(cash_flows, dtype=float)[None, :])
+    if risultato['status'][0] != IRR_CONVERGED:
         return None
+    return float(risultato['irr'][0])
 
-def calculate_irr_for_real_estate(params, affitti_netti_annuali, valore_finale_nominale, valore_finale_reale):
+def calculate_deflators(inflazione_perc, anni):
+    """
+    Vettore dei deflatori (1 + inflazione) ** anno per anno = 1..anni
+
+    Calcolato una volta e condiviso da valore finale reale, affitti reali e flussi
+    di cassa reali per il TIR.
+    """
+    return (1 + inflazione_perc / 100) ** np.arange(1, anni + 1)
+
+@profiled('calcoli.calculate_irr_for_real_estate')
+def calculate_irr_for_real_estate(params, affitti_netti_annuali, valore_finale_nominale, valore_finale_reale, deflatori=None):
     """
     Calcola il TIR per l'investimento immobiliare considerando i costi reali
     
+    Args:
+        deflatori: Vettore di calculate_deflators (ricalcolato se None)
+    
     Returns:
         dict: TIR nominale e reale
     """
@@ -57,49 +50,32 @@ def calculate_irr_for_real_estate(params, affitti_netti_annuali, valore_finale_n
         # Usa il valore dell'immobile come prima
         investimento_iniziale_reale = params['valore_immobile'] + params['commissione_iniziale']
     
-    # Flussi di cassa nominali
-    cash_flows_nominal = []
-    
-    # Anno 0: Investimento iniziale (negativo)
-    cash_flows_nominal.append(-investimento_iniziale_reale)
+    affitti = np.asarray(affitti_netti_annuali, dtype=float)
+    if deflatori is None:
+        deflatori = calculate_deflators(params['inflazione_perc'], params['anni_investimento'])
     
-    # Anni 1 a N-1: Solo affitti netti
-    for i in range(len(affitti_netti_annuali) - 1):
-        cash_flows_nominal.append(affitti_netti_annuali[i])
+    # Riga 0 nominale, riga 1 reale (affitti scontati per inflazione)
+    flussi = np.empty((2, len(affitti) + 1))
     
-    # Anno N: Affitti netti + valore finale - commissione finale
-    ultimo_flusso = (
-        affitti_netti_annuali[-1] + 
-        valore_finale_nominale - 
-        params['commissione_finale']
-    )
-    cash_flows_nominal.append(ultimo_flusso)
-    
-    # Calcola TIR nominale
-    tir_nominale = calculate_irr(cash_flows_nominal)
-    
-    # Flussi di cassa reali (scontati per inflazione)
-    cash_flows_real = []
-    inflazione_decimal = params['inflazione_perc'] / 100
+    # Anno 0: Investimento iniziale (negativo, stesso valore)
+    flussi[:, 0] = -investimento_iniziale_reale
     
-    # Anno 0: Investimento iniziale (stesso valore)
-    cash_flows_real.append(-investimento_iniziale_reale)
+    # Anni 1 a N: Affitti netti
+    flussi[0, 1:] = affitti
+    flussi[1, 1:] = affitti / deflatori[:len(affitti)]
     
-    # Anni 1 a N-1: Affitti netti scontati per inflazione
-    for i, affitto_netto in enumerate(affitti_netti_annuali[:-1], 1):
-        affitto_reale = affitto_netto / ((1 + inflazione_decimal) ** i)
-        cash_flows_real.append(affitto_reale)
+    # Anno N: + valore finale - commissione finale
+    flussi[0, -1] += valore_finale_nominale - params['commissione_finale']
+    flussi[1, -1] += valore_finale_reale - params['commissione_finale']
+    cash_flows_nominal = flussi[0].tolist()
+    cash_flows_real = flussi[1].tolist()
     
-    # Anno N: Ultimo flusso scontato per inflazione
-    ultimo_flusso_reale = (
-        affitti_netti_annuali[-1] / ((1 + inflazione_decimal) ** params['anni_investimento']) +
-        valore_finale_reale - 
-        params['commissione_finale']
+    # Calcola TIR nominale e reale in un'unica risoluzione vettoriale
+    soluzione = solve_irr_batch(flussi)
+    tir_nominale, tir_reale = (
+        float(tasso) if stato == IRR_CONVERGED else None
+        for tasso, stato in zip(soluzione['irr'], soluzione['status'])
     )
-    cash_flows_real.append(ultimo_flusso_reale)
-    
-    # Calcola TIR reale
-    tir_reale = calculate_irr(cash_flows_real)
     
     return {
         'tir_nominale': tir_nominale * 100 if tir_nominale is not None else None,
@@ -109,6 +85,7 @@ def calculate_irr_for_real_estate(params, affitti_netti_annuali, valore_finale_n
         'investimento_iniziale_reale': investimento_iniziale_reale
     }
 
+@profiled('calcoli.calculate_roi_roe_metrics')
 def calculate_roi_roe_metrics(params, rendimento_totale_nominale, rendimento_totale_reale):
     """
     Calcola ROI e ROE per l'investimento immobiliare considerando i costi reali
@@ -141,13 +118,30 @@ def calculate_roi_roe_metrics(params, rendimento_totale_nominale, rendimento_tot
         roi_reale = (rendimento_senza_mutuo_reale / investimento_iniziale) * 100 if investimento_iniziale > 0 else 0
         
         # ROE: Rendimento sul capitale proprio (con i costi del mutuo)
-        # Assumiamo che il capitale proprio sia l'investimento iniziale 
-        # (nella realtà dovremmo sapere quanto del valore immobile è coperto dal mutuo)
-        capitale_proprio = investimento_iniziale
-        roe_nominale = (rendimento_totale_nominale / capitale_proprio) * 100 if capitale_proprio > 0 else 0
-        roe_reale = (rendimento_totale_reale / capitale_proprio) * 100 if capitale_proprio > 0 else 0
-        
-        roe_note = f"⚠️ ROE calcolato su capitale proprio stimato di {format_currency(capitale_proprio)}. Per calcolo preciso specificare l'importo del mutuo iniziale."
+        debito_residuo = params.get('debito_residuo_mutuo', 0)
+        leva = calculate_leverage_batch(
+            debito_residuo, params['rata_mutuo_mensile'], params['anni_restanti_mutuo'], params['anni_investimento']
+        )
+        if leva['valido'][0]:
+            # Capitale proprio effettivo: investimento meno il debito residuo all'acquisto.
+            # Il debito ancora da restituire all'orizzonte si rimborsa con la vendita;
+            # la parte già ripagata con le rate torna all'investitore
+            capitale_proprio = investimento_iniziale - debito_residuo
+            debito_finale = float(leva['debito_finale'][0])
+            deflatore_finale = (1 + params['inflazione_perc'] / 100) ** params['anni_investimento']
+            rendimento_capitale_nominale = rendimento_totale_nominale + debito_residuo - debito_finale
+            rendimento_capitale_reale = rendimento_totale_reale + debito_residuo - debito_finale / deflatore_finale
+            roe_nominale = (rendimento_capitale_nominale / capitale_proprio) * 100 if capitale_proprio > 0 else 0
+            roe_reale = (rendimento_capitale_reale / capitale_proprio) * 100 if capitale_proprio > 0 else 0
+            
+            roe_note = f"✅ ROE calcolato sul capitale proprio effettivo di {format_currency(capitale_proprio)} (tasso implicito del mutuo {leva['tasso_implicito_perc'][0]:.2f}%, debito residuo a fine periodo {format_currency(debito_finale)})."
+        else:
+            # Senza debito residuo noto il capitale proprio è stimato con l'investimento iniziale
+            capitale_proprio = investimento_iniziale
+            roe_nominale = (rendimento_totale_nominale / capitale_proprio) * 100 if capitale_proprio > 0 else 0
+            roe_reale = (rendimento_totale_reale / capitale_proprio) * 100 if capitale_proprio > 0 else 0
+            
+            roe_note = f"⚠️ ROE calcolato su capitale proprio stimato di {format_currency(capitale_proprio)}. Per calcolo preciso specificare il debito residuo del mutuo."
         
     else:
         # SENZA MUTUO: ROI = ROE
@@ -169,6 +163,7 @@ def calculate_roi_roe_metrics(params, rendimento_totale_nominale, rendimento_tot
         'capitale_proprio': capitale_proprio
     }
 
+@profiled('calcoli.calculate_real_estate_investment_improved')
 def calculate_real_estate_investment_improved(params):
     rivalutazione_decimal = params['rivalutazione_annua'] / 100
     inflazione_decimal = params['inflazione_perc'] / 100
@@ -200,6 +195,9 @@ def calculate_real_estate_investment_improved(params):
     else:
         investimento_iniziale_totale = params['valore_immobile'] + params['commissione_iniziale']
 
+    # Inflazione cumulata su un periodo di adeguamento dell'affitto (costante)
+    inflazione_cumulativa = (1 + inflazione_decimal) ** params['adeguamento_affitto_anni']
+
     valori_annuali = []
     affitti_lordi_annuali = []
     affitti_netti_annuali = []
@@ -217,7 +215,6 @@ def calculate_real_estate_investment_improved(params):
             if params['tipo_adeguamento'] == "Valore Immobile":
                 affitto_corrente = valore_corrente * rapporto_affitto_iniziale
             elif params['tipo_adeguamento'] == "Inflazione":
-                inflazione_cumulativa = (1 + inflazione_decimal) ** params['adeguamento_affitto_anni']
                 affitto_corrente = affitto_corrente * inflazione_cumulativa
             # Nessun Adeguamento: affitto_corrente invariato
 
@@ -248,8 +245,11 @@ def calculate_real_estate_investment_improved(params):
         costi_gestione_annuali.append(costi_gestione_correnti)
         costi_mutuo_annuali.append(costo_mutuo_anno)
 
+    # Deflatori condivisi da valore finale reale, affitti reali e flussi per il TIR
+    deflatori = calculate_deflators(params['inflazione_perc'], params['anni_investimento'])
+
     valore_finale_nominale = valori_annuali[-1]
-    valore_finale_reale = valore_finale_nominale / ((1 + inflazione_decimal) ** params['anni_investimento'])
+    valore_finale_reale = valore_finale_nominale / float(deflatori[-1])
     totale_affitti_netti = sum(affitti_netti_annuali)
     totale_costi_mutuo = sum(costi_mutuo_annuali)
     rendimento_medio_annuo = sum(rendimenti_annuali) / len(rendimenti_annuali) if rendimenti_annuali else 0
@@ -257,10 +257,7 @@ def calculate_real_estate_investment_improved(params):
     guadagno_capitale_nominale = valore_finale_nominale - params['valore_immobile']
     guadagno_capitale_reale = valore_finale_reale - params['valore_immobile']
 
-    totale_affitti_netti_reale = 0
-    for anno, affitto_netto_anno in enumerate(affitti_netti_annuali, 1):
-        valore_presente_affitto = affitto_netto_anno / ((1 + inflazione_decimal) ** anno)
-        totale_affitti_netti_reale += valore_presente_affitto
+    totale_affitti_netti_reale = float(np.sum(np.asarray(affitti_netti_annuali) / deflatori))
 
     # MODIFICATO: Aggiungi plus/minusvalore iniziale al rendimento
     rendimento_totale_nominale = (
@@ -301,7 +298,7 @@ def calculate_real_estate_investment_improved(params):
     roi_roe_metrics = calculate_roi_roe_metrics(params, rendimento_totale_nominale, rendimento_totale_reale)
 
     # Calcola TIR/IRR con i nuovi parametri
-    tir_metrics = calculate_irr_for_real_estate(params, affitti_netti_annuali, valore_finale_nominale, valore_finale_reale)
+    tir_metrics = calculate_irr_for_real_estate(params, affitti_netti_annuali, valore_finale_nominale, valore_finale_reale, deflatori)
 
     return {
         'valori_annuali': valori_annuali,
@@ -341,6 +338,7 @@ def calculate_real_estate_investment_improved(params):
         'roe_reale': roi_roe_metrics['roe_reale'],
         'roe_note': roi_roe_metrics['roe_note'],
         'investimento_iniziale': roi_roe_metrics['investimento_iniziale'],
+        'capitale_proprio': roi_roe_metrics['capitale_proprio'],
         # TIR/IRR
         'tir_nominale': tir_metrics['tir_nominale'],
         'tir_reale': tir_metrics['tir_reale'],
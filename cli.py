@@ -0,0 +1,159 @@
+"""
+Valutazione da riga di comando di un portafoglio di immobili (CSV o Parquet)
+
+Ogni riga del file di input è un immobile con colonne corrispondenti alle chiavi
+params di ui.render_real_estate_section. Il file è letto e valutato a blocchi, quindi
+la memoria non dipende dal numero di righe.
+
+Esempi:
+    python cli.py portafoglio.csv risultati.parquet --chunk-size 50000 --workers 4
+    python cli.py portafoglio.csv prezzi_massimi.csv --goal-seek costo_acquisto --goal-metric tir_nominale --goal-target 6
+"""
+import argparse
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+from core import calculate_real_estate_investment_batch
+from tables import read_chunks, frame_to_batch, CHUNK_SIZE_DEFAULT, _formato
+from goalseek import goal_seek_batch, VARIABILI_OBIETTIVO, METRICHE_OBIETTIVO, GOAL_STATUS_LABELS
+
+METRICHE_CLI = (
+    'valore_finale_nominale',
+    'valore_finale_reale',
+    'cagr_nominale',
+    'cagr_reale',
+    'tir_nominale',
+    'tir_reale',
+    'tir_status_nominale',
+    'tir_status_reale',
+    'roi_nominale',
+    'roi_reale',
+    'roe_nominale',
+    'roe_reale',
+)
+
+
+def score_chunk(blocco, ricerca=None):
+    """
+    Valuta un blocco di immobili
+
+    Args:
+        blocco: DataFrame con una riga per immobile e colonne params
+        ricerca: Tupla opzionale (variabile, metrica, obiettivo) per goalseek.goal_seek_batch
+
+    Returns:
+        pd.DataFrame: Colonne di input seguite dalle metriche METRICHE_CLI; con ricerca
+        anche '<variabile>_obiettivo' (NaN se non raggiungibile) e 'obiettivo_status'
+    """
+    params_batch = frame_to_batch(blocco)
+    risultati = calculate_real_estate_investment_batch(params_batch)
+    uscita = blocco.reset_index(drop=True).copy()
+    for metrica in METRICHE_CLI:
+        uscita[metrica] = np.broadcast_to(risultati[metrica], len(blocco))
+    if ricerca is not None:
+        variabile, metrica, obiettivo = ricerca
+        soluzione = goal_seek_batch(params_batch, variabile, metrica, obiettivo)
+        uscita[f'{variabile}_obiettivo'] = soluzione['valore']
+        uscita['obiettivo_status'] = [GOAL_STATUS_LABELS[int(codice)] for codice in soluzione['status']]
+    return uscita
+
+
+def _score_blocks(blocchi, workers, ricerca=None):
+    """Valuta i blocchi in ordine; con più processi ne tiene in volo al massimo 2 x workers"""
+    if workers <= 1:
+        for blocco in blocchi:
+            yield score_chunk(blocco, ricerca)
+        return
+    contesto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=contesto) as pool:
+        in_corso = deque()
+        for blocco in blocchi:
+            in_corso.append(pool.submit(score_chunk, blocco, ricerca))
+            if len(in_corso) >= 2 * workers:
+                yield in_corso.popleft().result()
+        while in_corso:
+            yield in_corso.popleft().result()
+
+
+class _ScrittoreParquet:
+    def __init__(self, percorso):
+        import pyarrow.parquet as pq
+        self._pq = pq
+        self.percorso = percorso
+        self.writer = None
+
+    def write(self, blocco):
+        import pyarrow as pa
+        tabella = pa.Table.from_pandas(blocco, preserve_index=False)
+        if self.writer is None:
+            self.writer = self._pq.ParquetWriter(self.percorso, tabella.schema)
+        self.writer.write_table(tabella)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class _ScrittoreCsv:
+    def __init__(self, percorso):
+        self.file = open(percorso, 'w', newline='')
+        self.intestazione = True
+
+    def write(self, blocco):
+        blocco.to_csv(self.file, header=self.intestazione, index=False)
+        self.intestazione = False
+
+    def close(self):
+        self.file.close()
+
+
+def score_file(input_path, output_path, chunk_size=CHUNK_SIZE_DEFAULT, workers=1, ricerca=None):
+    """
+    Valuta un file di immobili scrivendo i risultati a blocchi (con ricerca, anche
+    il valore della variabile che raggiunge l'obiettivo, come in score_chunk)
+
+    Returns:
+        int: Numero di righe elaborate
+    """
+    scrittore = _ScrittoreParquet(output_path) if _formato(output_path) == 'parquet' else _ScrittoreCsv(output_path)
+    righe = 0
+    try:
+        for risultato in _score_blocks(read_chunks(input_path, chunk_size), workers, ricerca):
+            scrittore.write(risultato)
+            righe += len(risultato)
+    finally:
+        scrittore.close()
+    return righe
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Valutazione di un portafoglio immobiliare da file CSV o Parquet")
+    parser.add_argument('input', help="File di input (.csv o .parquet), una riga per immobile")
+    parser.add_argument('output', help="File dei risultati (.csv o .parquet)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE_DEFAULT, help="Righe valutate per blocco")
+    parser.add_argument('--workers', type=int, default=1, help="Processi paralleli (default 1)")
+    parser.add_argument('--goal-seek', choices=VARIABILI_OBIETTIVO, help="Variabile da risolvere per ogni immobile")
+    parser.add_argument('--goal-metric', choices=METRICHE_OBIETTIVO, default='tir_nominale', help="Metrica obiettivo")
+    parser.add_argument('--goal-target', type=float, help="Valore obiettivo della metrica in percentuale")
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1 or args.workers < 1:
+        parser.error("--chunk-size e --workers devono essere almeno 1")
+    ricerca = None
+    if args.goal_seek:
+        if args.goal_target is None:
+            parser.error("--goal-seek richiede --goal-target")
+        ricerca = (args.goal_seek, args.goal_metric, args.goal_target)
+
+    try:
+        righe = score_file(args.input, args.output, args.chunk_size, args.workers, ricerca)
+    except (ValueError, OSError, ImportError) as e:
+        print(f"Errore: {e}", file=sys.stderr)
+        return 1
+    print(f"{righe} immobili valutati -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
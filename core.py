@@ -0,0 +1,43 @@
+"""
+Motore di calcolo senza dipendenze da Streamlit
+
+Punto di import unico per script, CLI e processi worker: carica solo NumPy e i moduli
+di calcolo. SciPy è importato solo se un TIR richiede il fallback con fsolve.
+"""
+from calcoli import (
+    calculate_irr,
+    calculate_irr_for_real_estate,
+    calculate_roi_roe_metrics,
+    calculate_real_estate_investment_improved,
+)
+from irr import solve_irr_batch, solve_xirr_batch, npv_horner, IRR_CONVERGED, IRR_STATUS_LABELS
+from batch import (
+    calculate_real_estate_investment_batch,
+    params_to_batch,
+    normalize_batch,
+    CHIAVI_NUMERICHE,
+    CHIAVI_INTERE,
+    CHIAVI_OPZIONALI,
+    TIPI_ADEGUAMENTO,
+)
+from monthly import calculate_monthly_cash_flows, calculate_monthly_cash_flows_batch
+from goalseek import goal_seek, goal_seek_batch, GOAL_CONVERGED, GOAL_STATUS_LABELS
+from optimizer import optimize_investment
+from portfolio import calculate_portfolio, calculate_portfolio_batch
+from backtest import backtest_rolling, load_series
+from tenant import simulate_tenant_model, simulate_tenant_paths, transition_matrix
+from stress import stress_test_batch, shock_batch, SCENARI_STRESS
+from events import make_events, events_from_lists, scatter_events_annual, scatter_events_monthly
+from holding import calculate_holding_period, calculate_holding_period_batch
+from tables import frame_to_batch, read_chunks, CHUNK_SIZE_DEFAULT
+from mortgage import (
+    amortization_schedule,
+    amortization_schedule_batch,
+    calculate_payment,
+    outstanding_balance,
+    implied_rate_batch,
+    calculate_leverage_batch,
+)
+
+# Moduli che il motore non deve importare (verificato da benchmark.benchmark_import)
+MODULI_ESCLUSI = ('streamlit', 'scipy', 'pandas', 'altair')
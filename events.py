@@ -0,0 +1,104 @@
+import numpy as np
+
+# Eventi straordinari datati (lavori, bonus, allestimenti): array sparsi paralleli, un
+# elemento per evento. 'riga' è lo scenario (None = lo stesso evento in ogni scenario),
+# 'anno' l'anno di possesso da 1, 'mese' il mese dell'anno da 0 (usato dal motore
+# mensile), 'importo' in euro con segno (positivo = incasso, negativo = spesa),
+# 'indicizzato' True se l'importo è a prezzi di oggi e cresce con l'inflazione
+CAMPI_EVENTI = ('riga', 'anno', 'mese', 'importo', 'indicizzato')
+
+
+def make_events(anno, importo, riga=None, mese=0, indicizzato=True):
+    """
+    Costruisce il calendario sparso degli eventi straordinari
+
+    Args:
+        anno: Anni di possesso degli eventi (da 1)
+        importo: Importi con segno, stessa lunghezza
+        riga: Scenario di ciascun evento; None = eventi comuni a tutti gli scenari
+        mese: Mese dell'anno (0-11) di ciascun evento o scalare
+        indicizzato: Importi a prezzi di oggi rivalutati con l'inflazione (array o scalare)
+
+    Returns:
+        dict: Array di CAMPI_EVENTI ('riga' None se comuni)
+
+    Raises:
+        ValueError: Anni prima del primo, mesi fuori da 0-11, righe negative
+    """
+    anno = np.atleast_1d(np.asarray(anno, dtype=int))
+    importo = np.atleast_1d(np.asarray(importo, dtype=float))
+    if anno.shape != importo.shape or anno.ndim != 1:
+        raise ValueError("anno e importo degli eventi devono avere la stessa lunghezza")
+    mese = np.broadcast_to(np.asarray(mese, dtype=int), anno.shape)
+    indicizzato = np.broadcast_to(np.asarray(indicizzato, dtype=bool), anno.shape)
+    if np.any(anno < 1):
+        raise ValueError("Gli eventi straordinari iniziano dall'anno 1 (le spese iniziali vanno in costo_ristrutturazione)")
+    if np.any((mese < 0) | (mese > 11)):
+        raise ValueError("Il mese degli eventi deve essere tra 0 e 11")
+    if riga is not None:
+        riga = np.broadcast_to(np.asarray(riga, dtype=int), anno.shape)
+        if np.any(riga < 0):
+            raise ValueError("Indice di scenario negativo negli eventi")
+    return {'riga': riga, 'anno': anno, 'mese': mese, 'importo': importo, 'indicizzato': indicizzato}
+
+
+def events_from_lists(eventi_per_immobile):
+    """
+    Calendario sparso da una lista (uno per immobile) di liste di eventi
+
+    Args:
+        eventi_per_immobile: Lista di liste di dizionari con 'anno' e 'importo' e
+            facoltativi 'mese', 'indicizzato' e 'descrizione' (ignorata dal motore)
+
+    Returns:
+        dict: Come make_events, con 'riga' = posizione dell'immobile nella lista
+    """
+    voci = [(riga, evento) for riga, eventi in enumerate(eventi_per_immobile) for evento in eventi]
+    return make_events(
+        [evento['anno'] for _, evento in voci],
+        [evento['importo'] for _, evento in voci],
+        riga=[riga for riga, _ in voci],
+        mese=[evento.get('mese', 0) for _, evento in voci],
+        indicizzato=[evento.get('indicizzato', True) for _, evento in voci],
+    )
+
+
+def _distribuisci(eventi, colonne, fattore):
+    """
+    Somma gli importi nelle celle (riga, colonna) di una matrice (n, periodi) con un
+    solo bincount; gli importi indicizzati sono moltiplicati per fattore della cella
+    """
+    n, periodi = fattore.shape
+    dentro = colonne < periodi
+    colonne = colonne[dentro]
+    importo = eventi['importo'][dentro]
+    indicizzato = eventi['indicizzato'][dentro]
+    if eventi['riga'] is None:
+        # Eventi comuni: due profili (periodi,), quello indicizzato scalato riga per riga
+        nominali = np.bincount(colonne, weights=np.where(indicizzato, 0.0, importo), minlength=periodi)
+        indicizzati = np.bincount(colonne, weights=np.where(indicizzato, importo, 0.0), minlength=periodi)
+        return nominali[None, :] + indicizzati[None, :] * fattore
+    righe = eventi['riga'][dentro]
+    if righe.size and righe.max() >= n:
+        raise ValueError(f"Eventi riferiti allo scenario {righe.max()}, gli scenari sono {n}")
+    pesi = np.where(indicizzato, importo * fattore[righe, colonne], importo)
+    return np.bincount(righe * periodi + colonne, weights=pesi, minlength=n * periodi).reshape(n, periodi)
+
+
+def scatter_events_annual(eventi, indice_inflazione):
+    """
+    Flussi annuali (n, anni_max) degli eventi; quelli oltre anni_max sono ignorati
+
+    Args:
+        eventi: Dizionario da make_events
+        indice_inflazione: Indice di inflazione cumulato (n, anni_max) del motore
+    """
+    return _distribuisci(eventi, eventi['anno'] - 1, indice_inflazione)
+
+
+def scatter_events_monthly(eventi, indice_inflazione):
+    """
+    Flussi mensili (n, 12 x anni_max) degli eventi, nel mese indicato dell'anno; gli
+    importi indicizzati usano l'indice di inflazione dell'anno, come nel motore annuale
+    """
+    return _distribuisci(eventi, 12 * (eventi['anno'] - 1) + eventi['mese'], np.repeat(indice_inflazione, 12, axis=1))
@@ -0,0 +1,222 @@
+import numpy as np
+from batch import (
+    calculate_real_estate_investment_batch,
+    calculate_annual_components_batch,
+    normalize_batch,
+    _scenari_percorsi,
+    CHIAVI_NUMERICHE,
+    CHIAVI_INTERE,
+    CHIAVI_SOLO_FINALI,
+)
+
+# Variabili risolvibili: tutti i parametri numerici continui
+VARIABILI_OBIETTIVO = tuple(chiave for chiave in CHIAVI_NUMERICHE if chiave not in CHIAVI_INTERE)
+
+# Metriche obiettivo (il valore obiettivo è sempre in percentuale, anche per il CAGR)
+METRICHE_OBIETTIVO = (
+    'tir_nominale', 'tir_reale', 'cagr_nominale', 'cagr_reale',
+    'roi_nominale', 'roi_reale', 'roe_nominale', 'roe_reale',
+)
+
+# Intervalli ammessi di default per la variabile; le chiavi assenti vanno da 0 a +inf.
+# Valore e costi partono dal centesimo: a zero il motore cambia ramo (investimento
+# calcolato sul valore dell'immobile) e la metrica salta
+LIMITI_DEFAULT = {
+    'valore_immobile': (0.01, np.inf),
+    'costo_acquisto': (0.01, np.inf),
+    'costo_ristrutturazione': (0.01, np.inf),
+    'rivalutazione_annua': (-99.0, 100.0),
+    'inflazione_perc': (-99.0, 100.0),
+    'manutenzione_straordinaria_perc': (0.0, 100.0),
+    'tassazione_affitti_perc': (0.0, 100.0),
+    'tassa_catastale_perc': (0.0, 100.0),
+    'periodo_sfitto_perc': (0.0, 100.0),
+}
+
+# Raddoppi massimi dell'ampiezza nella ricerca dell'intervallo attorno al valore corrente
+ESPANSIONI_MASSIME = 24
+
+# Scarto massimo (punti percentuali) accettato quando l'intervallo si riduce a un punto:
+# oltre, la metrica salta (es. costo_acquisto che passa da 0 a positivo) e non c'è soluzione
+TOLLERANZA_SALTO = 1e-6
+
+# Codici di stato per ogni riga
+GOAL_CONVERGED = 0
+GOAL_NO_BRACKET = 1
+GOAL_NOT_CONVERGED = 2
+
+GOAL_STATUS_LABELS = {
+    GOAL_CONVERGED: 'convergente',
+    GOAL_NO_BRACKET: 'obiettivo non raggiungibile nei limiti',
+    GOAL_NOT_CONVERGED: 'non convergente',
+}
+
+
+def _ripeti(p, percorsi, componenti, volte):
+    """Replica volte gli scenari (e le componenti precalcolate) per valutare più punti in una chiamata"""
+    p = {chiave: np.tile(valore, volte) for chiave, valore in p.items()}
+    if percorsi:
+        percorsi = {
+            chiave: np.tile(valore, (volte, 1)) if np.ndim(valore) == 2 else valore
+            for chiave, valore in percorsi.items()
+        }
+    if componenti is not None:
+        componenti = {
+            chiave: np.tile(valore, (volte, 1)) if isinstance(valore, np.ndarray) else valore
+            for chiave, valore in componenti.items()
+        }
+    return p, percorsi, componenti
+
+
+def goal_seek_batch(params_batch, variabile, metrica, obiettivo, limiti=None, xtol=1e-10, ftol=1e-9,
+                    max_iter=100, percorsi=None):
+    """
+    Valore di una variabile che porta la metrica all'obiettivo, per n scenari insieme
+
+    Per ogni scenario cerca un intervallo con cambio di segno di metrica - obiettivo
+    allargandolo attorno al valore corrente, poi lo restringe con regula falsi
+    (variante Illinois); a ogni passo tutti gli scenari sono valutati con una sola
+    chiamata al motore vettoriale. Se la variabile è in CHIAVI_SOLO_FINALI le
+    componenti annuali sono calcolate una volta e riusate. Con più soluzioni
+    nell'intervallo ne è restituita una. I TIR sono risolti senza il fallback fsolve:
+    i punti con TIR fuori dalla griglia di irr (oltre -99% / +999%) non sono calcolabili.
+
+    Args:
+        params_batch: Come in batch.calculate_real_estate_investment_batch
+        variabile: Chiave di VARIABILI_OBIETTIVO da risolvere
+        metrica: Chiave di METRICHE_OBIETTIVO
+        obiettivo: Valore obiettivo in percentuale (scalare o array (n,))
+        limiti: (minimo, massimo) ammessi per la variabile; default LIMITI_DEFAULT
+        xtol: Tolleranza relativa sulla variabile
+        ftol: Tolleranza sulla metrica (punti percentuali)
+        max_iter: Iterazioni massime della fase di restringimento
+        percorsi: Come in batch.calculate_real_estate_investment_batch
+
+    Returns:
+        dict: 'valore' (n,) soluzione (NaN se non trovata), 'metrica' valore raggiunto,
+        'status' (codici GOAL_*), 'iterazioni' (iterazioni usate per riga) e
+        'valutazioni' (chiamate al motore)
+    """
+    if variabile not in VARIABILI_OBIETTIVO:
+        raise ValueError(f"Variabile non risolvibile: {variabile}")
+    if metrica not in METRICHE_OBIETTIVO:
+        raise ValueError(f"Metrica obiettivo non valida: {metrica}")
+    p, n = normalize_batch(params_batch, _scenari_percorsi(percorsi))
+    obiettivo = np.broadcast_to(np.asarray(obiettivo, dtype=float), (n,))
+    minimo, massimo = limiti if limiti is not None else LIMITI_DEFAULT.get(variabile, (0.0, np.inf))
+    scala = 100.0 if metrica.startswith('cagr') else 1.0
+
+    # Le componenti annuali non dipendono dalle chiavi "solo finali": si calcolano una volta
+    componenti = calculate_annual_components_batch(p, n, percorsi) if variabile in CHIAVI_SOLO_FINALI else None
+    valutazioni = 0
+
+    def scarto(*punti):
+        """metrica - obiettivo in ciascun punto (array (n,)), con una sola chiamata"""
+        nonlocal valutazioni
+        valutazioni += 1
+        q, percorsi_q, componenti_q = _ripeti(p, percorsi, componenti, len(punti))
+        q[variabile] = np.concatenate(punti)
+        risultati = calculate_real_estate_investment_batch(q, percorsi_q, componenti_q, fallback_irr=False)
+        valori = risultati[metrica] * scala - np.tile(obiettivo, len(punti))
+        return np.split(valori, len(punti))
+
+    def cambio_segno(f1, f2):
+        # Falso se uno dei due è NaN (metrica non calcolabile)
+        return np.sign(f1) * np.sign(f2) <= 0
+
+    # Ricerca dell'intervallo: [x0 - d, x0 + d] con d raddoppiato finché il segno cambia
+    # tra i nuovi estremi o tra un nuovo estremo e il precedente dallo stesso lato
+    # (così un estremo dove la metrica non è calcolabile non blocca la ricerca)
+    iniziale = np.clip(p[variabile].astype(float), minimo, massimo)
+    ampiezza = np.maximum(np.abs(iniziale) * 0.5, 1.0)
+    a = np.clip(iniziale - ampiezza, minimo, massimo)
+    b = np.clip(iniziale + ampiezza, minimo, massimo)
+    fa, fb = scarto(a, b)
+    trovato = cambio_segno(fa, fb)
+    for _ in range(ESPANSIONI_MASSIME):
+        bloccato = (a <= minimo) & (b >= massimo)
+        da_allargare = ~trovato & ~bloccato
+        if not da_allargare.any():
+            break
+        ampiezza = np.where(da_allargare, ampiezza * 2, ampiezza)
+        nuovo_a = np.where(da_allargare, np.clip(iniziale - ampiezza, minimo, massimo), a)
+        nuovo_b = np.where(da_allargare, np.clip(iniziale + ampiezza, minimo, massimo), b)
+        nuovo_fa, nuovo_fb = scarto(nuovo_a, nuovo_b)
+        destra = da_allargare & cambio_segno(fb, nuovo_fb)
+        sinistra = da_allargare & ~destra & cambio_segno(nuovo_fa, fa)
+        entrambi = da_allargare & ~destra & ~sinistra
+        a, fa, b, fb = (
+            np.where(destra, b, np.where(sinistra | entrambi, nuovo_a, a)),
+            np.where(destra, fb, np.where(sinistra | entrambi, nuovo_fa, fa)),
+            np.where(sinistra, a, np.where(destra | entrambi, nuovo_b, b)),
+            np.where(sinistra, fa, np.where(destra | entrambi, nuovo_fb, fb)),
+        )
+        trovato = cambio_segno(fa, fb)
+
+    valore = np.full(n, np.nan)
+    raggiunto = np.full(n, np.nan)
+    status = np.full(n, GOAL_NOT_CONVERGED, dtype=np.int8)
+    iterazioni = np.zeros(n, dtype=np.int32)
+    status[~trovato] = GOAL_NO_BRACKET
+
+    # Estremi già sull'obiettivo
+    for estremo, scarto_estremo in ((a, fa), (b, fb)):
+        esatto = trovato & (np.abs(scarto_estremo) <= ftol) & (status != GOAL_CONVERGED)
+        valore[esatto] = estremo[esatto]
+        raggiunto[esatto] = scarto_estremo[esatto]
+        status[esatto] = GOAL_CONVERGED
+
+    # Regula falsi (Illinois) sulle righe ancora attive; le altre restano ferme
+    attive = trovato & (status != GOAL_CONVERGED)
+    x = np.where(np.isnan(valore), iniziale, valore)
+    for iterazione in range(1, max_iter + 1):
+        if not attive.any():
+            break
+        with np.errstate(divide='ignore', invalid='ignore'):
+            secante = b - fb * (b - a) / (fb - fa)
+        interno = np.isfinite(secante) & (secante > np.minimum(a, b)) & (secante < np.maximum(a, b))
+        x = np.where(attive, np.where(interno, secante, (a + b) / 2), x)
+        (fx,) = scarto(x)
+
+        non_finito = attive & ~np.isfinite(fx)
+        attive &= ~non_finito
+        intervallo_chiuso = np.abs(b - a) <= xtol * (1 + np.abs(x))
+        convergente = attive & ((np.abs(fx) <= ftol) | (intervallo_chiuso & (np.abs(fx) <= TOLLERANZA_SALTO)))
+        salto = attive & intervallo_chiuso & ~convergente
+        valore[convergente] = x[convergente]
+        raggiunto[convergente] = fx[convergente]
+        status[convergente] = GOAL_CONVERGED
+        iterazioni[convergente | non_finito | salto] = iterazione
+        attive &= ~(convergente | salto)
+
+        # Aggiornamento dell'intervallo mantenendo il cambio di segno
+        cambio = attive & (np.sign(fx) != np.sign(fb))
+        mantiene = attive & ~cambio
+        a, fa = np.where(cambio, b, a), np.where(cambio, fb, np.where(mantiene, fa / 2, fa))
+        b, fb = np.where(attive, x, b), np.where(attive, fx, fb)
+    iterazioni[attive] = max_iter
+
+    return {
+        'valore': valore,
+        'metrica': raggiunto + obiettivo,
+        'status': status,
+        'iterazioni': iterazioni,
+        'valutazioni': valutazioni,
+    }
+
+
+def goal_seek(params, variabile, metrica, obiettivo, limiti=None):
+    """
+    Versione scalare di goal_seek_batch per un dizionario params
+
+    Returns:
+        dict: 'valore' (float o None se l'obiettivo non è raggiungibile), 'metrica'
+        (valore raggiunto, percentuale) e 'status' (etichetta di GOAL_STATUS_LABELS)
+    """
+    risultato = goal_seek_batch(params, variabile, metrica, obiettivo, limiti)
+    convergente = risultato['status'][0] == GOAL_CONVERGED
+    return {
+        'valore': float(risultato['valore'][0]) if convergente else None,
+        'metrica': float(risultato['metrica'][0]) if convergente else None,
+        'status': GOAL_STATUS_LABELS[int(risultato['status'][0])],
+    }
@@ -0,0 +1,332 @@
+import numpy as np
+from batch import normalize_batch, CHIAVI_NUMERICHE, CHIAVI_INTERE
+from irr import solve_irr_batch, npv_horner, IRR_CONVERGED
+from mortgage import calculate_leverage_batch, TOLLERANZA_SALDO
+
+# Parametri continui rispetto ai quali si calcolano le derivate. Le chiavi intere
+# (anni, scadenza mutuo, periodicità adeguamento) sono discrete e non hanno derivata;
+# il debito residuo del mutuo entra nel ROE tramite il tasso implicito e il debito finale.
+CHIAVI_ESCLUSE_GRADIENTE = CHIAVI_INTERE
+CHIAVI_GRADIENTE = tuple(chiave for chiave in CHIAVI_NUMERICHE if chiave not in CHIAVI_ESCLUSE_GRADIENTE)
+
+METRICHE_GRADIENTE = ('tir_nominale', 'tir_reale', 'cagr_nominale', 'cagr_reale', 'roi_nominale', 'roe_nominale')
+
+
+class _Duale:
+    """
+    Numero duale vettoriale per la differenziazione in modalità forward
+
+    val ha forma S, der ha forma S + (P,): una derivata per ciascun parametro.
+    Le costanti (array NumPy o scalari) hanno derivata nulla.
+    """
+
+    __slots__ = ('val', 'der')
+
+    def __init__(self, val, der):
+        self.val = val
+        self.der = der
+
+    @staticmethod
+    def _parti(altro):
+        if isinstance(altro, _Duale):
+            return altro.val, altro.der
+        return np.asarray(altro, dtype=float), None
+
+    def _costante(self, val):
+        """Derivata del risultato quando l'altro operando è costante"""
+        return np.broadcast_to(self.der, np.shape(val) + self.der.shape[-1:])
+
+    def __add__(self, altro):
+        val, der = self._parti(altro)
+        risultato = self.val + val
+        return _Duale(risultato, self.der + der if der is not None else self._costante(risultato))
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return _Duale(-self.val, -self.der)
+
+    def __sub__(self, altro):
+        return self + (-altro)
+
+    def __rsub__(self, altro):
+        return (-self) + altro
+
+    def __mul__(self, altro):
+        val, der = self._parti(altro)
+        risultato = self.val * val
+        derivata = self.der * val[..., None]
+        if der is not None:
+            derivata = derivata + der * self.val[..., None]
+        return _Duale(risultato, derivata)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, altro):
+        val, der = self._parti(altro)
+        risultato = self.val / val
+        derivata = self.der
+        if der is not None:
+            derivata = derivata - der * risultato[..., None]
+        return _Duale(risultato, derivata / val[..., None])
+
+    def __rtruediv__(self, altro):
+        risultato = np.asarray(altro, dtype=float) / self.val
+        return _Duale(risultato, -self.der * (risultato / self.val)[..., None])
+
+    def __pow__(self, esponente):
+        esponente = np.asarray(esponente, dtype=float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            risultato = self.val ** esponente
+            fattore = esponente * self.val ** (esponente - 1)
+        return _Duale(risultato, self.der * fattore[..., None])
+
+    def colonna(self):
+        """Aggiunge un asse degli anni: (n,) -> (n, 1)"""
+        return _Duale(self.val[:, None], self.der[:, None, :])
+
+    def sum(self, axis):
+        return _Duale(self.val.sum(axis=axis), self.der.sum(axis=axis))
+
+    def take(self, indici):
+        """Elemento indici[i] della riga i (es. anno finale di ogni scenario)"""
+        righe = np.arange(self.val.shape[0])
+        return _Duale(self.val[righe, indici], self.der[righe, indici])
+
+    @staticmethod
+    def where(maschera, a, b):
+        va, da = _Duale._parti(a)
+        vb, db = _Duale._parti(b)
+        val = np.where(maschera, va, vb)
+        riferimento = da if da is not None else db
+        forma = val.shape + riferimento.shape[-1:]
+        da = np.broadcast_to(da, forma) if da is not None else np.zeros(forma)
+        db = np.broadcast_to(db, forma) if db is not None else np.zeros(forma)
+        return _Duale(val, np.where(np.asarray(maschera)[..., None], da, db))
+
+
+def _tir_con_gradiente(cash_flows):
+    """
+    TIR e gradiente con il teorema della funzione implicita sull'equazione NPV(r, θ) = 0
+
+    dr/dθ = -(dNPV/dθ) / (dNPV/dr), con dNPV/dθ = sum(dCF_t/dθ * x^t), x = 1 / (1 + r)
+    """
+    soluzione = solve_irr_batch(cash_flows.val)
+    convergente = soluzione['status'] == IRR_CONVERGED
+    tasso = np.where(convergente, soluzione['irr'], 0.0)
+
+    _, dnpv_dr = npv_horner(cash_flows.val, tasso)
+    sconto = (1.0 / (1.0 + tasso))[:, None] ** np.arange(cash_flows.val.shape[1])[None, :]
+    dnpv_dtheta = np.einsum('ntp,nt->np', cash_flows.der, sconto)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gradiente = -dnpv_dtheta / dnpv_dr[:, None]
+
+    tir = np.where(convergente, soluzione['irr'] * 100, np.nan)
+    gradiente = np.where(convergente[:, None], gradiente * 100, np.nan)
+    return tir, gradiente
+
+
+def _leva_con_gradiente(debito, rata, p):
+    """
+    Debito finale del mutuo e sua derivata, come mortgage.calculate_leverage_batch
+
+    Il tasso mensile implicito i risolve F = B - R a(i) = 0, con a(i) = (1 - (1 + i)^-N) / i
+    l'annualità di N rate; per il teorema della funzione implicita
+    di/dθ = (dB/dθ - a dR/dθ) / (R a'(i)). Il debito dopo k rate è poi
+    B (1 + i)^k - R ((1 + i)^k - 1) / i, derivato con i duali.
+
+    Returns:
+        tuple: (debito_finale duale (n,), con_leva (n,) righe con tasso determinato)
+    """
+    leva = calculate_leverage_batch(debito.val, rata.val, p['anni_restanti_mutuo'], p['anni_investimento'])
+    con_leva = (rata.val > 0) & leva['valido']
+    tasso = np.where(con_leva, leva['tasso_implicito_perc'], 0.0) / 1200
+    mesi = 12.0 * p['anni_restanti_mutuo']
+    mesi_pagati = np.minimum(mesi, 12.0 * p['anni_investimento'])
+
+    # Annualità e sua derivata (limiti per tasso nullo: N e -N (N + 1) / 2)
+    tasso_nullo = np.abs(tasso) < 1e-12
+    tasso_sicuro = np.where(tasso_nullo, 1.0, tasso)
+    sconto = (1 + tasso) ** -mesi
+    annualita = np.where(tasso_nullo, mesi, (1 - sconto) / tasso_sicuro)
+    derivata_annualita = np.where(
+        tasso_nullo, -mesi * (mesi + 1) / 2,
+        (mesi * sconto / (1 + tasso) * tasso_sicuro - (1 - sconto)) / tasso_sicuro ** 2,
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        derivata_tasso = (debito.der - annualita[:, None] * rata.der) / (rata.val * derivata_annualita)[:, None]
+    tasso_duale = _Duale(tasso, np.where(con_leva[:, None], derivata_tasso, 0.0))
+
+    fattore = (1 + tasso_duale) ** mesi_pagati
+    rimborsato = _Duale.where(tasso_nullo, rata * mesi_pagati, rata * (fattore - 1) / _Duale.where(tasso_nullo, 1.0, tasso_duale))
+    saldo = debito * fattore - rimborsato
+    residuo = con_leva & (saldo.val > TOLLERANZA_SALDO * np.abs(debito.val))
+    return _Duale.where(residuo, saldo, 0.0), con_leva
+
+
+def calculate_gradients_batch(params_batch):
+    """
+    Metriche e gradiente esatto rispetto a tutti i parametri continui in un solo passaggio
+
+    Ripercorre la ricorrenza annuale di calcoli.calculate_real_estate_investment_improved
+    in forma chiusa propagando le derivate (modalità forward); per il TIR usa il teorema
+    della funzione implicita, senza risolvere altri TIR. Nei punti di discontinuità
+    (es. costo_acquisto e costo_ristrutturazione entrambi nulli) è riportata la
+    derivata del ramo attivo. Per gli scenari con debito_residuo_mutuo e rata positivi
+    il ROE è sul capitale proprio effettivo: tasso implicito e debito finale del mutuo
+    sono differenziati con _leva_con_gradiente.
+
+    Args:
+        params_batch: Struttura di array come per batch.calculate_real_estate_investment_batch
+
+    Returns:
+        dict: 'chiavi' (CHIAVI_GRADIENTE), 'valori' (metrica -> array (n,)) e
+        'gradienti' (metrica -> array (n, len(chiavi)), stesse unità della metrica
+        per unità del parametro; TIR/ROI/ROE in punti percentuali, CAGR decimale)
+    """
+    p, n = normalize_batch(params_batch)
+    n_parametri = len(CHIAVI_GRADIENTE)
+    theta = {}
+    for j, chiave in enumerate(CHIAVI_GRADIENTE):
+        derivata = np.zeros((n, n_parametri))
+        derivata[:, j] = 1.0
+        theta[chiave] = _Duale(p[chiave].astype(float), derivata)
+
+    anni_investimento = p['anni_investimento']
+    anni_max = int(anni_investimento.max())
+    anni = np.arange(1, anni_max + 1)
+    attivo = anni[None, :] <= anni_investimento[:, None]
+    indice_finale = anni_investimento - 1
+
+    crescita = (1 + theta['rivalutazione_annua'] / 100).colonna()
+    inflazione = (1 + theta['inflazione_perc'] / 100).colonna()
+    indice_rivalutazione = crescita ** anni
+    indice_inflazione = inflazione ** anni
+
+    valori_annuali = theta['valore_immobile'].colonna() * indice_rivalutazione
+    costi_gestione = theta['costi_gestione_euro'].colonna() * indice_inflazione
+    costi_assicurazione = theta['costi_assicurazione_euro'].colonna() * indice_inflazione
+
+    # Affitto = affitto iniziale x fattore di crescita elevato all'ultimo anno di adeguamento
+    adeguamento = p['adeguamento_affitto_anni'][:, None]
+    ultimo_adeguamento = (anni[None, :] // adeguamento) * adeguamento
+    tipo = p['tipo_adeguamento'][:, None]
+    affitto_iniziale = theta['affitto_lordo'].colonna()
+    affitti_lordi = _Duale.where(
+        tipo == "Valore Immobile", affitto_iniziale * crescita ** ultimo_adeguamento,
+        _Duale.where(tipo == "Inflazione", affitto_iniziale * inflazione ** ultimo_adeguamento,
+                     affitto_iniziale * np.ones((1, anni_max)))
+    )
+
+    in_mutuo = (anni[None, :] <= p['anni_restanti_mutuo'][:, None]).astype(float)
+    costi_mutuo = (theta['rata_mutuo_mensile'] * 12).colonna() * in_mutuo
+
+    affitto_effettivo = affitti_lordi * (1 - theta['periodo_sfitto_perc'] / 100).colonna()
+    tasse_affitto = affitto_effettivo * (theta['tassazione_affitti_perc'] / 100).colonna()
+    manutenzione = valori_annuali * (theta['manutenzione_straordinaria_perc'] / 100).colonna()
+    tassa_catastale = valori_annuali * (theta['tassa_catastale_perc'] / 100).colonna()
+    affitti_netti = affitto_effettivo - (
+        costi_assicurazione + costi_gestione + manutenzione + tassa_catastale + tasse_affitto + costi_mutuo
+    )
+    affitti_netti = _Duale.where(attivo, affitti_netti, 0.0)
+    affitti_netti_reali = affitti_netti / indice_inflazione
+
+    valore_finale_nominale = valori_annuali.take(indice_finale)
+    valore_finale_reale = valore_finale_nominale / indice_inflazione.take(indice_finale)
+    totale_affitti_netti = affitti_netti.sum(axis=1)
+    totale_affitti_netti_reale = affitti_netti_reali.sum(axis=1)
+
+    valore_immobile = theta['valore_immobile']
+    commissione_iniziale = theta['commissione_iniziale']
+    commissione_finale = theta['commissione_finale']
+    costi_sostenuti = theta['costo_acquisto'] + theta['costo_ristrutturazione']
+    costi_inseriti = (p['costo_acquisto'] > 0) | (p['costo_ristrutturazione'] > 0)
+    investimento_iniziale = _Duale.where(
+        costi_inseriti, costi_sostenuti + commissione_iniziale, valore_immobile + commissione_iniziale
+    )
+    plusvalore = _Duale.where(costi_inseriti, valore_immobile - costi_sostenuti, 0.0)
+
+    rendimento_totale_nominale = (
+        totale_affitti_netti + (valore_finale_nominale - valore_immobile) + plusvalore
+        - commissione_iniziale - commissione_finale
+    )
+    rendimento_totale_reale = (
+        totale_affitti_netti_reale + (valore_finale_reale - valore_immobile) + plusvalore
+        - commissione_iniziale - commissione_finale
+    )
+    valore_finale_totale_nominale = valore_finale_nominale + totale_affitti_netti - commissione_finale
+    valore_finale_totale_reale = valore_finale_reale + totale_affitti_netti_reale - commissione_finale
+
+    esponente = 1 / anni_investimento
+    cagr_nominale = (valore_finale_totale_nominale / investimento_iniziale) ** esponente - 1
+    cagr_reale = (valore_finale_totale_reale / investimento_iniziale) ** esponente - 1
+
+    anni_con_mutuo = np.minimum(p['anni_restanti_mutuo'], anni_investimento)
+    costi_mutuo_totali = theta['rata_mutuo_mensile'] * (12 * anni_con_mutuo)
+    roi_nominale = (rendimento_totale_nominale + costi_mutuo_totali) / investimento_iniziale * 100
+    # ROE sul capitale proprio: senza leva nota coincide con rendimento / investimento
+    debito_finale, con_leva = _leva_con_gradiente(theta['debito_residuo_mutuo'], theta['rata_mutuo_mensile'], p)
+    debito_iniziale = _Duale.where(con_leva, theta['debito_residuo_mutuo'], 0.0)
+    capitale_proprio = investimento_iniziale - debito_iniziale
+    roe_nominale = (rendimento_totale_nominale + debito_iniziale - debito_finale) / capitale_proprio * 100
+
+    # Flussi di cassa (n, anni + 1) con valore finale e commissione all'anno N
+    righe = np.arange(n)
+    finale = np.zeros((n, anni_max))
+    finale[righe, indice_finale] = 1.0
+    ultimo_nominale = (valore_finale_nominale - commissione_finale).colonna() * finale
+    ultimo_reale = (valore_finale_reale - commissione_finale).colonna() * finale
+    flussi_nominali = affitti_netti + ultimo_nominale
+    flussi_reali = affitti_netti_reali + ultimo_reale
+    cash_flows_nominal = _Duale(
+        np.column_stack([-investimento_iniziale.val, flussi_nominali.val]),
+        np.concatenate([-investimento_iniziale.der[:, None, :], flussi_nominali.der], axis=1),
+    )
+    cash_flows_real = _Duale(
+        np.column_stack([-investimento_iniziale.val, flussi_reali.val]),
+        np.concatenate([-investimento_iniziale.der[:, None, :], flussi_reali.der], axis=1),
+    )
+    tir_nominale, gradiente_tir_nominale = _tir_con_gradiente(cash_flows_nominal)
+    tir_reale, gradiente_tir_reale = _tir_con_gradiente(cash_flows_real)
+
+    # Investimento nullo: metriche a 0 come nella versione scalare
+    positivo = investimento_iniziale.val > 0
+    metriche = {
+        'cagr_nominale': cagr_nominale,
+        'cagr_reale': cagr_reale,
+        'roi_nominale': roi_nominale,
+        'roe_nominale': roe_nominale,
+    }
+    valori = {'tir_nominale': tir_nominale, 'tir_reale': tir_reale}
+    gradienti = {'tir_nominale': gradiente_tir_nominale, 'tir_reale': gradiente_tir_reale}
+    # Il ROE dipende dal capitale proprio, le altre metriche dall'investimento
+    positivo_capitale = capitale_proprio.val > 0
+    for nome, metrica in metriche.items():
+        attiva = positivo_capitale if nome == 'roe_nominale' else positivo
+        with np.errstate(invalid='ignore'):
+            valori[nome] = np.where(attiva, metrica.val, 0.0)
+            gradienti[nome] = np.where(attiva[:, None], metrica.der, 0.0)
+
+    return {
+        'chiavi': CHIAVI_GRADIENTE,
+        'valori': {nome: valori[nome] for nome in METRICHE_GRADIENTE},
+        'gradienti': {nome: gradienti[nome] for nome in METRICHE_GRADIENTE},
+    }
+
+
+def calculate_gradients(params):
+    """
+    Versione scalare di calculate_gradients_batch per un dizionario params
+
+    Returns:
+        dict: metrica -> {'valore': float o None, 'gradiente': {chiave: derivata}}
+    """
+    risultato = calculate_gradients_batch(params)
+    uscita = {}
+    for metrica in METRICHE_GRADIENTE:
+        valore = float(risultato['valori'][metrica][0])
+        uscita[metrica] = {
+            'valore': valore if np.isfinite(valore) else None,
+            'gradiente': dict(zip(risultato['chiavi'], risultato['gradienti'][metrica][0].tolist())),
+        }
+    return uscita
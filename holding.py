@@ -0,0 +1,188 @@
+import numpy as np
+from batch import (
+    normalize_batch,
+    calculate_annual_components_batch,
+    calculate_roi_roe_metrics_batch,
+    _scenari_percorsi,
+    _investimento_iniziale,
+)
+from irr import solve_irr_batch, IRR_CONVERGED
+
+# Anni di vendita risolti per primi (ogni PASSO_ANCORE anni e l'ultimo): i loro TIR
+# sono le stime iniziali degli anni vicini
+PASSO_ANCORE = 4
+
+METRICHE_DETENZIONE = (
+    'tir_nominale',
+    'tir_reale',
+    'cagr_nominale',
+    'cagr_reale',
+    'roi_nominale',
+    'roi_reale',
+    'roe_nominale',
+    'roe_reale',
+    'incasso_netto_vendita',
+    'totale_affitti_netti',
+    'rendimento_totale_nominale',
+    'rendimento_totale_reale',
+)
+
+# Metriche per cui si individua l'anno di vendita ottimale (massimo)
+METRICHE_OTTIMO = ('tir_nominale', 'tir_reale', 'cagr_nominale', 'cagr_reale', 'roe_nominale')
+
+
+def _tir_anni_vendita(flussi):
+    """
+    TIR in percentuale per ogni anno di vendita, flussi (m, N, N + 1)
+
+    Gli anni ancora sono risolti con la ricerca standard dell'intervallo; gli altri
+    partono dal TIR dell'ancora più vicina, così restano sullo stesso ramo della curva
+    e Newton converge in poche iterazioni.
+    """
+    m, anni_max, colonne = flussi.shape
+    indici = np.arange(anni_max)
+    ancore = np.flatnonzero(((indici + 1) % PASSO_ANCORE == 0) | (indici == anni_max - 1))
+    altri = np.setdiff1d(indici, ancore)
+
+    tir = np.full((m, anni_max), np.nan)
+    status = np.empty((m, anni_max), dtype=np.int8)
+    soluzione = solve_irr_batch(flussi[:, ancore].reshape(-1, colonne))
+    tir[:, ancore] = soluzione['irr'].reshape(m, -1)
+    status[:, ancore] = soluzione['status'].reshape(m, -1)
+    if altri.size:
+        vicina = ancore[np.abs(altri[:, None] - ancore[None, :]).argmin(axis=1)]
+        soluzione = solve_irr_batch(flussi[:, altri].reshape(-1, colonne), stime=tir[:, vicina].ravel())
+        tir[:, altri] = soluzione['irr'].reshape(m, -1)
+        status[:, altri] = soluzione['status'].reshape(m, -1)
+    return np.where(status == IRR_CONVERGED, tir * 100, np.nan), status
+
+
+def _flussi_anni_vendita(investimento_iniziale, affitti_netti, incasso_finale):
+    """
+    Flussi (n, N, N + 1): la riga k vende alla fine dell'anno k + 1 (affitti fino a
+    quell'anno, incasso_finale[:, k] nell'ultimo flusso)
+    """
+    n, anni_max = affitti_netti.shape
+    indici = np.arange(anni_max)
+    flussi = np.zeros((n, anni_max, anni_max + 1))
+    flussi[:, :, 0] = -investimento_iniziale[:, None]
+    flussi[:, :, 1:] = np.where(indici[None, None, :] <= indici[None, :, None], affitti_netti[:, None, :], 0.0)
+    flussi[:, indici, indici + 1] += incasso_finale
+    return flussi
+
+
+def calculate_holding_period_batch(params_batch, percorsi=None):
+    """
+    Metriche per ogni anno di vendita 1..anni_investimento da una sola simulazione
+
+    Le componenti annuali sono calcolate una volta sull'orizzonte massimo; totali degli
+    affitti e rendimenti per ogni anno di vendita sono somme prefisse, il valore di
+    vendita è il percorso valori_annuali. I TIR di tutti gli anni sono risolti insieme
+    (con stime iniziali dagli anni vicini). Per l'anno k i valori coincidono con quelli
+    di calculate_real_estate_investment_batch con anni_investimento = k.
+
+    Args:
+        params_batch: Come in batch.calculate_real_estate_investment_batch
+        percorsi: Come in batch.calculate_real_estate_investment_batch
+
+    Returns:
+        dict: 'anni_vendita' (N,), per ogni metrica di METRICHE_DETENZIONE una matrice
+        (n, N) con NaN oltre l'orizzonte dello scenario (CAGR decimale, TIR/ROI/ROE in
+        percentuale, importi in euro) e 'anno_ottimale' (metrica di METRICHE_OTTIMO ->
+        anno di vendita che la massimizza, 0 se non calcolabile)
+    """
+    p, n = normalize_batch(params_batch, _scenari_percorsi(percorsi))
+    componenti = calculate_annual_components_batch(p, n, percorsi)
+    anni_max = componenti['anni_max']
+    anni_vendita = np.arange(1, anni_max + 1)
+    attivo = componenti['attivo']
+    valori_annuali = componenti['valori_annuali']
+    indice_inflazione = componenti['indice_inflazione']
+    affitti_netti = componenti['affitti_netti_annuali']
+    affitti_netti_reali = affitti_netti / indice_inflazione
+
+    # Somme prefisse: affitti incassati vendendo alla fine di ciascun anno
+    totale_affitti_netti = np.cumsum(affitti_netti, axis=1)
+    totale_affitti_netti_reale = np.cumsum(affitti_netti_reali, axis=1)
+    valori_reali = valori_annuali / indice_inflazione
+
+    costi_inseriti = (p['costo_acquisto'] > 0) | (p['costo_ristrutturazione'] > 0)
+    plusvalore_minusvalore_iniziale = np.where(
+        costi_inseriti, p['valore_immobile'] - (p['costo_acquisto'] + p['costo_ristrutturazione']), 0.0
+    )
+    investimento_iniziale = _investimento_iniziale(p)
+    costanti = (plusvalore_minusvalore_iniziale - p['valore_immobile'] - p['commissione_iniziale'] - p['commissione_finale'])[:, None]
+    commissione_finale = p['commissione_finale'][:, None]
+
+    rendimento_totale_nominale = totale_affitti_netti + valori_annuali + costanti
+    rendimento_totale_reale = totale_affitti_netti_reale + valori_reali + costanti
+
+    positivo = (investimento_iniziale > 0)[:, None]
+    divisore = np.where(positivo, investimento_iniziale[:, None], 1.0)
+    with np.errstate(invalid='ignore'):
+        cagr_nominale = np.where(
+            positivo, ((valori_annuali + totale_affitti_netti - commissione_finale) / divisore) ** (1 / anni_vendita) - 1, 0.0
+        )
+        cagr_reale = np.where(
+            positivo, ((valori_reali + totale_affitti_netti_reale - commissione_finale) / divisore) ** (1 / anni_vendita) - 1, 0.0
+        )
+
+    # ROI e ROE con la stessa funzione del motore, su n x N combinazioni scenario/anno
+    p_anni = {chiave: np.repeat(valore, anni_max) for chiave, valore in p.items()}
+    p_anni['anni_investimento'] = np.tile(anni_vendita, n)
+    roi_roe = calculate_roi_roe_metrics_batch(
+        p_anni, rendimento_totale_nominale.ravel(), rendimento_totale_reale.ravel(), indice_inflazione.ravel()
+    )
+    debito_finale = roi_roe['debito_finale_mutuo'].reshape(n, anni_max)
+
+    flussi = np.concatenate([
+        _flussi_anni_vendita(investimento_iniziale, affitti_netti, valori_annuali - commissione_finale),
+        _flussi_anni_vendita(investimento_iniziale, affitti_netti_reali, valori_reali - commissione_finale),
+    ])
+    tir, _ = _tir_anni_vendita(flussi)
+
+    metriche = {
+        'tir_nominale': tir[:n],
+        'tir_reale': tir[n:],
+        'cagr_nominale': cagr_nominale,
+        'cagr_reale': cagr_reale,
+        'roi_nominale': roi_roe['roi_nominale'].reshape(n, anni_max),
+        'roi_reale': roi_roe['roi_reale'].reshape(n, anni_max),
+        'roe_nominale': roi_roe['roe_nominale'].reshape(n, anni_max),
+        'roe_reale': roi_roe['roe_reale'].reshape(n, anni_max),
+        'incasso_netto_vendita': valori_annuali - commissione_finale - debito_finale,
+        'totale_affitti_netti': totale_affitti_netti,
+        'rendimento_totale_nominale': rendimento_totale_nominale,
+        'rendimento_totale_reale': rendimento_totale_reale,
+    }
+    risultato = {'anni_vendita': anni_vendita}
+    for nome in METRICHE_DETENZIONE:
+        risultato[nome] = np.where(attivo, metriche[nome], np.nan)
+
+    anno_ottimale = {}
+    for nome in METRICHE_OTTIMO:
+        valori = risultato[nome]
+        calcolabile = np.isfinite(valori).any(axis=1)
+        migliore = np.argmax(np.where(np.isfinite(valori), valori, -np.inf), axis=1) + 1
+        anno_ottimale[nome] = np.where(calcolabile, migliore, 0)
+    risultato['anno_ottimale'] = anno_ottimale
+    return risultato
+
+
+def calculate_holding_period(params):
+    """
+    Versione per un singolo dizionario params di calculate_holding_period_batch
+
+    Returns:
+        dict: 'anni_vendita' e ogni metrica come liste di lunghezza anni_investimento
+        (None dove non calcolabile), 'anno_ottimale' (metrica -> anno o None)
+    """
+    risultato = calculate_holding_period_batch(params)
+    anni = int(params['anni_investimento'])
+    scalare = {'anni_vendita': risultato['anni_vendita'][:anni].tolist()}
+    for nome in METRICHE_DETENZIONE:
+        scalare[nome] = [float(v) if np.isfinite(v) else None for v in risultato[nome][0, :anni]]
+    scalare['anno_ottimale'] = {
+        nome: int(anno[0]) or None for nome, anno in risultato['anno_ottimale'].items()
+    }
+    return scalare
@@ -236,6 +236,177 @@ TRANSLATIONS = {
         
         'developed_by': '*Sviluppata da **AS** con la collaborazione di **KIM** 🐱 - Versione per fini didattici*',
         
+        # Monte Carlo
+        'monte_carlo_title': '🎲 Simulazione Monte Carlo',
+        'monte_carlo_info': '💡 Rivalutazione, inflazione e periodo sfitto variano ogni anno in modo casuale attorno ai valori inseriti',
+        'mc_paths': 'Numero di Simulazioni',
+        'mc_seed': 'Seme Casuale',
+        'mc_appreciation_std': 'Dev. Std. Rivalutazione (%)',
+        'mc_inflation_std': 'Dev. Std. Inflazione (%)',
+        'mc_vacancy_std': 'Dev. Std. Periodo Sfitto (%)',
+        'mc_correlation': 'Correlazione Rivalutazione/Inflazione',
+        'mc_correlation_help': "Correlazione annua tra rivalutazione dell'immobile e inflazione",
+        'mc_run_button': '🎲 Avvia Simulazione',
+        'mc_percentiles': '📊 Distribuzione dei Risultati (percentili):',
+        'mc_value_bands': '📈 Bande Percentili del Valore Immobile:',
+        'mc_tir_not_available': '⚠️ Simulazioni con TIR non calcolabile: ',
+        'final_value_nominal_label': 'Valore Finale (Nominale)',
+
+        # Parameter sweep
+        'sweep_title': '🗺️ Mappa di Sensibilità su Due Parametri',
+        'sweep_info': '💡 Calcola la metrica scelta su tutte le combinazioni di due parametri (es. prezzo × affitto)',
+        'sweep_axis_x': 'Parametro Asse X',
+        'sweep_axis_y': 'Parametro Asse Y',
+        'sweep_min': 'Valore Minimo',
+        'sweep_max': 'Valore Massimo',
+        'sweep_steps': 'Numero di Punti',
+        'sweep_metric': 'Metrica',
+        'sweep_same_axis': '⚠️ Scegli due parametri diversi per gli assi',
+        'sweep_run_button': '🗺️ Calcola Mappa',
+        'sweep_best': '🏆 Combinazione migliore: ',
+        'roe_nominal_label': 'ROE Nominale',
+
+        # Tornado sensitivity
+        'tornado_title': '🌪️ Analisi di Sensibilità (Tornado)',
+        'tornado_info': '💡 Ogni parametro viene variato in più e in meno: le barre più lunghe indicano i parametri che incidono di più',
+        'tornado_variation': 'Variazione (%)',
+        'tornado_parameter': 'Parametro',
+        'tornado_parameter_value': 'Valore Parametro',
+        'tornado_base': '📍 Scenario base: ',
+
+        # Debug panel
+        'debug_title': '🛠️ Pannello di Debug (Profiling)',
+        'debug_enable': 'Abilita strumentazione',
+        'debug_info': '💡 Tempi delle sezioni di calcolo e di rendering e contatori del solver TIR. Le misure sono della sola sessione corrente; con IMMOBILIARE_PROFILING=1 nell\'ambiente la strumentazione è attiva per tutto il processo e span e contatori sono scritti come righe JSON su stderr',
+        'debug_spans': '**⏱️ Span**',
+        'debug_counters': '**🔢 Contatori**',
+        'debug_recent': '**🕒 Span recenti**',
+        'debug_empty': 'Nessuna misura registrata: abilitare la strumentazione e ripetere il calcolo',
+        'debug_reset': 'Azzera misure',
+
+        # Mortgage amortization
+        'mortgage_outstanding_debt': 'Debito Residuo Mutuo (€)',
+        'mortgage_outstanding_debt_help': "Capitale del mutuo ancora da restituire all'acquisto: con rata e anni restanti determina il tasso implicito e il ROE sul capitale proprio effettivo",
+        'mortgage_implied_rate': 'Tasso implicito del mutuo: ',
+        'mortgage_implied_rate_na': 'Tasso implicito non determinabile con debito, rata e anni inseriti',
+
+        # Holding period
+        'holding_title': '📅 Periodo di Detenzione Ottimale',
+        'holding_info': "Metriche calcolate per ogni possibile anno di vendita, da 1 all'orizzonte dell'investimento, con una sola simulazione. Il punto rosso indica l'anno di vendita migliore per la metrica scelta.",
+        'holding_sale_year': 'Anno di vendita',
+        'holding_net_proceeds': 'Incasso netto dalla vendita',
+        'holding_best_year': 'Anno di vendita ottimale: ',
+
+        # Goal seek
+        'goal_seek_title': '🎯 Ricerca Obiettivo',
+        'goal_seek_info': "Trova il valore di un parametro (es. il prezzo massimo di acquisto o l'affitto minimo) che porta la metrica scelta all'obiettivo, mantenendo invariati gli altri parametri.",
+        'goal_seek_variable': 'Parametro da calcolare',
+        'goal_seek_target': 'Obiettivo (%)',
+        'goal_seek_run_button': '🎯 Calcola Obiettivo',
+        'goal_seek_not_found': 'Obiettivo non raggiungibile variando solo questo parametro',
+
+        # Optimizer
+        'optimizer_title': '🧭 Ottimizzazione Struttura',
+        'optimizer_info': "Cerca la combinazione di parametri (debito e durata del mutuo, ristrutturazione, orizzonte) che massimizza la metrica scelta, con la rata entro la percentuale indicata dell'affitto mensile. Senza ottimizzare il finanziamento il mutuo resta quello inserito: l'incasso del debito non è modellato e una rata più alta sarebbe solo un costo.",
+        'optimizer_financing': 'Ottimizza il finanziamento (rata calcolata da debito, tasso e durata)',
+        'optimizer_financing_variables': 'Per ottimizzare il finanziamento seleziona sia il debito residuo sia gli anni restanti del mutuo',
+        'optimizer_max_payment_ratio': 'Rata massima (% affitto mensile)',
+        'optimizer_mortgage_rate': 'Tasso mutuo annuo (%)',
+        'optimizer_variables': 'Parametri da ottimizzare',
+        'optimizer_run_button': '🧭 Ottimizza',
+        'optimizer_infeasible': 'Nessuna combinazione rispetta il vincolo sulla rata',
+        'optimizer_parameter': 'Parametro',
+        'optimizer_current': 'Attuale',
+        'optimizer_optimal': 'Ottimale',
+        'optimizer_generation': 'Generazione',
+        'optimizer_evaluations': '{n} scenari valutati',
+
+        # Portfolio
+        'portfolio_title': '🏘️ Portafoglio Immobili',
+        'portfolio_info': "Carica un file CSV o Parquet con un immobile per riga (stesse colonne del modulo, più 'anno_acquisto' opzionale). I flussi sono allineati su un calendario comune e consolidati.",
+        'portfolio_file': 'File del portafoglio',
+        'portfolio_stress_metric': 'Metrica delle prove di stress',
+        'portfolio_run_button': '🏘️ Analizza Portafoglio',
+        'portfolio_units': 'Immobili',
+        'portfolio_total_investment': 'Investimento Totale',
+        'portfolio_not_available': 'N/D',
+        'portfolio_year': 'Anno',
+        'portfolio_net_rent': 'Affitti netti',
+        'portfolio_debt_service': 'Rate mutuo',
+        'portfolio_value': 'Valore immobili',
+        'portfolio_cash_flow': 'Flusso di cassa',
+        'portfolio_units_held': 'Immobili detenuti',
+        'portfolio_contributions': '📋 Contributo di ogni immobile',
+        'portfolio_investment_share': 'Quota investimento (%)',
+        'portfolio_return_share': 'Quota rendimento (%)',
+        'portfolio_npv': 'VAN al TIR del portafoglio',
+        'portfolio_npv_help': "Un VAN positivo al TIR del portafoglio indica che l'immobile alza il rendimento complessivo; la somma dei VAN è zero.",
+
+        # Screener
+        'screener_title': '🔎 Selezione Annunci',
+        'screener_info': "Carica un file di annunci (colonne 'prezzo', 'affitto_mensile' e facoltative 'citta', 'superficie_mq'): ogni annuncio è valutato e restano i migliori per la metrica scelta. Clicca sull'intestazione di una colonna per ordinare la tabella.",
+        'screener_file': 'File degli annunci',
+        'screener_top': 'Annunci da mostrare',
+        'screener_use_form': 'Usa le ipotesi del modulo per gli altri parametri',
+        'screener_run_button': '🔎 Seleziona Annunci',
+        'screener_summary': '{letti:,} annunci valutati, {migliori} selezionati',
+
+        # Backtest
+        'backtest_title': '🕰️ Backtest Storico',
+        'backtest_info': "Carica un CSV di serie annuali ('anno' e una o più tra 'rivalutazione_annua', 'inflazione_perc', 'crescita_affitti_perc' o 'indice_affitti'; 'citta' facoltativa): l'investimento è ripetuto per ogni anno di partenza con i valori realmente osservati al posto delle ipotesi costanti.",
+        'backtest_file': 'File delle serie storiche',
+        'backtest_city': 'Città',
+        'backtest_run_button': '🕰️ Avvia Backtest',
+        'backtest_windows': '{n} anni di partenza, dal {primo} al {ultimo}',
+        'backtest_worst': 'TIR Peggiore',
+        'backtest_median': 'TIR Mediano',
+        'backtest_best': 'TIR Migliore',
+        'backtest_by_start_year': '📅 TIR per Anno di Partenza:',
+        'backtest_start_year': 'Anno di partenza',
+
+        # Tenant lifecycle
+        'tenant_title': '👥 Ciclo di Vita degli Inquilini',
+        'tenant_info': "Simula mese per mese lo stato dell'immobile (occupato, sfitto, moroso) come catena di Markov: disdette, tempi di rilocazione, morosità, costi di rilocazione e canone riallineato al mercato a ogni nuovo contratto sostituiscono il periodo di sfitto fisso.",
+        'tenant_turnover': 'Probabilità di Disdetta Annua (%)',
+        'tenant_vacancy_months': 'Mesi Medi di Sfitto',
+        'tenant_arrears': 'Probabilità di Morosità Annua (%)',
+        'tenant_arrears_months': 'Durata Media Morosità (mesi)',
+        'tenant_cure': 'Morosità Sanate (%)',
+        'tenant_reletting_cost': 'Costi di Rilocazione (mesi di affitto)',
+        'tenant_market_growth': 'Crescita Canoni di Mercato (%)',
+        'tenant_run_button': '👥 Simula Inquilini',
+        'tenant_median_tir': 'TIR Mediano (sfitto simulato)',
+        'tenant_flat_tir': 'TIR con Sfitto Fisso',
+        'tenant_average_relettings': 'Nuove Locazioni Medie',
+        'tenant_vacancy_by_year': '📉 Sfitto e Morosità Medi per Anno (%):',
+
+        # Stress test
+        'stress_title': '🌪️ Prove di Stress',
+        'stress_info': "Applica all'immobile una libreria di shock con nome (tassi del mutuo, calo dei prezzi, sfitto, inflazione, costi di gestione, stagflazione) e mostra la variazione delle metriche rispetto allo scenario base. Lo shock sui tassi ricalcola la rata solo se è indicato il debito residuo del mutuo.",
+        'stress_scenarios': 'Shock da applicare',
+        'stress_run_button': '🌪️ Esegui Prove di Stress',
+        'stress_base': 'Base',
+        'stress_delta_help': "Riga o colonna 'Base': valore della metrica senza shock; le altre: variazione in punti percentuali rispetto alla base.",
+        'stress_portfolio': '🌪️ Prove di Stress per Immobile:',
+
+        # One-off events
+        'events_title': '🧾 Eventi Straordinari',
+        'events_info': "Aggiungi spese e incassi una tantum in anni precisi (es. rifacimento del tetto, bonus edilizi, allestimenti per un nuovo inquilino): importi negativi per le spese, positivi per gli incassi. Gli importi indicizzati sono a prezzi di oggi e crescono con l'inflazione; gli eventi non modificano la tassazione degli affitti.",
+        'events_year': 'Anno',
+        'events_amount': 'Importo (€)',
+        'events_description': 'Descrizione',
+        'events_indexed': 'Indicizzato',
+        'events_run_button': '🧾 Calcola con Eventi',
+        'events_tir_without': 'TIR Senza Eventi',
+        'events_tir_with': 'TIR Con Eventi',
+        'events_total': 'Totale Eventi',
+        'events_net_rent_with': 'Affitti netti con eventi',
+        'events_net_rent_without': 'Affitti netti senza eventi',
+
+        # Stress test: rate shocks
+        'stress_rate_needs_debt': 'Gli shock sui tassi del mutuo richiedono il debito residuo del mutuo: senza, il tasso non è determinabile e per questi shock non è riportato alcun valore (non significa assenza di impatto).',
+        'stress_rate_needs_debt_portfolio': "{n} immobili hanno un mutuo senza debito residuo: gli shock sui tassi non sono applicabili e le celle corrispondenti sono vuote (non significa assenza di impatto). Aggiungere la colonna 'debito_residuo_mutuo'.",
+
         # Error messages
         'calculation_error': '❌ Errore nel calcolo immobiliare: ',
         'check_values': 'Verifica che tutti i valori siano corretti.',
@@ -473,6 +644,177 @@ TRANSLATIONS = {
         
         'developed_by': '*Developed by **AS** in collaboration with **KIM** 🐱 - Educational version*',
         
+        # Monte Carlo
+        'monte_carlo_title': '🎲 Monte Carlo Simulation',
+        'monte_carlo_info': '💡 Appreciation, inflation and vacancy vary randomly every year around the entered values',
+        'mc_paths': 'Number of Simulations',
+        'mc_seed': 'Random Seed',
+        'mc_appreciation_std': 'Appreciation Std. Dev. (%)',
+        'mc_inflation_std': 'Inflation Std. Dev. (%)',
+        'mc_vacancy_std': 'Vacancy Std. Dev. (%)',
+        'mc_correlation': 'Appreciation/Inflation Correlation',
+        'mc_correlation_help': 'Yearly correlation between property appreciation and inflation',
+        'mc_run_button': '🎲 Run Simulation',
+        'mc_percentiles': '📊 Results Distribution (percentiles):',
+        'mc_value_bands': '📈 Property Value Percentile Bands:',
+        'mc_tir_not_available': '⚠️ Simulations with IRR not computable: ',
+        'final_value_nominal_label': 'Final Value (Nominal)',
+
+        # Parameter sweep
+        'sweep_title': '🗺️ Two-Parameter Sensitivity Map',
+        'sweep_info': '💡 Computes the chosen metric over every combination of two parameters (e.g. price × rent)',
+        'sweep_axis_x': 'X Axis Parameter',
+        'sweep_axis_y': 'Y Axis Parameter',
+        'sweep_min': 'Minimum Value',
+        'sweep_max': 'Maximum Value',
+        'sweep_steps': 'Number of Points',
+        'sweep_metric': 'Metric',
+        'sweep_same_axis': '⚠️ Choose two different parameters for the axes',
+        'sweep_run_button': '🗺️ Compute Map',
+        'sweep_best': '🏆 Best combination: ',
+        'roe_nominal_label': 'Nominal ROE',
+
+        # Tornado sensitivity
+        'tornado_title': '🌪️ Sensitivity Analysis (Tornado)',
+        'tornado_info': '💡 Each parameter is moved up and down: longer bars mark the parameters with the largest impact',
+        'tornado_variation': 'Variation (%)',
+        'tornado_parameter': 'Parameter',
+        'tornado_parameter_value': 'Parameter Value',
+        'tornado_base': '📍 Base scenario: ',
+
+        # Debug panel
+        'debug_title': '🛠️ Debug Panel (Profiling)',
+        'debug_enable': 'Enable instrumentation',
+        'debug_info': '💡 Timings of calculation and rendering sections and IRR solver counters. Measurements belong to the current session only; with the IMMOBILIARE_PROFILING=1 environment variable instrumentation is active for the whole process and spans and counters are written as JSON lines to stderr',
+        'debug_spans': '**⏱️ Spans**',
+        'debug_counters': '**🔢 Counters**',
+        'debug_recent': '**🕒 Recent spans**',
+        'debug_empty': 'No measurements recorded: enable instrumentation and run the calculation again',
+        'debug_reset': 'Reset measurements',
+
+        # Mortgage amortization
+        'mortgage_outstanding_debt': 'Outstanding Mortgage Debt (€)',
+        'mortgage_outstanding_debt_help': 'Mortgage principal still owed at purchase: with payment and remaining years it determines the implied rate and the ROE on actual equity',
+        'mortgage_implied_rate': 'Implied mortgage rate: ',
+        'mortgage_implied_rate_na': 'Implied rate cannot be determined from the debt, payment and years entered',
+
+        # Holding period
+        'holding_title': '📅 Optimal Holding Period',
+        'holding_info': 'Metrics computed for every possible sale year, from 1 to the investment horizon, from a single simulation. The red point marks the best sale year for the selected metric.',
+        'holding_sale_year': 'Sale year',
+        'holding_net_proceeds': 'Net sale proceeds',
+        'holding_best_year': 'Optimal sale year: ',
+
+        # Goal seek
+        'goal_seek_title': '🎯 Goal Seek',
+        'goal_seek_info': 'Finds the value of one parameter (e.g. the maximum purchase price or the minimum rent) that brings the selected metric to the target, keeping the other parameters unchanged.',
+        'goal_seek_variable': 'Parameter to solve for',
+        'goal_seek_target': 'Target (%)',
+        'goal_seek_run_button': '🎯 Solve for Target',
+        'goal_seek_not_found': 'Target cannot be reached by changing only this parameter',
+
+        # Optimizer
+        'optimizer_title': '🧭 Structure Optimization',
+        'optimizer_info': 'Searches for the combination of parameters (mortgage debt and term, renovation, horizon) that maximizes the selected metric, keeping the payment within the given percentage of monthly rent. Without financing optimization the mortgage stays as entered: the loan proceeds are not modelled and a larger payment would only be a cost.',
+        'optimizer_financing': 'Optimize financing (payment computed from debt, rate and term)',
+        'optimizer_financing_variables': 'To optimize financing select both the outstanding debt and the remaining mortgage years',
+        'optimizer_max_payment_ratio': 'Maximum payment (% of monthly rent)',
+        'optimizer_mortgage_rate': 'Annual mortgage rate (%)',
+        'optimizer_variables': 'Parameters to optimize',
+        'optimizer_run_button': '🧭 Optimize',
+        'optimizer_infeasible': 'No combination satisfies the payment constraint',
+        'optimizer_parameter': 'Parameter',
+        'optimizer_current': 'Current',
+        'optimizer_optimal': 'Optimal',
+        'optimizer_generation': 'Generation',
+        'optimizer_evaluations': '{n} scenarios evaluated',
+
+        # Portfolio
+        'portfolio_title': '🏘️ Property Portfolio',
+        'portfolio_info': "Upload a CSV or Parquet file with one property per row (same columns as the form, plus optional 'anno_acquisto' purchase year). Cash flows are aligned on a common calendar and consolidated.",
+        'portfolio_file': 'Portfolio file',
+        'portfolio_stress_metric': 'Stress test metric',
+        'portfolio_run_button': '🏘️ Analyze Portfolio',
+        'portfolio_units': 'Properties',
+        'portfolio_total_investment': 'Total Investment',
+        'portfolio_not_available': 'N/A',
+        'portfolio_year': 'Year',
+        'portfolio_net_rent': 'Net rent',
+        'portfolio_debt_service': 'Debt service',
+        'portfolio_value': 'Property value',
+        'portfolio_cash_flow': 'Cash flow',
+        'portfolio_units_held': 'Properties held',
+        'portfolio_contributions': '📋 Contribution of each property',
+        'portfolio_investment_share': 'Investment share (%)',
+        'portfolio_return_share': 'Return share (%)',
+        'portfolio_npv': 'NPV at portfolio IRR',
+        'portfolio_npv_help': 'A positive NPV at the portfolio IRR means the property raises the overall return; the NPVs sum to zero.',
+
+        # Screener
+        'screener_title': '🔎 Deal Screener',
+        'screener_info': "Upload a listings file (columns 'prezzo' price, 'affitto_mensile' monthly rent and optional 'citta' city, 'superficie_mq' size): every listing is scored and the best ones for the selected metric are kept. Click a column header to sort the table.",
+        'screener_file': 'Listings file',
+        'screener_top': 'Listings to show',
+        'screener_use_form': 'Use the form assumptions for the other parameters',
+        'screener_run_button': '🔎 Screen Listings',
+        'screener_summary': '{letti:,} listings scored, {migliori} selected',
+
+        # Backtest
+        'backtest_title': '🕰️ Historical Backtest',
+        'backtest_info': "Upload a CSV of annual series ('anno' year and one or more of 'rivalutazione_annua', 'inflazione_perc', 'crescita_affitti_perc' or 'indice_affitti'; 'citta' city is optional): the investment is replayed for every start year with the values actually observed instead of the constant assumptions.",
+        'backtest_file': 'Historical series file',
+        'backtest_city': 'City',
+        'backtest_run_button': '🕰️ Run Backtest',
+        'backtest_windows': '{n} start years, from {primo} to {ultimo}',
+        'backtest_worst': 'Worst IRR',
+        'backtest_median': 'Median IRR',
+        'backtest_best': 'Best IRR',
+        'backtest_by_start_year': '📅 IRR by Start Year:',
+        'backtest_start_year': 'Start year',
+
+        # Tenant lifecycle
+        'tenant_title': '👥 Tenant Lifecycle',
+        'tenant_info': 'Simulates the property state month by month (occupied, vacant, in arrears) as a Markov chain: move-outs, re-letting time, arrears, re-letting costs and rent reset to market on each new lease replace the flat vacancy period.',
+        'tenant_turnover': 'Annual Move-out Probability (%)',
+        'tenant_vacancy_months': 'Average Vacancy (months)',
+        'tenant_arrears': 'Annual Arrears Probability (%)',
+        'tenant_arrears_months': 'Average Arrears Duration (months)',
+        'tenant_cure': 'Arrears Cured (%)',
+        'tenant_reletting_cost': 'Re-letting Costs (months of rent)',
+        'tenant_market_growth': 'Market Rent Growth (%)',
+        'tenant_run_button': '👥 Simulate Tenants',
+        'tenant_median_tir': 'Median IRR (simulated vacancy)',
+        'tenant_flat_tir': 'IRR with Flat Vacancy',
+        'tenant_average_relettings': 'Average New Leases',
+        'tenant_vacancy_by_year': '📉 Average Vacancy and Arrears by Year (%):',
+
+        # Stress test
+        'stress_title': '🌪️ Stress Tests',
+        'stress_info': 'Applies a library of named shocks (mortgage rates, price drop, vacancy, inflation, running costs, stagflation) to the property and shows the change in each metric against the base scenario. The rate shock recomputes the payment only when the outstanding mortgage debt is given.',
+        'stress_scenarios': 'Shocks to apply',
+        'stress_run_button': '🌪️ Run Stress Tests',
+        'stress_base': 'Base',
+        'stress_delta_help': "'Base' row or column: metric value without shocks; the others: change in percentage points against the base.",
+        'stress_portfolio': '🌪️ Stress Tests by Property:',
+
+        # One-off events
+        'events_title': '🧾 One-off Events',
+        'events_info': "Add one-off costs and receipts in specific years (e.g. roof repair, building bonuses, fit-out for a new tenant): negative amounts for costs, positive for receipts. Indexed amounts are at today's prices and grow with inflation; events do not change rent taxation.",
+        'events_year': 'Year',
+        'events_amount': 'Amount (€)',
+        'events_description': 'Description',
+        'events_indexed': 'Indexed',
+        'events_run_button': '🧾 Calculate with Events',
+        'events_tir_without': 'IRR Without Events',
+        'events_tir_with': 'IRR With Events',
+        'events_total': 'Events Total',
+        'events_net_rent_with': 'Net rent with events',
+        'events_net_rent_without': 'Net rent without events',
+
+        # Stress test: rate shocks
+        'stress_rate_needs_debt': 'Mortgage rate shocks need the outstanding mortgage debt: without it the rate cannot be determined and no value is reported for these shocks (this does not mean no impact).',
+        'stress_rate_needs_debt_portfolio': "{n} properties have a mortgage without outstanding debt: rate shocks cannot be applied and the corresponding cells are empty (this does not mean no impact). Add the 'debito_residuo_mutuo' column.",
+
         # Error messages
         'calculation_error': '❌ Real estate calculation error: ',
         'check_values': 'Please check that all values are correct.',
@@ -0,0 +1,343 @@
+import functools
+import numpy as np
+import warnings
+import profiling
+
+# Stato della soluzione per ciascuna riga di flussi di cassa
+IRR_CONVERGED = 0
+IRR_NO_SIGN_CHANGE = 1
+IRR_NO_BRACKET = 2
+IRR_NOT_CONVERGED = 3
+IRR_NON_FINITE = 4
+
+IRR_STATUS_LABELS = {
+    IRR_CONVERGED: "convergente",
+    IRR_NO_SIGN_CHANGE: "flussi senza cambio di segno",
+    IRR_NO_BRACKET: "nessuna radice nell'intervallo (-100%, 1000%)",
+    IRR_NOT_CONVERGED: "iterazioni massime raggiunte",
+    IRR_NON_FINITE: "flussi non finiti",
+}
+
+# Nomi dei contatori di profiling per i casi non convergenti
+CONTATORI_STATO = {
+    IRR_NO_SIGN_CHANGE: 'irr.senza_cambio_segno',
+    IRR_NO_BRACKET: 'irr.senza_intervallo',
+    IRR_NOT_CONVERGED: 'irr.non_convergenti',
+    IRR_NON_FINITE: 'irr.non_finiti',
+}
+
+# Griglia di tassi usata per isolare un intervallo con cambio di segno dell'NPV.
+# Più fitta attorno ai rendimenti tipici di un immobile.
+GRIGLIA_TASSI = np.array([
+    -0.99, -0.95, -0.9, -0.8, -0.7, -0.6, -0.5, -0.4, -0.3, -0.2, -0.15, -0.1, -0.075, -0.05, -0.025,
+    0.0, 0.0125, 0.025, 0.0375, 0.05, 0.0625, 0.075, 0.0875, 0.1, 0.125, 0.15, 0.2, 0.25, 0.3, 0.4,
+    0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 9.99,
+])
+
+# Stima iniziale storica (fsolve partiva da 10%): tra più radici si sceglie la più vicina
+STIMA_INIZIALE = 0.1
+
+# Sotto questo numero di righe l'NPV è valutato con il vettore delle potenze (n, T)
+# in poche operazioni; oltre, lo schema di Horner (T operazioni su vettori lunghi n)
+# ammortizza meglio il costo per elemento
+MAX_RIGHE_POTENZE = 256
+
+# Limite delle potenze di sconto: evita inf * 0 sui tassi vicini a -100%
+MAX_POTENZA = 1e300
+
+
+def npv_horner(cash_flows, tassi, derivata=True):
+    """
+    Calcola NPV e derivata rispetto al tasso con lo schema di Horner
+
+    Con x = 1 / (1 + r) l'NPV è il polinomio sum(cf_k * x^k), valutato colonna per
+    colonna su tutte le righe contemporaneamente.
+
+    Args:
+        cash_flows: Array (n, T) di flussi di cassa
+        tassi: Array (n,) oppure (n, G) di tassi decimali
+        derivata: Se False la derivata non viene calcolata (restituisce None)
+
+    Returns:
+        tuple: (npv, derivata dnpv/dr) con la stessa forma di tassi
+    """
+    x = 1.0 / (1.0 + tassi)
+    # Colonne contigue in memoria: il ciclo scorre i periodi dall'ultimo al primo
+    colonne = np.ascontiguousarray(cash_flows.T)
+    if x.ndim == 2:
+        colonne = colonne[:, :, None]
+
+    valore = np.zeros_like(x) + colonne[-1]
+    derivata_x = np.zeros_like(x) if derivata else None
+    for k in range(colonne.shape[0] - 2, -1, -1):
+        if derivata:
+            derivata_x *= x
+            derivata_x += valore
+        valore *= x
+        valore += colonne[k]
+    if not derivata:
+        return valore, None
+    return valore, -derivata_x * x * x
+
+
+def npv_potenze(cash_flows, tassi, derivata=True, tempi=None):
+    """
+    NPV e derivata come prodotti scalari con il vettore delle potenze di sconto
+
+    Equivalente a npv_horner per tassi (n,), ma con un numero costante di operazioni
+    vettoriali indipendente dalla lunghezza T dei flussi: adatto a poche righe con
+    orizzonti lunghi (es. 1200 periodi mensili) e a flussi non equispaziati.
+
+    Args:
+        tempi: Tempi dei flussi in anni, array (T,); None = periodi 0..T-1
+
+    Returns:
+        tuple: (npv, derivata dnpv/dr) di forma (n,)
+    """
+    periodi = np.arange(cash_flows.shape[1]) if tempi is None else tempi
+    # (1 + r)^-t come exp(-t log(1 + r)): exp è vettorializzato meglio di pow
+    with np.errstate(over='ignore'):
+        potenze = np.minimum(np.exp(-np.log1p(tassi)[:, None] * periodi), MAX_POTENZA)
+    scontati = cash_flows * potenze
+    valore = scontati.sum(axis=1)
+    if not derivata:
+        return valore, None
+    # d/dr (1 + r)^-t = -t (1 + r)^-(t+1)
+    return valore, -(scontati @ periodi) / (1.0 + tassi)
+
+
+def _valuta_npv(cash_flows, tassi, tempi=None):
+    """NPV e derivata con il metodo più rapido per la forma dei flussi"""
+    if tempi is not None or cash_flows.shape[0] <= MAX_RIGHE_POTENZE:
+        return npv_potenze(cash_flows, tassi, tempi=tempi)
+    return npv_horner(cash_flows, tassi)
+
+
+@functools.lru_cache(maxsize=32)
+def _potenze_griglia(periodi):
+    """Potenze di sconto (T, G) della GRIGLIA_TASSI, calcolate una volta per lunghezza"""
+    with np.errstate(over='ignore'):
+        potenze = (1.0 / (1.0 + GRIGLIA_TASSI))[None, :] ** np.arange(periodi)[:, None]
+    potenze = np.minimum(potenze, MAX_POTENZA)
+    potenze.flags.writeable = False
+    return potenze
+
+
+def _npv_griglia(cash_flows, tempi=None):
+    """
+    NPV di ogni riga su tutta la GRIGLIA_TASSI con un unico prodotto matriciale
+
+    Le potenze di sconto (T, G) sono troncate a MAX_POTENZA per evitare inf * 0 sui
+    tassi vicini a -100% con orizzonti lunghi.
+    """
+    if tempi is None:
+        return cash_flows @ _potenze_griglia(cash_flows.shape[1])
+    with np.errstate(over='ignore'):
+        potenze = np.exp(-np.log1p(GRIGLIA_TASSI)[None, :] * tempi[:, None])
+    return cash_flows @ np.minimum(potenze, MAX_POTENZA)
+
+
+def _fsolve_fallback(cash_flows, tempi=None):
+    """Risoluzione scalare con fsolve per i casi senza intervallo nella griglia"""
+    # Import ritardato: SciPy serve solo per questi casi rari e costa ~0,4 s all'avvio
+    from scipy.optimize import fsolve
+
+    periodi = np.arange(len(cash_flows)) if tempi is None else tempi
+
+    def npv(rate):
+        return np.sum(cash_flows / (1 + rate) ** periodi)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        soluzione, _, ier, _ = fsolve(npv, STIMA_INIZIALE, full_output=True)
+    tasso = soluzione[0]
+    if ier == 1 and -1 < tasso < 10:
+        return tasso
+    return None
+
+
+def solve_irr_batch(cash_flows, xtol=1e-12, max_iter=100, fallback=True, tempi=None, stime=None):
+    """
+    Calcola il TIR per ogni riga di una matrice di flussi di cassa
+
+    Per ogni riga isola un intervallo con cambio di segno dell'NPV sulla GRIGLIA_TASSI
+    (il più vicino al 10%), poi applica Newton protetto: il passo di Newton è accettato
+    solo se resta dentro l'intervallo, altrimenti si usa la falsa posizione tra gli
+    estremi, o la bisezione se lo stesso estremo è rimasto fermo anche all'iterazione
+    precedente (la falsa posizione sposterebbe sempre quello). Una riga converge quando
+    il passo di Newton (residuo dell'NPV diviso per la derivata) è entro xtol, anche se
+    rifiutato perché non più rappresentabile: sugli orizzonti lunghi succede alla radice,
+    prima che l'intervallo si chiuda.
+    Tutte le righe avanzano insieme; quelle già convergenti vengono escluse.
+
+    Args:
+        cash_flows: Array (n, T) o (T,) di flussi, colonna 0 = investimento iniziale.
+            Zeri finali (orizzonti più corti) non alterano il risultato.
+        xtol: Tolleranza sul tasso
+        max_iter: Numero massimo di iterazioni
+        fallback: Se True, le righe senza intervallo nella griglia sono risolte con fsolve
+        tempi: Tempi dei flussi in anni, array (T,) comune a tutte le righe, per flussi
+            non equispaziati (XIRR); None = periodi annuali 0..T-1
+        stime: Stime iniziali per riga (n,), tassi decimali (es. il TIR di un problema
+            vicino). Tra più intervalli si sceglie quello più vicino alla stima e Newton
+            parte dalla stima se cade nell'intervallo; NaN = comportamento di default
+
+    Returns:
+        dict: 'irr' (tasso decimale, NaN se non calcolabile), 'status' (codici IRR_*),
+        'iterations' (iterazioni usate per riga)
+    """
+    cash_flows = np.atleast_2d(np.asarray(cash_flows, dtype=float))
+    if tempi is not None:
+        tempi = np.asarray(tempi, dtype=float)
+    n = cash_flows.shape[0]
+    irr = np.full(n, np.nan)
+    status = np.full(n, IRR_NOT_CONVERGED, dtype=np.int8)
+    iterations = np.zeros(n, dtype=np.int32)
+
+    finiti = np.isfinite(cash_flows).all(axis=1)
+    status[~finiti] = IRR_NON_FINITE
+    cambio_segno = (cash_flows > 0).any(axis=1) & (cash_flows < 0).any(axis=1)
+    status[finiti & ~cambio_segno] = IRR_NO_SIGN_CHANGE
+
+    attive = np.flatnonzero(finiti & cambio_segno)
+    if attive.size == 0:
+        return _risultato(irr, status, iterations)
+
+    # Ricerca dell'intervallo sulla griglia (n_attive, G)
+    flussi = cash_flows[attive]
+    with np.errstate(over='ignore', invalid='ignore'):
+        npv_griglia = _npv_griglia(flussi, tempi)
+    segni = np.sign(npv_griglia)
+    cambio = segni[:, :-1] * segni[:, 1:] <= 0
+    centri = (GRIGLIA_TASSI[:-1] + GRIGLIA_TASSI[1:]) / 2
+    if stime is None:
+        stima = np.full(attive.size, STIMA_INIZIALE)
+    else:
+        stima = np.broadcast_to(np.asarray(stime, dtype=float), (n,))[attive]
+        stima = np.where(np.isfinite(stima), stima, STIMA_INIZIALE)
+    distanza = np.where(cambio, np.abs(centri - stima[:, None]), np.inf)
+    intervallo = np.argmin(distanza, axis=1)
+    trovato = np.isfinite(distanza[np.arange(attive.size), intervallo])
+
+    senza_intervallo = attive[~trovato]
+    status[senza_intervallo] = IRR_NO_BRACKET
+    if fallback:
+        if senza_intervallo.size:
+            profiling.increment('irr.fallback_fsolve', senza_intervallo.size)
+        for riga in senza_intervallo:
+            tasso = _fsolve_fallback(cash_flows[riga], tempi)
+            if tasso is not None:
+                irr[riga] = tasso
+                status[riga] = IRR_CONVERGED
+
+    attive = attive[trovato]
+    flussi = flussi[trovato]
+    intervallo = intervallo[trovato]
+    npv_griglia = npv_griglia[trovato]
+    stima = stima[trovato]
+    righe = np.arange(attive.size)
+
+    a = GRIGLIA_TASSI[intervallo]
+    b = GRIGLIA_TASSI[intervallo + 1]
+    fa = npv_griglia[righe, intervallo]
+    fb = npv_griglia[righe, intervallo + 1]
+
+    # Punto di partenza: interpolazione lineare nell'intervallo
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tasso = a - fa * (b - a) / (fb - fa)
+    tasso = np.where(np.isfinite(tasso) & (tasso > a) & (tasso < b), tasso, (a + b) / 2)
+    if stime is not None:
+        tasso = np.where((stima > a) & (stima < b), stima, tasso)
+    tasso = np.where(fa == 0, a, np.where(fb == 0, b, tasso))
+
+    # Indice di ogni riga attiva in flussi: la matrice è compattata solo quando le righe
+    # attive scendono sotto la metà, per non copiarla a ogni iterazione
+    righe_flussi = righe
+    # Estremo sostituito all'iterazione precedente, per alternare falsa posizione e bisezione
+    sostituito_a = np.zeros(attive.size, dtype=bool)
+    sostituito_b = np.zeros(attive.size, dtype=bool)
+    for iterazione in range(1, max_iter + 1):
+        if attive.size == 0:
+            break
+        if righe_flussi.size < flussi.shape[0] // 2:
+            flussi = flussi[righe_flussi]
+            righe_flussi = np.arange(righe_flussi.size)
+        if righe_flussi.size == flussi.shape[0]:
+            valore, derivata = _valuta_npv(flussi, tasso, tempi)
+        else:
+            tassi_flussi = np.zeros(flussi.shape[0])
+            tassi_flussi[righe_flussi] = tasso
+            valore, derivata = _valuta_npv(flussi, tassi_flussi, tempi)
+            valore, derivata = valore[righe_flussi], derivata[righe_flussi]
+
+        # Aggiorna l'intervallo mantenendo il cambio di segno
+        stesso_segno_a = np.sign(valore) == np.sign(fa)
+        a = np.where(stesso_segno_a, tasso, a)
+        fa = np.where(stesso_segno_a, valore, fa)
+        b = np.where(stesso_segno_a, b, tasso)
+        fb = np.where(stesso_segno_a, fb, valore)
+        # Estremo fermo due volte di seguito: la falsa posizione stallerebbe
+        bisezione = (stesso_segno_a & sostituito_a) | (~stesso_segno_a & sostituito_b)
+        sostituito_a, sostituito_b = stesso_segno_a, ~stesso_segno_a
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = tasso - valore / derivata
+            secante = b - fb * (b - a) / (fb - fa)
+        accettato = np.isfinite(newton) & (newton > a) & (newton < b)
+        secante = np.where(np.isfinite(secante) & (secante > a) & (secante < b) & ~bisezione, secante, (a + b) / 2)
+        nuovo = np.where(accettato, newton, secante)
+
+        # Residuo entro la tolleranza sul tasso: |NPV| <= xtol |dNPV/dr|
+        tolleranza = xtol * (1 + np.abs(tasso))
+        radice_esatta = (valore == 0) | (np.abs(valore) <= tolleranza * np.abs(derivata))
+        # Il passo della falsa posizione può essere minimo lontano dalla radice: solo
+        # quello di Newton conta per l'arresto sul passo
+        convergente = (accettato & (np.abs(nuovo - tasso) <= tolleranza)) | radice_esatta | (b - a <= xtol)
+        # Passo di Newton accettato: è comunque il tasso più preciso
+        tasso = np.where(radice_esatta & ~accettato, tasso, nuovo)
+
+        finite = attive[convergente]
+        irr[finite] = tasso[convergente]
+        status[finite] = IRR_CONVERGED
+        iterations[finite] = iterazione
+
+        rimaste = ~convergente
+        attive, righe_flussi, tasso = attive[rimaste], righe_flussi[rimaste], tasso[rimaste]
+        a, b, fa, fb = a[rimaste], b[rimaste], fa[rimaste], fb[rimaste]
+        sostituito_a, sostituito_b = sostituito_a[rimaste], sostituito_b[rimaste]
+
+    iterations[attive] = max_iter
+    return _risultato(irr, status, iterations)
+
+
+def year_fractions(date):
+    """Tempi in anni dalla prima data (giorni effettivi / 365, come XIRR dei fogli di calcolo)"""
+    date = np.asarray(date, dtype='datetime64[D]')
+    return (date - date[0]) / np.timedelta64(1, 'D') / 365
+
+
+def solve_xirr_batch(cash_flows, date, **opzioni):
+    """
+    TIR di flussi datati (XIRR) per ogni riga di una matrice di flussi
+
+    Args:
+        cash_flows: Array (n, T) di flussi; la colonna 0 è alla data iniziale
+        date: Date dei flussi (T,) come datetime64 o stringhe ISO, comuni a tutte le righe
+        **opzioni: xtol, max_iter, fallback come in solve_irr_batch
+
+    Returns:
+        dict: Come solve_irr_batch; 'irr' è il tasso annuo effettivo decimale
+    """
+    return solve_irr_batch(cash_flows, tempi=year_fractions(date), **opzioni)
+
+
+def _risultato(irr, status, iterations):
+    """Dizionario dei risultati; aggiorna i contatori se il profiling è attivo"""
+    if profiling.is_enabled():
+        profiling.increment('irr.righe', status.size)
+        profiling.increment('irr.iterazioni', int(iterations.sum()))
+        for codice, contatore in CONTATORI_STATO.items():
+            quanti = int(np.count_nonzero(status == codice))
+            if quanti:
+                profiling.increment(contatore, quanti)
+    return {'irr': irr, 'status': status, 'iterations': iterations}
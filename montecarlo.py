@@ -0,0 +1,271 @@
+import math
+import numpy as np
+from batch import calculate_real_estate_investment_batch, CHIAVI_PERCORSO
+from streaming import StreamingSummary, iter_blocks, METRICHE_STREAMING, SERIE_STREAMING, COMPRESSIONE_DEFAULT
+
+DISTRIBUZIONI = ('normale', 'lognormale', 'costante')
+
+# Configurazione di default: la media di ogni driver è il valore inserito in params
+CONFIGURAZIONE_DEFAULT = {
+    'rivalutazione_annua': {'distribuzione': 'normale', 'dev_std': 3.0},
+    'inflazione_perc': {'distribuzione': 'lognormale', 'dev_std': 1.0},
+    'periodo_sfitto_perc': {'distribuzione': 'normale', 'dev_std': 3.0},
+    # Correlazione tra i driver nello stesso anno, nell'ordine di CHIAVI_PERCORSO
+    'correlazione': [
+        [1.0, 0.3, 0.0],
+        [0.3, 1.0, 0.0],
+        [0.0, 0.0, 1.0],
+    ],
+}
+
+# Limiti fisici dei driver in percentuale: i valori normali oltre i limiti sono
+# riportati al limite, con la posizione della normale corretta perché la media resti
+# quella indicata (_posizione_censurata)
+LIMITI_DRIVER = {
+    'rivalutazione_annua': (-99.0, None),
+    'inflazione_perc': (-99.0, None),
+    'periodo_sfitto_perc': (0.0, 100.0),
+}
+
+PERCENTILI_DEFAULT = (5, 25, 50, 75, 95)
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _splitmix64(x):
+    """Funzione di mescolamento SplitMix64 su array uint64 (aritmetica modulo 2^64)"""
+    z = x + _GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def path_uniforms(seed, indici_percorso, n_valori, primo=0):
+    """
+    Genera uniformi in (0, 1) con un flusso indipendente e riproducibile per ogni percorso
+
+    Ogni percorso è un generatore SplitMix64 con stato iniziale derivato da (seed, i):
+    il valore k del percorso i dipende solo da (seed, i, k), quindi un percorso produce
+    gli stessi numeri qualunque sia il numero totale di percorsi o la suddivisione in
+    blocchi, senza creare un oggetto RNG per percorso.
+
+    Args:
+        seed: Seme intero non negativo
+        indici_percorso: Array (n,) degli indici globali dei percorsi
+        n_valori: Numero di uniformi per percorso
+        primo: Posizione nel flusso del primo valore restituito (per generare un flusso
+            lungo a tratti: i valori coincidono con quelli di una sola chiamata)
+
+    Returns:
+        np.ndarray: Array (n, n_valori)
+    """
+    with np.errstate(over='ignore'):
+        chiave_seme = _splitmix64(np.array([seed], dtype=np.uint64))
+        stato_iniziale = _splitmix64(np.asarray(indici_percorso, dtype=np.uint64) ^ chiave_seme)
+        passi = np.arange(primo, primo + n_valori, dtype=np.uint64) * _GOLDEN
+        bit = _splitmix64(stato_iniziale[:, None] + passi[None, :])
+    return ((bit >> np.uint64(11)).astype(np.float64) + 0.5) * 2.0 ** -53
+
+
+def _normali_correlate(seed, indici_percorso, anni, correlazione):
+    """Normali standard (n, anni, n_driver) correlate tra driver con Cholesky (Box-Muller)"""
+    n_driver = correlazione.shape[0]
+    n_normali = anni * n_driver
+    coppie = (n_normali + 1) // 2
+    uniformi = path_uniforms(seed, indici_percorso, 2 * coppie).reshape(-1, coppie, 2)
+    raggio = np.sqrt(-2.0 * np.log(uniformi[..., 0]))
+    angolo = 2.0 * np.pi * uniformi[..., 1]
+    normali = np.concatenate([raggio * np.cos(angolo), raggio * np.sin(angolo)], axis=1)[:, :n_normali]
+    return normali.reshape(-1, anni, n_driver) @ np.linalg.cholesky(correlazione).T
+
+
+def _trasforma(normali, media, impostazioni):
+    """Applica la distribuzione del driver a normali standard; valori in percentuale"""
+    distribuzione = impostazioni.get('distribuzione', 'normale')
+    dev_std = float(impostazioni.get('dev_std', 0.0))
+    if distribuzione == 'costante' or dev_std == 0:
+        return np.full(normali.shape, media)
+    if distribuzione == 'normale':
+        return media + dev_std * normali
+    if distribuzione == 'lognormale':
+        # Lognormale sul fattore di crescita (1 + x/100) con media e dev. std. indicate
+        fattore_medio = 1 + media / 100
+        if fattore_medio <= 0:
+            raise ValueError("La distribuzione lognormale richiede una media maggiore di -100%")
+        sigma2 = np.log1p((dev_std / 100 / fattore_medio) ** 2)
+        mu = np.log(fattore_medio) - sigma2 / 2
+        return (np.exp(mu + np.sqrt(sigma2) * normali) - 1) * 100
+    raise ValueError(f"Distribuzione non supportata: {distribuzione}. Valori ammessi: {DISTRIBUZIONI}")
+
+
+def _media_censurata(posizione, dev_std, minimo, massimo):
+    """Media di clip(N(posizione, dev_std), minimo, massimo); limiti None = assenti"""
+    def cdf(z):
+        return 0.5 * (1 + math.erf(z / math.sqrt(2)))
+
+    def pdf(z):
+        return math.exp(-z * z / 2) / math.sqrt(2 * math.pi)
+
+    a = -math.inf if minimo is None else (minimo - posizione) / dev_std
+    b = math.inf if massimo is None else (massimo - posizione) / dev_std
+    media = posizione * (cdf(b) - cdf(a)) + dev_std * ((pdf(a) if math.isfinite(a) else 0.0) - (pdf(b) if math.isfinite(b) else 0.0))
+    if minimo is not None:
+        media += minimo * cdf(a)
+    if massimo is not None:
+        media += massimo * (1 - cdf(b))
+    return media
+
+
+def _posizione_censurata(media, dev_std, minimo, massimo):
+    """
+    Posizione della normale con dev_std tale che i valori riportati entro [minimo,
+    massimo] abbiano media media (bisezione: la media censurata cresce con la posizione)
+
+    Con media sul limite o oltre l'unica distribuzione ammessa è la costante al
+    limite: la posizione è portata a 40 deviazioni standard oltre.
+    """
+    if dev_std <= 0:
+        return media
+    if minimo is not None and media <= minimo:
+        return minimo - 40 * dev_std
+    if massimo is not None and media >= massimo:
+        return massimo + 40 * dev_std
+    basso, alto = media - 40 * dev_std, media + 40 * dev_std
+    for _ in range(200):
+        centro = (basso + alto) / 2
+        if _media_censurata(centro, dev_std, minimo, massimo) < media:
+            basso = centro
+        else:
+            alto = centro
+        if alto - basso <= 1e-12 * (1 + abs(centro)):
+            break
+    return (basso + alto) / 2
+
+
+def generate_paths(params, configurazione, indici_percorso, seed=0):
+    """
+    Genera i percorsi annuali dei driver stocastici per i percorsi indicati
+
+    Args:
+        params: Dizionario params scalare (fornisce le medie e l'orizzonte)
+        configurazione: Dizionario come CONFIGURAZIONE_DEFAULT; per ogni driver è
+            possibile indicare anche 'media' (default: valore in params)
+        indici_percorso: Array degli indici globali dei percorsi da generare
+        seed: Seme della simulazione
+
+    I driver con distribuzione normale sono riportati entro LIMITI_DRIVER spostando
+    la posizione della normale, così la media attesa resta quella indicata (la
+    deviazione standard risulta un po' minore vicino ai limiti, es. sfitto basso).
+
+    Returns:
+        dict: Driver -> array (n, anni_investimento) in percentuale
+    """
+    anni = int(params['anni_investimento'])
+    correlazione = np.asarray(configurazione.get('correlazione', np.eye(len(CHIAVI_PERCORSO))), dtype=float)
+    if correlazione.shape != (len(CHIAVI_PERCORSO), len(CHIAVI_PERCORSO)):
+        raise ValueError(f"La matrice di correlazione deve essere {len(CHIAVI_PERCORSO)}x{len(CHIAVI_PERCORSO)}")
+    normali = _normali_correlate(seed, indici_percorso, anni, correlazione)
+
+    percorsi = {}
+    for j, chiave in enumerate(CHIAVI_PERCORSO):
+        impostazioni = configurazione.get(chiave, {'distribuzione': 'costante'})
+        media = float(impostazioni.get('media', params[chiave]))
+        minimo, massimo = LIMITI_DRIVER[chiave]
+        if impostazioni.get('distribuzione', 'normale') == 'normale':
+            media = _posizione_censurata(media, float(impostazioni.get('dev_std', 0.0)), minimo, massimo)
+        valori = _trasforma(normali[..., j], media, impostazioni)
+        percorsi[chiave] = np.clip(valori, minimo, massimo)
+    return percorsi
+
+
+def summarize_distribution(valori, percentili=PERCENTILI_DEFAULT):
+    """
+    Statistiche di una metrica simulata (i valori NaN, es. TIR non calcolabile, sono esclusi)
+
+    Returns:
+        dict: media, dev_std, percentili (array allineato a percentili) e quota non calcolabile
+    """
+    valori = np.asarray(valori, dtype=float)
+    validi = valori[np.isfinite(valori)]
+    if validi.size == 0:
+        return {
+            'media': np.nan,
+            'dev_std': np.nan,
+            'percentili': np.full(len(percentili), np.nan),
+            'quota_non_calcolabile': 1.0,
+        }
+    return {
+        'media': float(validi.mean()),
+        'dev_std': float(validi.std()),
+        'percentili': np.percentile(validi, percentili),
+        'quota_non_calcolabile': 1 - validi.size / valori.size,
+    }
+
+
+def simulate_monte_carlo(params, configurazione=None, n_percorsi=10000, seed=0,
+                         percentili=PERCENTILI_DEFAULT, restituisci_risultati=False,
+                         dimensione_blocco=None, compressione=COMPRESSIONE_DEFAULT, workers=1):
+    """
+    Simulazione Monte Carlo di rivalutazione, inflazione e periodo sfitto
+
+    Tutti i percorsi sono valutati in un unico batch con
+    batch.calculate_real_estate_investment_batch. Con dimensione_blocco i percorsi
+    sono elaborati a blocchi e aggregati in streaming (streaming.StreamingSummary):
+    la memoria dipende dalla dimensione del blocco e non da n_percorsi, i percentili
+    sono stime t-digest (errore di rango entro lo 0,1% con la compressione di default).
+    I percorsi sono identici nelle due modalità.
+
+    Args:
+        params: Dizionario params scalare come costruito dalla UI
+        configurazione: Distribuzioni e correlazione dei driver (default CONFIGURAZIONE_DEFAULT)
+        n_percorsi: Numero di percorsi simulati
+        seed: Seme; ogni percorso ha un flusso casuale proprio derivato da (seed, indice)
+        percentili: Percentili da riportare
+        restituisci_risultati: Se True include i risultati completi del batch e i percorsi
+            (non disponibile con dimensione_blocco)
+        dimensione_blocco: Numero di percorsi per blocco; None = unico batch esatto
+        compressione: Compressione dei t-digest in modalità a blocchi
+        workers: Processi per il batch unico (parallel.evaluate_parallel, None = numero
+            di CPU); 1 = nel processo corrente
+
+    Returns:
+        dict: Statistiche per valore finale, CAGR e TIR (nominali e reali), bande
+        percentili e medie annuali di valore immobile e affitto netto (stesse chiavi
+        nelle due modalità)
+    """
+    configurazione = CONFIGURAZIONE_DEFAULT if configurazione is None else configurazione
+    sintesi = {
+        'n_percorsi': n_percorsi,
+        'seed': seed,
+        'percentili': tuple(percentili),
+    }
+
+    if dimensione_blocco is not None:
+        if restituisci_risultati:
+            raise ValueError("restituisci_risultati non è disponibile nella modalità a blocchi")
+        aggregatore = StreamingSummary(compressione=compressione)
+        for inizio, fine in iter_blocks(n_percorsi, dimensione_blocco):
+            percorsi = generate_paths(params, configurazione, np.arange(inizio, fine), seed)
+            aggregatore.update(calculate_real_estate_investment_batch(params, percorsi))
+        sintesi.update(aggregatore.summary(percentili))
+        return sintesi
+
+    percorsi = generate_paths(params, configurazione, np.arange(n_percorsi), seed)
+    if workers == 1:
+        risultati = calculate_real_estate_investment_batch(params, percorsi)
+    else:
+        from parallel import evaluate_parallel
+        chiavi = None if restituisci_risultati else METRICHE_STREAMING + SERIE_STREAMING
+        risultati = evaluate_parallel(params, percorsi, chiavi, workers)
+
+    # Stesse chiavi della modalità a blocchi (StreamingSummary.summary)
+    for nome in SERIE_STREAMING:
+        sintesi[f'bande_{nome}'] = np.percentile(risultati[nome], percentili, axis=0)
+        sintesi[f'media_{nome}'] = np.mean(risultati[nome], axis=0)
+    for metrica in METRICHE_STREAMING:
+        sintesi[metrica] = summarize_distribution(risultati[metrica], percentili)
+
+    if restituisci_risultati:
+        sintesi['risultati'] = risultati
+        sintesi['percorsi'] = percorsi
+    return sintesi
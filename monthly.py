@@ -0,0 +1,165 @@
+import numpy as np
+from batch import normalize_batch, calculate_annual_components_batch, _scenari_percorsi, _investimento_iniziale, CHIAVE_EVENTI
+from events import scatter_events_monthly
+from irr import solve_irr_batch, year_fractions, IRR_CONVERGED
+
+# Data di acquisto di default (i flussi mensili sono datati a partire da questa)
+DATA_INIZIO_DEFAULT = '2025-01-01'
+
+# Calendario dei pagamenti annuali, come mese dell'anno di possesso (0 = primo mese):
+# assicurazione anticipata a inizio anno, tassa catastale (IMU) in due rate a giugno e dicembre
+MESE_ASSICURAZIONE = 0
+MESI_TASSA_CATASTALE = (5, 11)
+
+# Voci dei flussi mensili restituite da calculate_monthly_cash_flows_batch (segno incluso)
+VOCI_MENSILI = (
+    'affitti_lordi',
+    'sfitto',
+    'tasse_affitto',
+    'costi_gestione',
+    'manutenzione',
+    'assicurazione',
+    'tassa_catastale',
+    'rate_mutuo',
+    'eventi',
+)
+
+
+def monthly_dates(data_inizio, mesi):
+    """
+    Date dei flussi: data_inizio e le stesse date nei mesi successivi
+
+    Il giorno del mese è mantenuto dove esiste (31 gennaio -> 28/29 febbraio).
+
+    Returns:
+        np.ndarray: datetime64[D] di lunghezza mesi + 1
+    """
+    inizio = np.datetime64(data_inizio, 'D')
+    primo_mese = inizio.astype('datetime64[M]')
+    giorno = (inizio - primo_mese.astype('datetime64[D]')).astype(int)
+    mesi_calendario = primo_mese + np.arange(mesi + 1)
+    inizio_mese = mesi_calendario.astype('datetime64[D]')
+    giorni_mese = ((mesi_calendario + 1).astype('datetime64[D]') - inizio_mese).astype(int)
+    return inizio_mese + np.minimum(giorno, giorni_mese - 1)
+
+
+def calculate_monthly_cash_flows_batch(params_batch, data_inizio=DATA_INIZIO_DEFAULT, percorsi=None):
+    """
+    Motore mensile: flussi di cassa datati e XIRR per n scenari
+
+    Usa le stesse componenti annuali del motore vettoriale annuale e le distribuisce
+    sui mesi: affitto, sfitto, tasse sull'affitto, gestione e manutenzione ogni mese
+    (anticipati, all'inizio del mese), rate del mutuo ogni mese per
+    anni_restanti_mutuo x 12 mesi, assicurazione a inizio anno e tassa catastale in due
+    rate (MESI_TASSA_CATASTALE), eventi straordinari nel proprio mese. Investimento e commissione iniziale sono alla data di
+    acquisto, vendita e commissione finale alla fine dell'orizzonte. Le somme annuali
+    delle voci coincidono con il motore annuale; cambia solo il momento dei flussi.
+
+    Args:
+        params_batch: Come in batch.calculate_real_estate_investment_batch
+        data_inizio: Data di acquisto (stringa ISO, date o datetime64)
+        percorsi: Come in batch.calculate_real_estate_investment_batch
+
+    Returns:
+        dict: 'date' (mesi_max + 1,), per ogni voce di VOCI_MENSILI una matrice
+        (n, mesi_max) con i mesi oltre l'orizzonte a zero, 'flussi_nominali' e
+        'flussi_reali' (n, mesi_max + 1), 'xirr_nominale' e 'xirr_reale' in percentuale
+        (NaN se non calcolabile) con 'xirr_status_nominale' e 'xirr_status_reale'
+    """
+    p, n = normalize_batch(params_batch, _scenari_percorsi(percorsi))
+    componenti = calculate_annual_components_batch(p, n, percorsi)
+    anni_max = componenti['anni_max']
+    mesi_max = 12 * anni_max
+    mesi = np.arange(mesi_max)
+    righe = np.arange(n)
+
+    attivo_annuale = componenti['attivo']
+    attivo = np.repeat(attivo_annuale, 12, axis=1)
+
+    # Le voci annuali sono azzerate oltre l'orizzonte prima di essere ripartite sui mesi
+    def _mensile(annuale):
+        return np.repeat(np.where(attivo_annuale, annuale, 0.0) / 12, 12, axis=1)
+
+    def _in_mesi(annuale, mesi_pagamento, quota):
+        mensile = np.zeros((n, anni_max, 12))
+        mensile[:, :, list(mesi_pagamento)] = (np.where(attivo_annuale, annuale, 0.0) * quota)[:, :, None]
+        return mensile.reshape(n, mesi_max)
+
+    affitti_lordi = _mensile(componenti['affitti_lordi_annuali'])
+    voci = {
+        'affitti_lordi': affitti_lordi,
+        'sfitto': -_mensile(componenti['affitti_lordi_annuali'] * componenti['periodo_sfitto_decimal']),
+        'tasse_affitto': -_mensile(componenti['tasse_affitto']),
+        'costi_gestione': -_mensile(componenti['costi_gestione_annuali']),
+        'manutenzione': -_mensile(componenti['manutenzione_annua']),
+        'assicurazione': -_in_mesi(componenti['costi_assicurazione_annuali'], (MESE_ASSICURAZIONE,), 1.0),
+        'tassa_catastale': -_in_mesi(componenti['tassa_catastale'], MESI_TASSA_CATASTALE, 1 / len(MESI_TASSA_CATASTALE)),
+    }
+    rata = np.where(p['rata_mutuo_mensile'] > 0, p['rata_mutuo_mensile'], 0.0)
+    con_rata = attivo & (mesi[None, :] < 12 * p['anni_restanti_mutuo'][:, None])
+    voci['rate_mutuo'] = -np.where(con_rata, rata[:, None], 0.0)
+    if componenti['eventi_annuali'] is not None:
+        voci['eventi'] = np.where(attivo, scatter_events_monthly(percorsi[CHIAVE_EVENTI], componenti['indice_inflazione']), 0.0)
+    else:
+        voci['eventi'] = np.zeros((n, mesi_max))
+
+    # Deflatore mensile: inflazione dell'anno ripartita in 12 fattori uguali;
+    # alla fine di ogni anno coincide con l'indice di inflazione annuale
+    inflazione_annua = componenti['indice_inflazione'] / np.concatenate(
+        [np.ones((n, 1)), componenti['indice_inflazione'][:, :-1]], axis=1
+    )
+    deflatori = np.ones((n, mesi_max + 1))
+    deflatori[:, 1:] = np.cumprod(np.repeat(inflazione_annua ** (1 / 12), 12, axis=1), axis=1)
+
+    netto_mensile = sum(voci.values())
+    mese_finale = 12 * p['anni_investimento']
+    indice_finale = p['anni_investimento'] - 1
+    valore_finale_nominale = componenti['valori_annuali'][righe, indice_finale]
+    investimento_iniziale = _investimento_iniziale(p)
+
+    flussi_nominali = np.zeros((n, mesi_max + 1))
+    flussi_nominali[:, :-1] = netto_mensile
+    flussi_nominali[:, 0] -= investimento_iniziale
+    flussi_nominali[righe, mese_finale] += valore_finale_nominale - p['commissione_finale']
+
+    # Reali: ogni flusso deflazionato alla sua data (investimento iniziale invariato)
+    flussi_reali = flussi_nominali / deflatori
+
+    date = monthly_dates(data_inizio, mesi_max)
+    soluzione = solve_irr_batch(np.vstack([flussi_nominali, flussi_reali]), tempi=year_fractions(date))
+    xirr = np.where(soluzione['status'] == IRR_CONVERGED, soluzione['irr'] * 100, np.nan)
+
+    risultato = {'date': date}
+    risultato.update(voci)
+    risultato.update({
+        'flussi_nominali': flussi_nominali,
+        'flussi_reali': flussi_reali,
+        'valore_finale_nominale': valore_finale_nominale,
+        'investimento_iniziale': investimento_iniziale,
+        'xirr_nominale': xirr[:n],
+        'xirr_reale': xirr[n:],
+        'xirr_status_nominale': soluzione['status'][:n],
+        'xirr_status_reale': soluzione['status'][n:],
+    })
+    return risultato
+
+
+def calculate_monthly_cash_flows(params, data_inizio=DATA_INIZIO_DEFAULT):
+    """
+    Versione per un singolo dizionario params di calculate_monthly_cash_flows_batch
+
+    Returns:
+        dict: Date e voci mensili come liste; 'xirr_nominale' e 'xirr_reale' in
+        percentuale o None se non calcolabili
+    """
+    risultato = calculate_monthly_cash_flows_batch(params, data_inizio)
+    mesi = 12 * int(params['anni_investimento'])
+    scalare = {'date': risultato['date'][:mesi + 1].tolist()}
+    for voce in VOCI_MENSILI:
+        scalare[voce] = risultato[voce][0, :mesi].tolist()
+    scalare['flussi_nominali'] = risultato['flussi_nominali'][0, :mesi + 1].tolist()
+    scalare['flussi_reali'] = risultato['flussi_reali'][0, :mesi + 1].tolist()
+    for chiave in ('xirr_nominale', 'xirr_reale'):
+        valore = risultato[chiave][0]
+        scalare[chiave] = float(valore) if np.isfinite(valore) else None
+    return scalare
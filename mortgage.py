@@ -0,0 +1,241 @@
+import numpy as np
+from irr import solve_irr_batch, IRR_CONVERGED
+
+# Modalità di ricalcolo dopo un rimborso anticipato: stessa scadenza con rata ridotta
+# ('rata') oppure stessa rata con scadenza anticipata ('durata')
+RIDUZIONI_RIMBORSO = ('rata', 'durata')
+
+# Soglie della rata mensile in percentuale dell'affitto mensile iniziale: fino alla prima
+# il mutuo è sostenibile, fino alla seconda impegnativo, oltre rischioso
+SOGLIA_RATA_SOSTENIBILE_PERC = 50
+SOGLIA_RATA_IMPEGNATIVA_PERC = 70
+
+# Saldo residuo (in proporzione al capitale) sotto il quale il mutuo è considerato estinto
+TOLLERANZA_SALDO = 1e-9
+
+
+def calculate_payment(capitale, tasso_mensile, mesi):
+    """
+    Rata costante (ammortamento alla francese) per estinguere capitale in mesi rate
+
+    Args:
+        capitale: Debito da ammortizzare (scalare o array)
+        tasso_mensile: Tasso periodale decimale (tasso annuo nominale / 12)
+        mesi: Numero di rate residue
+
+    Returns:
+        np.ndarray: Rata mensile (0 se capitale o mesi non positivi)
+    """
+    capitale, tasso_mensile, mesi = np.broadcast_arrays(
+        np.asarray(capitale, dtype=float), np.asarray(tasso_mensile, dtype=float), np.asarray(mesi, dtype=float)
+    )
+    attivo = (capitale > 0) & (mesi > 0)
+    mesi_validi = np.where(attivo, mesi, 1.0)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        sconto = np.exp(-mesi_validi * np.log1p(tasso_mensile))
+        rata = np.where(tasso_mensile != 0, capitale * tasso_mensile / (1 - sconto), capitale / mesi_validi)
+    return np.where(attivo, rata, 0.0)
+
+
+def outstanding_balance(capitale, tasso_mensile, rata, mesi_pagati):
+    """
+    Debito residuo dopo mesi_pagati rate costanti, in forma chiusa
+
+    B_k = B * (1 + i)^k - rata * ((1 + i)^k - 1) / i   (B - rata * k se i = 0)
+
+    Returns:
+        np.ndarray: Debito residuo, mai negativo
+    """
+    # Gli argomenti sono combinati solo per broadcasting (es. (n, 1) con (1, mesi)):
+    # logaritmi e divisori restano della forma dei tassi
+    capitale = np.asarray(capitale, dtype=float)
+    tasso_mensile = np.asarray(tasso_mensile, dtype=float)
+    mesi_pagati = np.asarray(mesi_pagati, dtype=float)
+    tasso_nullo = tasso_mensile == 0
+    with np.errstate(over='ignore', invalid='ignore'):
+        fattore = np.exp(mesi_pagati * np.log1p(tasso_mensile))
+        annualita = np.where(tasso_nullo, mesi_pagati, (fattore - 1) / np.where(tasso_nullo, 1.0, tasso_mensile))
+        saldo = capitale * fattore - np.asarray(rata, dtype=float) * annualita
+    return np.where(saldo > TOLLERANZA_SALDO * np.abs(capitale), saldo, 0.0)
+
+
+def _percorso_tassi(tasso_annuo_perc, n, mesi_max):
+    """Tasso mensile decimale (n, mesi_max) da un tasso fisso (n,) o da un percorso mensile"""
+    tasso = np.asarray(tasso_annuo_perc, dtype=float) / 1200
+    if tasso.ndim <= 1:
+        return np.broadcast_to(np.reshape(tasso, (-1, 1)), (n, mesi_max))
+    if tasso.shape[1] < mesi_max:
+        raise ValueError(f"il percorso dei tassi ha {tasso.shape[1]} mesi, ne servono {mesi_max}")
+    return np.broadcast_to(tasso[:, :mesi_max], (n, mesi_max))
+
+
+def amortization_schedule_batch(capitale, tasso_annuo_perc, durata_mesi, rimborsi_anticipati=None, riduzione='rata'):
+    """
+    Piano di ammortamento alla francese di n mutui in forma chiusa vettoriale
+
+    Il piano è diviso in segmenti che iniziano al primo mese, a ogni cambio di tasso e
+    dopo ogni rimborso anticipato (di uno qualsiasi dei mutui); dentro un segmento rata
+    e tasso sono costanti e il debito residuo di ogni mese è calcolato in forma chiusa,
+    senza ciclo sui mesi. A inizio segmento la rata è ricalcolata sulla durata residua;
+    con riduzione='durata' è ricalcolata solo al cambio di tasso e un rimborso anticipato
+    accorcia il piano mantenendo la rata. L'ultima rata è limitata al debito residuo.
+
+    Args:
+        capitale: Importo finanziato (n,)
+        tasso_annuo_perc: Tasso annuo nominale in percentuale, fisso (n,) oppure percorso
+            mensile (n, mesi) per mutui variabili; il tasso del mese m si applica al
+            debito all'inizio del mese
+        durata_mesi: Durata contrattuale in mesi (n,)
+        rimborsi_anticipati: Capitale rimborsato in anticipo alla fine di ogni mese (n, mesi)
+        riduzione: Una di RIDUZIONI_RIMBORSO
+
+    Returns:
+        dict: Matrici (n, mesi_max) 'rata', 'interessi', 'quota_capitale',
+        'rimborsi_anticipati' e 'debito_residuo' (dopo il pagamento del mese), più
+        'totale_interessi' e 'mesi_estinzione' (mese in cui il debito si azzera) per mutuo
+    """
+    if riduzione not in RIDUZIONI_RIMBORSO:
+        raise ValueError(f"riduzione deve essere una tra {RIDUZIONI_RIMBORSO}")
+    capitale, durata_mesi = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(capitale, dtype=float)), np.atleast_1d(np.asarray(durata_mesi, dtype=int))
+    )
+    n = capitale.shape[0]
+    mesi_max = int(durata_mesi.max()) if n else 0
+    tassi = _percorso_tassi(tasso_annuo_perc, n, mesi_max)
+    if rimborsi_anticipati is None:
+        rimborsi = np.zeros((n, mesi_max))
+    else:
+        rimborsi = np.broadcast_to(np.asarray(rimborsi_anticipati, dtype=float), (n, mesi_max))
+    oltre_durata = np.arange(mesi_max)[None, :] >= durata_mesi[:, None]
+    rimborsi = np.where(oltre_durata, 0.0, np.maximum(rimborsi, 0.0))
+
+    # Inizio dei segmenti: mese 0, cambi di tasso, mese successivo a un rimborso anticipato
+    cambio_tasso = np.zeros((n, mesi_max), dtype=bool)
+    cambio_tasso[:, 0] = True
+    cambio_tasso[:, 1:] = tassi[:, 1:] != tassi[:, :-1]
+    nuovo_segmento = cambio_tasso.any(axis=0)
+    nuovo_segmento[1:] |= (rimborsi[:, :-1] > 0).any(axis=0)
+    inizi = np.flatnonzero(nuovo_segmento)
+    fini = np.append(inizi[1:], mesi_max)
+
+    piano = {voce: np.zeros((n, mesi_max)) for voce in ('rata', 'interessi', 'quota_capitale', 'rimborsi_anticipati', 'debito_residuo')}
+    saldo = capitale.copy()
+    rata = np.zeros(n)
+    for inizio, fine in zip(inizi, fini):
+        tasso = tassi[:, inizio]
+        if riduzione == 'rata':
+            ricalcola = np.ones(n, dtype=bool)
+        else:
+            ricalcola = cambio_tasso[:, inizio]
+        rata = np.where(ricalcola, calculate_payment(saldo, tasso, durata_mesi - inizio), rata)
+
+        # Debito residuo dopo ciascun mese del segmento (n, lunghezza)
+        mesi_pagati = np.arange(1, fine - inizio + 1)
+        saldo_fine = outstanding_balance(saldo[:, None], tasso[:, None], rata[:, None], mesi_pagati[None, :])
+        saldo_fine[oltre_durata[:, inizio:fine]] = 0.0
+        saldo_inizio = np.concatenate([saldo[:, None], saldo_fine[:, :-1]], axis=1)
+        interessi = saldo_inizio * tasso[:, None]
+        quota_capitale = saldo_inizio - saldo_fine
+
+        anticipato = np.minimum(rimborsi[:, fine - 1], saldo_fine[:, -1])
+        saldo_fine[:, -1] -= anticipato
+
+        piano['interessi'][:, inizio:fine] = interessi
+        piano['quota_capitale'][:, inizio:fine] = quota_capitale
+        piano['rata'][:, inizio:fine] = interessi + quota_capitale
+        piano['rimborsi_anticipati'][:, fine - 1] = anticipato
+        piano['debito_residuo'][:, inizio:fine] = saldo_fine
+        saldo = saldo_fine[:, -1]
+
+    estinto = piano['debito_residuo'] <= 0
+    piano['totale_interessi'] = piano['interessi'].sum(axis=1)
+    piano['mesi_estinzione'] = np.where(estinto.any(axis=1), estinto.argmax(axis=1) + 1, mesi_max)
+    return piano
+
+
+def amortization_schedule(capitale, tasso_annuo_perc, durata_anni, rimborsi_anticipati=None, riduzione='rata'):
+    """
+    Piano di ammortamento di un singolo mutuo (versione scalare di amortization_schedule_batch)
+
+    Args:
+        capitale: Importo finanziato
+        tasso_annuo_perc: Tasso annuo nominale in percentuale, o lista di tassi mensili
+        durata_anni: Durata in anni
+        rimborsi_anticipati: Dizionario mese (0 = primo) -> capitale rimborsato a fine mese
+        riduzione: Una di RIDUZIONI_RIMBORSO
+
+    Returns:
+        dict: Liste mensili 'rata', 'interessi', 'quota_capitale', 'rimborsi_anticipati'
+        e 'debito_residuo' fino all'estinzione, 'totale_interessi' e 'mesi_estinzione'
+    """
+    durata_mesi = int(durata_anni * 12)
+    tassi = np.asarray(tasso_annuo_perc, dtype=float)
+    if tassi.ndim == 1:
+        tassi = tassi[None, :]
+    rimborsi = None
+    if rimborsi_anticipati:
+        rimborsi = np.zeros((1, durata_mesi))
+        for mese, importo in rimborsi_anticipati.items():
+            rimborsi[0, mese] += importo
+    piano = amortization_schedule_batch([capitale], tassi, [durata_mesi], rimborsi, riduzione)
+    mesi = int(piano['mesi_estinzione'][0])
+    scalare = {voce: piano[voce][0, :mesi].tolist() for voce in ('rata', 'interessi', 'quota_capitale', 'rimborsi_anticipati', 'debito_residuo')}
+    scalare['totale_interessi'] = float(piano['totale_interessi'][0])
+    scalare['mesi_estinzione'] = mesi
+    return scalare
+
+
+def implied_rate_batch(capitale, rata_mensile, durata_mesi):
+    """
+    Tasso annuo nominale (percentuale) implicito in capitale, rata e durata
+
+    È il TIR mensile dei flussi (+capitale, -rata x durata_mesi), moltiplicato per 12.
+
+    Returns:
+        np.ndarray: Tasso in percentuale (NaN se non determinabile, es. rata nulla)
+    """
+    capitale, rata_mensile, durata_mesi = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(capitale, dtype=float)),
+        np.atleast_1d(np.asarray(rata_mensile, dtype=float)),
+        np.atleast_1d(np.asarray(durata_mesi, dtype=int)),
+    )
+    n = capitale.shape[0]
+    mesi_max = int(durata_mesi.max()) if n else 0
+    flussi = np.zeros((n, mesi_max + 1))
+    flussi[:, 0] = capitale
+    flussi[:, 1:] = np.where(np.arange(mesi_max)[None, :] < durata_mesi[:, None], -rata_mensile[:, None], 0.0)
+    soluzione = solve_irr_batch(flussi)
+    return np.where(soluzione['status'] == IRR_CONVERGED, soluzione['irr'] * 1200, np.nan)
+
+
+def calculate_leverage_batch(debito_iniziale, rata_mensile, anni_restanti_mutuo, anni_investimento):
+    """
+    Debito residuo all'orizzonte per mutui descritti da debito all'acquisto, rata e durata
+
+    Il tasso è quello implicito (implied_rate_batch); il debito residuo alla fine
+    dell'orizzonte va rimborsato alla vendita ed è la parte del debito iniziale non
+    ancora restituita con le rate.
+
+    Returns:
+        dict: 'tasso_implicito_perc', 'debito_finale' (n,) e 'valido' (debito positivo
+        con tasso determinato)
+    """
+    debito_iniziale = np.atleast_1d(np.asarray(debito_iniziale, dtype=float))
+    durata_mesi = 12 * np.atleast_1d(np.asarray(anni_restanti_mutuo, dtype=int))
+    con_debito = (debito_iniziale > 0) & (np.asarray(rata_mensile) > 0) & (durata_mesi > 0)
+    tasso = np.full(np.broadcast(debito_iniziale, durata_mesi).shape, np.nan)
+    if con_debito.any():
+        righe = np.flatnonzero(con_debito)
+        tasso[righe] = implied_rate_batch(
+            np.broadcast_to(debito_iniziale, tasso.shape)[righe],
+            np.broadcast_to(rata_mensile, tasso.shape)[righe],
+            np.broadcast_to(durata_mesi, tasso.shape)[righe],
+        )
+    valido = con_debito & np.isfinite(tasso)
+    mesi_pagati = np.minimum(durata_mesi, 12 * np.asarray(anni_investimento))
+    debito_finale = outstanding_balance(debito_iniziale, np.where(valido, tasso, 0.0) / 1200, rata_mensile, mesi_pagati)
+    return {
+        'tasso_implicito_perc': tasso,
+        'debito_finale': np.where(valido, debito_finale, 0.0),
+        'valido': valido,
+    }
@@ -0,0 +1,229 @@
+import numpy as np
+from batch import (
+    calculate_real_estate_investment_batch,
+    params_to_batch,
+    _investimento_iniziale,
+    CHIAVI_NUMERICHE,
+    CHIAVI_INTERE,
+)
+from mortgage import calculate_payment, SOGLIA_RATA_SOSTENIBILE_PERC
+
+# Variabili decisionali di default con i rispettivi intervalli [minimo, massimo]
+VARIABILI_DEFAULT = {
+    'rata_mutuo_mensile': (0.0, 2000.0),
+    'anni_restanti_mutuo': (0, 30),
+    'costo_ristrutturazione': (0.0, 50000.0),
+    'anni_investimento': (1, 30),
+}
+
+# Variabili del mutuo: ottimizzabili solo con un tasso (financing_variables), senza
+# l'incasso del debito non è modellato e una rata più alta è solo un costo
+VARIABILI_MUTUO = ('rata_mutuo_mensile', 'anni_restanti_mutuo')
+
+METRICHE_OTTIMIZZAZIONE = ('tir_nominale', 'tir_reale', 'cagr_nominale', 'cagr_reale', 'roe_nominale', 'roe_reale')
+
+# Default di optimize_investment: struttura del finanziamento al tasso indicato,
+# valutata col ROE (il TIR del motore non include l'incasso del mutuo)
+METRICA_DEFAULT = 'roe_nominale'
+TASSO_MUTUO_DEFAULT = 3.5
+
+# Quota massima dell'investimento finanziabile col mutuo (loan-to-value, percentuale):
+# con capitale proprio vicino a zero il ROE diverge
+QUOTA_FINANZIABILE_MASSIMA = 80
+
+# Vincolo di default: rata entro la soglia di sostenibilità usata nell'analisi del mutuo
+VINCOLI_DEFAULT = {'rata_su_affitto_perc': (None, SOGLIA_RATA_SOSTENIBILE_PERC)}
+
+# Parametri dell'evoluzione differenziale (DE/rand/1/bin)
+POPOLAZIONE_DEFAULT = 48
+GENERAZIONI_DEFAULT = 60
+FATTORE_MUTAZIONE = 0.7
+PROBABILITA_INCROCIO = 0.9
+
+
+def _grandezza_vincolo(nome, candidati, risultati):
+    """Grandezza vincolabile: una metrica dei risultati o la rata in % dell'affitto mensile iniziale"""
+    if nome != 'rata_su_affitto_perc':
+        return np.asarray(risultati[nome], dtype=float)
+    affitto_mensile = candidati['affitto_lordo'] / 12
+    positivo = affitto_mensile > 0
+    return np.where(positivo, candidati['rata_mutuo_mensile'] / np.where(positivo, affitto_mensile, 1.0) * 100, 0.0)
+
+
+def _violazione(candidati, risultati, vincoli):
+    """Somma delle violazioni dei vincoli (0 = candidato ammissibile); NaN conta come violazione"""
+    violazione = np.zeros(len(candidati['anni_investimento']))
+    for nome, (minimo, massimo) in vincoli.items():
+        valori = _grandezza_vincolo(nome, candidati, risultati)
+        if minimo is not None:
+            violazione += np.maximum(minimo - valori, 0.0)
+        if massimo is not None:
+            violazione += np.maximum(valori - massimo, 0.0)
+        violazione = np.where(np.isnan(valori), np.inf, violazione)
+    return violazione
+
+
+def _migliore(obiettivo_a, violazione_a, obiettivo_b, violazione_b):
+    """
+    Confronto di Deb: ammissibile batte non ammissibile, tra ammissibili vince
+    l'obiettivo maggiore, tra non ammissibili la violazione minore
+    """
+    return np.where(
+        (violazione_a == 0) & (violazione_b == 0), obiettivo_a > obiettivo_b, violazione_a < violazione_b
+    )
+
+
+def default_variables(params):
+    """
+    Variabili decisionali senza finanziamento (mutuo fisso) per params
+
+    Returns:
+        dict: VARIABILI_DEFAULT senza VARIABILI_MUTUO e senza costo_ristrutturazione se
+        costo_acquisto non è inserito (vedi optimize_investment)
+    """
+    return {
+        chiave: limiti for chiave, limiti in VARIABILI_DEFAULT.items()
+        if chiave not in VARIABILI_MUTUO
+        and (chiave != 'costo_ristrutturazione' or params.get('costo_acquisto', 0) > 0)
+    }
+
+
+def financing_variables(params):
+    """
+    Variabili decisionali per ottimizzare il finanziamento con tasso_mutuo_perc
+
+    Returns:
+        dict: default_variables(params) con debito_residuo_mutuo fino a
+        QUOTA_FINANZIABILE_MASSIMA dell'investimento iniziale e anni_restanti_mutuo (la
+        rata è calcolata)
+    """
+    investimento = float(_investimento_iniziale(params_to_batch([params]))[0])
+    variabili = {
+        'debito_residuo_mutuo': (0.0, max(investimento, 0.0) * QUOTA_FINANZIABILE_MASSIMA / 100),
+        'anni_restanti_mutuo': VARIABILI_DEFAULT['anni_restanti_mutuo'],
+    }
+    variabili.update(default_variables(params))
+    return variabili
+
+
+def optimize_investment(params, variabili=None, metrica=METRICA_DEFAULT, vincoli=None, tasso_mutuo_perc=TASSO_MUTUO_DEFAULT,
+                        popolazione=POPOLAZIONE_DEFAULT, generazioni=GENERAZIONI_DEFAULT, seed=0):
+    """
+    Massimizza una metrica su più variabili decisionali con evoluzione differenziale
+
+    Ogni generazione costruisce i candidati di prova (mutazione DE/rand/1 e incrocio
+    binomiale) e li valuta tutti insieme con una chiamata al motore vettoriale; le
+    variabili intere (anni) sono arrotondate. I vincoli sono gestiti con le regole di
+    Deb, senza penalità da tarare.
+
+    costo_ristrutturazione è ottimizzabile solo con costo_acquisto > 0: altrimenti il
+    motore calcola l'investimento sul valore dell'immobile e la metrica salta tra i rami.
+    Le variabili di default (default_variables) la escludono in quel caso; indicata
+    esplicitamente è un errore.
+
+    Con tasso_mutuo_perc la struttura del finanziamento si ottimizza su debito e durata:
+    la rata di ogni candidato è quella che ammortizza debito_residuo_mutuo al tasso dato
+    in anni_restanti_mutuo anni (limiti di default in financing_variables). Il TIR del
+    motore non include l'incasso del mutuo, quindi per valutare la leva la metrica adatta
+    è il ROE. È il modo di default; con tasso_mutuo_perc=None il mutuo resta quello di
+    params (variabili di default: default_variables).
+
+    Args:
+        params: Dizionario params scalare; le chiavi non in variabili restano fisse
+        variabili: Dizionario chiave params -> (minimo, massimo); default
+            financing_variables(params), o default_variables(params) senza tasso
+        metrica: Metrica da massimizzare, una di METRICHE_OTTIMIZZAZIONE
+        vincoli: Dizionario grandezza -> (minimo o None, massimo o None) su metriche dei
+            risultati o 'rata_su_affitto_perc'; default VINCOLI_DEFAULT
+        tasso_mutuo_perc: Tasso annuo nominale del mutuo (percentuale) da cui ricavare la
+            rata; None = rata_mutuo_mensile fissa o variabile decisionale esplicita
+        popolazione: Candidati per generazione
+        generazioni: Numero di generazioni
+        seed: Seme del generatore casuale
+
+    Returns:
+        dict: 'params' (params ottimali), 'valore' (metrica ottimale, None se nessun
+        candidato ammissibile), 'ammissibile', 'storia' (miglior valore ammissibile per
+        generazione, NaN finché non ce n'è uno) e 'valutazioni' (scenari valutati)
+    """
+    if variabili is None:
+        variabili = financing_variables(params) if tasso_mutuo_perc is not None else default_variables(params)
+    variabili = dict(variabili)
+    vincoli = VINCOLI_DEFAULT if vincoli is None else vincoli
+    if metrica not in METRICHE_OTTIMIZZAZIONE:
+        raise ValueError(f"Metrica non ottimizzabile: {metrica}")
+    for chiave in variabili:
+        if chiave not in CHIAVI_NUMERICHE:
+            raise KeyError(chiave)
+    if popolazione < 4:
+        raise ValueError("La popolazione deve contenere almeno 4 candidati")
+    if 'costo_ristrutturazione' in variabili and not params.get('costo_acquisto', 0) > 0:
+        raise ValueError("costo_ristrutturazione è ottimizzabile solo con costo_acquisto > 0")
+    if tasso_mutuo_perc is not None and 'rata_mutuo_mensile' in variabili:
+        raise ValueError("Con tasso_mutuo_perc la rata è calcolata e non può essere una variabile")
+
+    chiavi = list(variabili)
+    minimi = np.array([variabili[chiave][0] for chiave in chiavi], dtype=float)
+    massimi = np.array([variabili[chiave][1] for chiave in chiavi], dtype=float)
+    intere = np.array([chiave in CHIAVI_INTERE for chiave in chiavi])
+    base = params_to_batch([params])
+    generatore = np.random.default_rng(seed)
+
+    def valuta(vettori):
+        vettori = np.where(intere, np.rint(vettori), vettori)
+        candidati = {chiave: np.repeat(valore, len(vettori)) for chiave, valore in base.items()}
+        for j, chiave in enumerate(chiavi):
+            candidati[chiave] = vettori[:, j].astype(int) if intere[j] else vettori[:, j]
+        if tasso_mutuo_perc is not None:
+            candidati['rata_mutuo_mensile'] = calculate_payment(
+                candidati['debito_residuo_mutuo'], tasso_mutuo_perc / 1200, 12 * candidati['anni_restanti_mutuo']
+            )
+        risultati = calculate_real_estate_investment_batch(candidati)
+        obiettivo = np.where(np.isnan(risultati[metrica]), -np.inf, risultati[metrica])
+        return vettori, obiettivo, _violazione(candidati, risultati, vincoli)
+
+    # Popolazione iniziale uniforme; il candidato 0 è lo scenario corrente (se nei limiti)
+    vettori = minimi + generatore.random((popolazione, len(chiavi))) * (massimi - minimi)
+    vettori[0] = np.clip([float(base[chiave][0]) for chiave in chiavi], minimi, massimi)
+    vettori, obiettivo, violazione = valuta(vettori)
+    valutazioni = popolazione
+    storia = []
+    indici = np.arange(popolazione)
+    for _ in range(generazioni):
+        # DE/rand/1: tre individui distinti e diversi dal bersaglio
+        scelte = np.argsort(generatore.random((popolazione, popolazione - 1)), axis=1)[:, :3]
+        scelte += scelte >= indici[:, None]
+        mutanti = vettori[scelte[:, 0]] + FATTORE_MUTAZIONE * (vettori[scelte[:, 1]] - vettori[scelte[:, 2]])
+        incrocio = generatore.random(vettori.shape) < PROBABILITA_INCROCIO
+        incrocio[indici, generatore.integers(0, len(chiavi), popolazione)] = True
+        prove = np.clip(np.where(incrocio, mutanti, vettori), minimi, massimi)
+
+        prove, obiettivo_prove, violazione_prove = valuta(prove)
+        valutazioni += popolazione
+        sostituisci = _migliore(obiettivo_prove, violazione_prove, obiettivo, violazione)
+        vettori = np.where(sostituisci[:, None], prove, vettori)
+        obiettivo = np.where(sostituisci, obiettivo_prove, obiettivo)
+        violazione = np.where(sostituisci, violazione_prove, violazione)
+        ammissibili = violazione == 0
+        storia.append(float(obiettivo[ammissibili].max()) if ammissibili.any() else np.nan)
+
+    ammissibili = violazione == 0
+    if ammissibili.any():
+        migliore = int(np.argmax(np.where(ammissibili, obiettivo, -np.inf)))
+    else:
+        migliore = int(np.argmin(violazione))
+    ottimo = dict(params)
+    for j, chiave in enumerate(chiavi):
+        ottimo[chiave] = int(vettori[migliore, j]) if intere[j] else float(vettori[migliore, j])
+    if tasso_mutuo_perc is not None:
+        ottimo['rata_mutuo_mensile'] = float(calculate_payment(
+            ottimo.get('debito_residuo_mutuo', 0), tasso_mutuo_perc / 1200, 12 * ottimo['anni_restanti_mutuo']
+        ))
+    valore = float(obiettivo[migliore])
+    return {
+        'params': ottimo,
+        'valore': valore if bool(ammissibili[migliore]) and np.isfinite(valore) else None,
+        'ammissibile': bool(ammissibili[migliore]),
+        'storia': storia,
+        'valutazioni': valutazioni,
+    }
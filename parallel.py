@@ -0,0 +1,204 @@
+"""
+Esecuzione su più processi di batch molto grandi (griglie, Monte Carlo, portafogli)
+
+Gli array di input (params normalizzati e percorsi) e quelli dei risultati stanno in
+blocchi multiprocessing.shared_memory: i processi ricevono solo i nomi dei blocchi
+all'avvio e gli estremi [inizio, fine) di ogni compito, leggono le proprie righe e
+scrivono i risultati al loro posto, senza serializzare valori_annuali o
+cash_flows_nominal. Con un solo processo gli stessi blocchi sono valutati in sequenza
+su array ordinari.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from batch import calculate_real_estate_investment_batch, normalize_batch, _scenari_percorsi, CHIAVE_EVENTI
+
+METRICHE_PARALLELE = ('tir_nominale', 'tir_reale', 'cagr_nominale', 'cagr_reale', 'roe_nominale')
+
+# Limite righe x anni di un compito e numero minimo di compiti per processo (i
+# processi che finiscono prima prendono i compiti rimasti)
+MAX_ELEMENTI_BLOCCO = 4_000_000
+BLOCCHI_PER_PROCESSO = 4
+
+# Stato di ciascun processo del pool, impostato da _inizializza
+_STATO = {}
+
+
+def _condiviso(forma, dtype, dati=None):
+    """Crea un blocco di memoria condivisa per un array, con una copia di dati se indicati"""
+    memoria = shared_memory.SharedMemory(create=True, size=max(int(np.prod(forma)) * np.dtype(dtype).itemsize, 1))
+    if dati is not None:
+        np.ndarray(forma, dtype=dtype, buffer=memoria.buf)[...] = dati
+    return memoria
+
+
+def _collega(schema):
+    """Array sui blocchi condivisi descritti da schema (nome -> (blocco, forma, dtype))"""
+    memorie, array = {}, {}
+    for nome, (blocco, forma, dtype) in schema.items():
+        memorie[nome] = shared_memory.SharedMemory(name=blocco)
+        array[nome] = np.ndarray(forma, dtype=dtype, buffer=memorie[nome].buf)
+    return memorie, array
+
+
+def _dati_blocco(ingressi, n, categorie, eventi, inizio, fine):
+    """params_batch e percorsi delle righe [inizio, fine) dagli array di input"""
+    params_batch = {}
+    percorsi = {}
+    for nome, valori in ingressi.items():
+        gruppo, chiave = nome.split('/', 1)
+        if gruppo == 'params':
+            params_batch[chiave] = valori[inizio:fine]
+        else:
+            # Percorsi (anni,) o (1, anni) comuni a tutte le righe
+            percorsi[chiave] = valori[inizio:fine] if valori.ndim == 2 and valori.shape[0] == n else valori
+    params_batch['tipo_adeguamento'] = categorie[params_batch.pop('tipo_adeguamento')]
+    if eventi is not None:
+        if eventi['riga'] is not None:
+            dentro = (eventi['riga'] >= inizio) & (eventi['riga'] < fine)
+            eventi = {campo: valori[dentro] for campo, valori in eventi.items()}
+            eventi['riga'] = eventi['riga'] - inizio
+        percorsi[CHIAVE_EVENTI] = eventi
+    return params_batch, percorsi or None
+
+
+def _scrivi(uscite, risultati, inizio, fine):
+    """Copia i risultati del blocco nelle righe [inizio, fine) delle uscite"""
+    for chiave, destinazione in uscite.items():
+        valori = np.asarray(risultati[chiave])
+        if destinazione.ndim == 2:
+            destinazione[inizio:fine, :valori.shape[1]] = valori
+        else:
+            destinazione[inizio:fine] = valori
+
+
+def _inizializza(schema_ingressi, schema_uscite, n, categorie, eventi):
+    """Initializer del pool: collega i blocchi condivisi una volta per processo"""
+    memorie_ingressi, ingressi = _collega(schema_ingressi)
+    memorie_uscite, uscite = _collega(schema_uscite)
+    _STATO.update({
+        'memorie': {**memorie_ingressi, **{f'uscita/{nome}': memoria for nome, memoria in memorie_uscite.items()}},
+        'ingressi': ingressi,
+        'uscite': uscite,
+        'n': n,
+        'categorie': categorie,
+        'eventi': eventi,
+    })
+
+
+def _valuta(inizio, fine):
+    """Compito del pool: valuta le righe [inizio, fine) e scrive i risultati in memoria condivisa"""
+    params_batch, percorsi = _dati_blocco(
+        _STATO['ingressi'], _STATO['n'], _STATO['categorie'], _STATO['eventi'], inizio, fine)
+    risultati = calculate_real_estate_investment_batch(params_batch, percorsi)
+    _scrivi(_STATO['uscite'], risultati, inizio, fine)
+    return fine - inizio
+
+
+def split_rows(n, anni_max, workers, max_elementi=MAX_ELEMENTI_BLOCCO):
+    """
+    Estremi dei blocchi di righe: almeno BLOCCHI_PER_PROCESSO per processo e ognuno
+    entro max_elementi righe x anni
+
+    Returns:
+        list: Coppie (inizio, fine)
+    """
+    blocchi = max(workers * BLOCCHI_PER_PROCESSO if workers > 1 else 1, -(-n * anni_max // max_elementi))
+    estremi = np.linspace(0, n, min(blocchi, n) + 1).astype(int)
+    return list(zip(estremi[:-1].tolist(), estremi[1:].tolist()))
+
+
+def evaluate_parallel(params_batch, percorsi=None, metriche=METRICHE_PARALLELE, workers=None,
+                      max_elementi=MAX_ELEMENTI_BLOCCO):
+    """
+    batch.calculate_real_estate_investment_batch su più processi con memoria condivisa
+
+    Le righe sono divise in blocchi (split_rows) distribuiti su un pool 'spawn' (i
+    processi importano solo il motore). Le forme dei risultati sono ricavate valutando
+    la sola riga con l'orizzonte più lungo; le serie annuali sono completate con NaN e
+    i flussi di cassa con zeri come nel batch unico, quindi i risultati coincidono.
+
+    Args:
+        params_batch: Come in batch.calculate_real_estate_investment_batch
+        percorsi: Come in batch.calculate_real_estate_investment_batch (eventi inclusi)
+        metriche: Chiavi dei risultati da restituire; None = tutte
+        workers: Processi del pool (None = numero di CPU; 1 = blocchi in sequenza
+            nel processo corrente, senza memoria condivisa)
+        max_elementi: Limite righe x anni di un blocco
+
+    Returns:
+        dict: Chiave -> array con n righe
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    if workers < 1:
+        raise ValueError("workers deve essere almeno 1")
+    p, n = normalize_batch(params_batch, _scenari_percorsi(percorsi))
+    percorsi = dict(percorsi or {})
+    eventi = percorsi.pop(CHIAVE_EVENTI, None)
+    categorie, codici = np.unique(p['tipo_adeguamento'].astype(str), return_inverse=True)
+    categorie = categorie.astype(object)
+
+    ingressi = {f'params/{chiave}': valori for chiave, valori in p.items() if chiave != 'tipo_adeguamento'}
+    ingressi['params/tipo_adeguamento'] = codici.astype(np.intp)
+    ingressi.update({f'percorsi/{chiave}': np.ascontiguousarray(valori, dtype=float) for chiave, valori in percorsi.items()})
+
+    # Riga con l'orizzonte più lungo: dà chiavi, forme e tipi delle uscite
+    campione = int(np.argmax(p['anni_investimento']))
+    risultati_campione = calculate_real_estate_investment_batch(
+        *_dati_blocco(ingressi, n, categorie, eventi, campione, campione + 1))
+    chiavi = list(risultati_campione) if metriche is None else list(metriche)
+    forme = {}
+    for chiave in chiavi:
+        valori = np.asarray(risultati_campione[chiave])
+        forme[chiave] = ((n,) + valori.shape[1:], valori.dtype)
+
+    anni_max = int(p['anni_investimento'].max())
+    blocchi = split_rows(n, anni_max, workers, max_elementi)
+
+    def _riempi(uscite):
+        # Oltre l'orizzonte: NaN nelle serie annuali, zeri nei flussi di cassa (anni_max + 1)
+        for array in uscite.values():
+            array[...] = np.nan if array.ndim == 2 and array.shape[1] == anni_max and array.dtype.kind == 'f' else 0
+
+    if workers == 1 or len(blocchi) == 1:
+        uscite = {chiave: np.empty(forma, dtype=dtype) for chiave, (forma, dtype) in forme.items()}
+        _riempi(uscite)
+        for inizio, fine in blocchi:
+            params_blocco, percorsi_blocco = _dati_blocco(ingressi, n, categorie, eventi, inizio, fine)
+            _scrivi(uscite, calculate_real_estate_investment_batch(params_blocco, percorsi_blocco), inizio, fine)
+        return uscite
+
+    memorie = []
+    uscite = {}
+    try:
+        schema_ingressi = {}
+        for nome, valori in ingressi.items():
+            memoria = _condiviso(valori.shape, valori.dtype, valori)
+            memorie.append(memoria)
+            schema_ingressi[nome] = (memoria.name, valori.shape, valori.dtype.str)
+        schema_uscite = {}
+        for chiave, (forma, dtype) in forme.items():
+            memoria = _condiviso(forma, dtype)
+            memorie.append(memoria)
+            uscite[chiave] = np.ndarray(forma, dtype=dtype, buffer=memoria.buf)
+            schema_uscite[chiave] = (memoria.name, forma, np.dtype(dtype).str)
+        _riempi(uscite)
+
+        contesto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(blocchi)), mp_context=contesto, initializer=_inizializza,
+            initargs=(schema_ingressi, schema_uscite, n, categorie, eventi),
+        ) as pool:
+            inizi, fini = zip(*blocchi)
+            for _ in pool.map(_valuta, inizi, fini):
+                pass
+        # Copia fuori dai blocchi condivisi prima di rilasciarli
+        return {chiave: np.array(array) for chiave, array in uscite.items()}
+    finally:
+        # Le viste sui blocchi vanno rilasciate prima di chiuderli
+        uscite.clear()
+        for memoria in memorie:
+            memoria.close()
+            memoria.unlink()
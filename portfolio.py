@@ -0,0 +1,142 @@
+import numpy as np
+from batch import calculate_real_estate_investment_batch, normalize_batch, params_to_batch, _scenari_percorsi
+from irr import solve_irr_batch, npv_horner, IRR_CONVERGED
+
+# Serie consolidate per anno di calendario
+SERIE_PORTAFOGLIO = (
+    'affitti_netti',
+    'servizio_debito',
+    'valore',
+    'investimenti',
+    'incassi_vendita',
+    'flussi',
+    'immobili_detenuti',
+)
+
+
+def _allinea(serie, colonne, larghezza):
+    """
+    Sposta le serie (n, T) sul calendario comune: la riga i inizia alla colonna
+    colonne[i, 0]; il resto della matrice (n, larghezza) è riempito con zeri
+    """
+    allineate = np.zeros((serie.shape[0], larghezza))
+    allineate[np.arange(serie.shape[0])[:, None], colonne] = serie
+    return allineate
+
+
+def calculate_portfolio_batch(params_batch, anno_acquisto, percorsi=None):
+    """
+    Flussi consolidati di un portafoglio di immobili acquistati in anni diversi
+
+    Ogni immobile è valutato dal motore vettoriale sul proprio orizzonte; i suoi flussi
+    annuali sono poi spostati sul calendario comune (dal primo acquisto all'ultima
+    vendita) in matrici (n, anni di calendario) completate con zeri, e le serie del
+    portafoglio sono le somme per colonna. Gli importi sono nominali: immobili
+    acquistati in anni diversi non hanno un deflatore comune.
+
+    Args:
+        params_batch: Come in batch.calculate_real_estate_investment_batch, un
+            immobile per riga
+        anno_acquisto: Anno di calendario dell'acquisto di ciascun immobile (array (n,)
+            o scalare); la vendita avviene anno_acquisto + anni_investimento
+        percorsi: Come in batch.calculate_real_estate_investment_batch
+
+    Returns:
+        dict: 'calendario' (anni), per ogni nome di SERIE_PORTAFOGLIO la serie
+        consolidata (valore = immobili detenuti a fine anno, incluso l'anno di vendita),
+        'tir_nominale' (percentuale, NaN se non calcolabile), 'tir_status',
+        'cagr_nominale' (decimale), 'investimento_totale', 'rendimento_totale_nominale'
+        e 'contributi' con un array (n,) per immobile: 'tir_nominale',
+        'quota_investimento' e 'quota_rendimento' (percentuali) e 'valore_attuale_netto'
+        (VAN al TIR del portafoglio, scontato al primo anno: positivo se l'immobile
+        alza il TIR complessivo)
+    """
+    p, n = normalize_batch(params_batch, _scenari_percorsi(percorsi))
+    anno_acquisto = np.broadcast_to(np.asarray(anno_acquisto, dtype=int), (n,))
+    risultati = calculate_real_estate_investment_batch(p, percorsi)
+    anni_investimento = p['anni_investimento']
+    righe = np.arange(n)
+
+    # Calendario comune: colonna 0 = primo anno di acquisto
+    inizio = int(anno_acquisto.min())
+    scostamento = anno_acquisto - inizio
+    anni_max = risultati['cash_flows_nominal'].shape[1] - 1
+    colonne = scostamento[:, None] + np.arange(anni_max + 1)[None, :]
+    larghezza = int(scostamento.max()) + anni_max + 1
+    anni_calendario = int((scostamento + anni_investimento).max()) + 1
+
+    # Serie per immobile sugli anni 0..anni_max dalla data di acquisto (zeri fuori orizzonte)
+    detenuto = np.arange(anni_max + 1)[None, :] <= anni_investimento[:, None]
+    annuali = np.zeros((n, anni_max + 1))
+    investimento = risultati['investimento_iniziale_reale']
+    incasso_vendita = risultati['valore_finale_nominale'] - p['commissione_finale']
+    vendita = np.zeros((n, anni_max + 1))
+    vendita[righe, anni_investimento] = incasso_vendita
+    valore = np.where(detenuto, np.concatenate([p['valore_immobile'][:, None], risultati['valori_annuali']], axis=1), 0.0)
+    acquisto = np.zeros((n, anni_max + 1))
+    acquisto[:, 0] = investimento
+
+    def _consolida(serie_annuale):
+        return _allinea(serie_annuale, colonne, larghezza)[:, :anni_calendario]
+
+    annuali[:, 1:] = np.nan_to_num(risultati['affitti_netti_annuali'])
+    affitti_netti = _consolida(annuali).sum(axis=0)
+    annuali[:, 1:] = np.nan_to_num(risultati['costi_mutuo_annuali'])
+    servizio_debito = _consolida(annuali).sum(axis=0)
+    flussi_allineati = _consolida(risultati['cash_flows_nominal'])
+    flussi = flussi_allineati.sum(axis=0)
+
+    soluzione = solve_irr_batch(flussi[None, :])
+    convergente = soluzione['status'][0] == IRR_CONVERGED
+    tir = float(soluzione['irr'][0]) if convergente else np.nan
+
+    # CAGR: multiplo complessivo annualizzato sulla durata media ponderata per l'investimento
+    investimento_totale = float(investimento.sum())
+    valore_finale_totale = float((incasso_vendita + risultati['totale_affitti_netti']).sum())
+    cagr = np.nan
+    if investimento_totale > 0 and valore_finale_totale >= 0:
+        durata_media = float((investimento * anni_investimento).sum()) / investimento_totale
+        cagr = (valore_finale_totale / investimento_totale) ** (1 / durata_media) - 1
+
+    rendimento = risultati['rendimento_totale_nominale']
+    rendimento_totale = float(rendimento.sum())
+    if convergente:
+        valore_attuale_netto, _ = npv_horner(flussi_allineati, np.full(n, tir), derivata=False)
+    else:
+        valore_attuale_netto = np.full(n, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        quota_investimento = investimento / investimento_totale * 100
+        quota_rendimento = rendimento / rendimento_totale * 100
+
+    return {
+        'calendario': np.arange(inizio, inizio + anni_calendario),
+        'affitti_netti': affitti_netti,
+        'servizio_debito': servizio_debito,
+        'valore': _consolida(valore).sum(axis=0),
+        'investimenti': _consolida(acquisto).sum(axis=0),
+        'incassi_vendita': _consolida(vendita).sum(axis=0),
+        'flussi': flussi,
+        'immobili_detenuti': _consolida(detenuto.astype(float)).sum(axis=0).astype(int),
+        'tir_nominale': tir * 100,
+        'tir_status': int(soluzione['status'][0]),
+        'cagr_nominale': cagr,
+        'investimento_totale': investimento_totale,
+        'rendimento_totale_nominale': rendimento_totale,
+        'contributi': {
+            'tir_nominale': risultati['tir_nominale'],
+            'quota_investimento': quota_investimento,
+            'quota_rendimento': quota_rendimento,
+            'valore_attuale_netto': valore_attuale_netto,
+        },
+    }
+
+
+def calculate_portfolio(lista_params, anni_acquisto):
+    """
+    Versione di calculate_portfolio_batch per una lista di dizionari params
+
+    Args:
+        lista_params: Lista di dizionari params, uno per immobile
+        anni_acquisto: Lista degli anni di acquisto, nello stesso ordine
+    """
+    return calculate_portfolio_batch(params_to_batch(lista_params), anni_acquisto)
@@ -0,0 +1,226 @@
+"""
+Strumentazione leggera: span temporizzati e contatori
+
+Due modi di raccolta, indipendenti:
+- processo: con la variabile d'ambiente IMMOBILIARE_PROFILING (diversa da '' e '0')
+  tutte le misure del processo vanno nella raccolta globale (reset, snapshot) e ogni
+  span e contatore è scritto come riga JSON su stderr dal logger immobiliare.profiling
+  (span a INFO, contatori a DEBUG; vedi configure_logging);
+- sessione: dentro collecting(raccolta) le misure del contesto corrente (un thread di
+  esecuzione di Streamlit) vanno anche nella Collector indicata, senza toccare le
+  altre sessioni né il flag di processo.
+"""
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+# Logger delle righe JSON (una per span o incremento di contatore)
+logger = logging.getLogger('immobiliare.profiling')
+
+# Numero di span recenti conservati per il pannello di debug
+SPAN_RECENTI = 200
+
+# Flag di processo: impostato solo dalla variabile d'ambiente
+_abilitato = os.environ.get('IMMOBILIARE_PROFILING', '') not in ('', '0')
+
+# Raccolta della sessione corrente (None = nessuna)
+_sessione = contextvars.ContextVar('immobiliare_profiling_sessione', default=None)
+
+
+class Collector:
+    """Misure raccolte: statistiche degli span, contatori e storico recente"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._statistiche = {}
+        self._contatori = {}
+        self._recenti = deque(maxlen=SPAN_RECENTI)
+
+    def record_span(self, nome, durata):
+        with self._lock:
+            statistica = self._statistiche.get(nome)
+            if statistica is None:
+                statistica = self._statistiche[nome] = {'chiamate': 0, 'totale_s': 0.0, 'massimo_s': 0.0}
+            statistica['chiamate'] += 1
+            statistica['totale_s'] += durata
+            statistica['massimo_s'] = max(statistica['massimo_s'], durata)
+            self._recenti.append((nome, durata))
+
+    def increment(self, nome, quantita=1):
+        with self._lock:
+            self._contatori[nome] = self._contatori.get(nome, 0) + quantita
+
+    def reset(self):
+        """Azzera span, contatori e storico recente"""
+        with self._lock:
+            self._statistiche.clear()
+            self._contatori.clear()
+            self._recenti.clear()
+
+    def snapshot(self):
+        """
+        Copia dello stato corrente per il pannello di debug
+
+        Returns:
+            dict: 'span' (nome -> chiamate, totale_ms, media_ms, massimo_ms),
+            'contatori' e 'recenti' (lista di (nome, durata_ms), dal più recente)
+        """
+        with self._lock:
+            spans = {
+                nome: {
+                    'chiamate': statistica['chiamate'],
+                    'totale_ms': statistica['totale_s'] * 1000,
+                    'media_ms': statistica['totale_s'] * 1000 / statistica['chiamate'],
+                    'massimo_ms': statistica['massimo_s'] * 1000,
+                }
+                for nome, statistica in self._statistiche.items()
+            }
+            return {
+                'span': spans,
+                'contatori': dict(self._contatori),
+                'recenti': [(nome, durata * 1000) for nome, durata in reversed(self._recenti)],
+            }
+
+
+# Raccolta di processo, alimentata solo con IMMOBILIARE_PROFILING
+_globale = Collector()
+
+
+def configure_logging(stream=None):
+    """
+    Scrive le righe JSON del logger immobiliare.profiling su stream (default stderr)
+
+    Aggiunge un StreamHandler con il solo messaggio e porta il logger a DEBUG (span e
+    contatori); non fa nulla se il logger ha già un handler, così una configurazione
+    esplicita del logging dell'applicazione ha la precedenza.
+    """
+    if logger.handlers:
+        return
+    gestore = logging.StreamHandler(stream or sys.stderr)
+    gestore.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(gestore)
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+
+
+if _abilitato:
+    configure_logging()
+
+
+def is_enabled():
+    """True se le misure del contesto corrente sono raccolte (processo o sessione)"""
+    return _abilitato or _sessione.get() is not None
+
+
+@contextlib.contextmanager
+def collecting(raccolta):
+    """
+    Raccoglie in raccolta le misure del contesto corrente per la durata del blocco
+
+    Con raccolta None il blocco non raccoglie nulla oltre alla raccolta di processo.
+    """
+    token = _sessione.set(raccolta)
+    try:
+        yield raccolta
+    finally:
+        _sessione.reset(token)
+
+
+def reset():
+    """Azzera la raccolta di processo"""
+    _globale.reset()
+
+
+def snapshot():
+    """Copia della raccolta di processo (vedi Collector.snapshot)"""
+    return _globale.snapshot()
+
+
+def record_span(nome, durata):
+    """Registra la durata (s) di uno span ed emette la riga di log JSON"""
+    if _abilitato:
+        _globale.record_span(nome, durata)
+    raccolta = _sessione.get()
+    if raccolta is not None:
+        raccolta.record_span(nome, durata)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({'evento': 'span', 'nome': nome, 'durata_ms': round(durata * 1000, 4)}))
+
+
+def increment(nome, quantita=1):
+    """Incrementa un contatore (senza effetto se la strumentazione è disabilitata)"""
+    raccolta = _sessione.get()
+    if not _abilitato and raccolta is None:
+        return
+    if _abilitato:
+        _globale.increment(nome, quantita)
+    if raccolta is not None:
+        raccolta.increment(nome, quantita)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps({'evento': 'contatore', 'nome': nome, 'incremento': quantita}))
+
+
+class span:
+    """
+    Context manager che misura un blocco di codice
+
+    Con la strumentazione disabilitata costa solo il controllo dei flag.
+    """
+    __slots__ = ('nome', 'inizio')
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.inizio = None
+
+    def __enter__(self):
+        if _abilitato or _sessione.get() is not None:
+            self.inizio = time.perf_counter()
+        return self
+
+    def __exit__(self, *eccezione):
+        if self.inizio is not None:
+            record_span(self.nome, time.perf_counter() - self.inizio)
+        return False
+
+
+def profiled(nome):
+    """Decoratore: registra ogni chiamata della funzione come span nome"""
+    def decoratore(funzione):
+        @functools.wraps(funzione)
+        def wrapper(*args, **kwargs):
+            if not _abilitato and _sessione.get() is None:
+                return funzione(*args, **kwargs)
+            inizio = time.perf_counter()
+            try:
+                return funzione(*args, **kwargs)
+            finally:
+                record_span(nome, time.perf_counter() - inizio)
+        return wrapper
+    return decoratore
+
+
+class SectionTimer:
+    """
+    Misura sezioni consecutive di una funzione lunga senza reindentarla
+
+    Ogni chiamata a tappa(sezione) registra lo span prefisso.sezione con il tempo
+    trascorso dalla tappa precedente (o dalla creazione).
+    """
+
+    def __init__(self, prefisso):
+        self.prefisso = prefisso
+        self.ultimo = time.perf_counter() if is_enabled() else None
+
+    def tappa(self, sezione):
+        if self.ultimo is None:
+            return
+        adesso = time.perf_counter()
+        record_span(f'{self.prefisso}.{sezione}', adesso - self.ultimo)
+        self.ultimo = adesso
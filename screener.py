@@ -0,0 +1,179 @@
+"""
+Selezione degli annunci migliori da un file di annunci immobiliari (CSV o Parquet)
+
+Ogni riga è un annuncio con prezzo, affitto mensile stimato, città e superficie; gli
+altri parametri del modello vengono dai valori di default (sovrascrivibili con un file
+JSON o con colonne params nel file). Il file è letto a blocchi e solo i migliori k
+annunci restano in memoria.
+
+Esempio:
+    python screener.py annunci.csv migliori.csv --top 100 --metric tir_nominale --defaults ipotesi.json
+"""
+import argparse
+import heapq
+import json
+import sys
+import numpy as np
+import pandas as pd
+from core import calculate_real_estate_investment_batch, CHIAVI_NUMERICHE, CHIAVI_INTERE
+from tables import read_chunks, CHUNK_SIZE_DEFAULT
+
+# Colonne dell'annuncio (città e superficie sono facoltative, riportate nei risultati)
+COLONNA_PREZZO = 'prezzo'
+COLONNA_AFFITTO = 'affitto_mensile'
+COLONNA_CITTA = 'citta'
+COLONNA_SUPERFICIE = 'superficie_mq'
+
+# Ipotesi per i parametri non presenti nell'annuncio (gli stessi default del modulo)
+PARAMS_DEFAULT_ANNUNCI = {
+    'rivalutazione_annua': 2.0,
+    'anni_investimento': 10,
+    'costi_assicurazione_euro': 250.0,
+    'costi_gestione_euro': 250.0,
+    'rata_mutuo_mensile': 0.0,
+    'anni_restanti_mutuo': 0,
+    'debito_residuo_mutuo': 0.0,
+    'manutenzione_straordinaria_perc': 1.0,
+    'tassazione_affitti_perc': 21.0,
+    'tassa_catastale_perc': 0.8,
+    'periodo_sfitto_perc': 5.0,
+    'inflazione_perc': 2.0,
+    'adeguamento_affitto_anni': 4,
+    'tipo_adeguamento': "Inflazione",
+    'commissione_iniziale': 0.0,
+    'commissione_finale': 0.0,
+}
+
+METRICHE_SELEZIONE = ('tir_nominale', 'tir_reale', 'cagr_nominale', 'cagr_reale', 'roe_nominale', 'roe_reale')
+
+TOP_DEFAULT = 100
+
+
+def listings_to_batch(blocco, valori_default=None):
+    """
+    Parametri del modello per un blocco di annunci
+
+    Il prezzo è sia il valore dell'immobile sia il costo di acquisto; le colonne del
+    blocco con il nome di una chiave params prevalgono sui valori di default.
+
+    Args:
+        blocco: DataFrame di annunci con almeno COLONNA_PREZZO e COLONNA_AFFITTO
+        valori_default: Dizionario che aggiorna PARAMS_DEFAULT_ANNUNCI
+
+    Raises:
+        ValueError: Se mancano le colonne di prezzo o affitto
+    """
+    mancanti = [colonna for colonna in (COLONNA_PREZZO, COLONNA_AFFITTO) if colonna not in blocco.columns]
+    if mancanti:
+        raise ValueError(f"Colonne mancanti nel file degli annunci: {', '.join(mancanti)}")
+    default = {**PARAMS_DEFAULT_ANNUNCI, **(valori_default or {})}
+    prezzo = blocco[COLONNA_PREZZO].to_numpy(dtype=float)
+    params_batch = {
+        'valore_immobile': prezzo,
+        'costo_acquisto': prezzo,
+        'costo_ristrutturazione': 0.0,
+        'affitto_lordo': blocco[COLONNA_AFFITTO].to_numpy(dtype=float) * 12,
+    }
+    for chiave in CHIAVI_NUMERICHE + ('tipo_adeguamento',):
+        if chiave in blocco.columns:
+            tipo = object if chiave == 'tipo_adeguamento' else (int if chiave in CHIAVI_INTERE else float)
+            params_batch[chiave] = blocco[chiave].to_numpy(dtype=tipo)
+        elif chiave not in params_batch:
+            params_batch[chiave] = default[chiave]
+    return params_batch
+
+
+def _riga_risultato(blocco, risultati, indice):
+    """Colonne dell'annuncio indice con indicatori e metriche"""
+    riga = blocco.iloc[indice].to_dict()
+    prezzo = riga[COLONNA_PREZZO]
+    superficie = riga.get(COLONNA_SUPERFICIE)
+    riga['prezzo_mq'] = prezzo / superficie if superficie else np.nan
+    riga['rendimento_lordo_perc'] = riga[COLONNA_AFFITTO] * 12 / prezzo * 100 if prezzo > 0 else np.nan
+    for metrica in METRICHE_SELEZIONE:
+        riga[metrica] = float(np.broadcast_to(risultati[metrica], len(blocco))[indice])
+    return riga
+
+
+def screen_chunks(blocchi, k=TOP_DEFAULT, metrica='tir_nominale', valori_default=None):
+    """
+    Migliori k annunci per metrica da una sequenza di blocchi
+
+    Ogni blocco è valutato con il motore vettoriale; i suoi k migliori (argpartition)
+    entrano in un heap di dimensione k, quindi la memoria non dipende dal numero di
+    annunci. Gli annunci senza prezzo o con metrica non calcolabile sono scartati; a parità di
+    metrica prevale quello letto prima. I TIR sono risolti senza fallback fsolve.
+
+    Args:
+        blocchi: Iterabile di DataFrame di annunci
+        k: Numero di annunci da tenere
+        metrica: Una di METRICHE_SELEZIONE
+        valori_default: Come in listings_to_batch
+
+    Returns:
+        tuple: (DataFrame dei migliori k in ordine decrescente con le colonne
+        dell'annuncio, 'prezzo_mq', 'rendimento_lordo_perc' e METRICHE_SELEZIONE;
+        numero di annunci valutati)
+    """
+    if metrica not in METRICHE_SELEZIONE:
+        raise ValueError(f"Metrica di selezione non valida: {metrica}")
+    if k < 1:
+        raise ValueError("k deve essere almeno 1")
+    migliori = []
+    letti = 0
+    posizione = 0
+    for blocco in blocchi:
+        letti += len(blocco)
+        # Annunci senza prezzo: nessun investimento da valutare
+        blocco = blocco[blocco[COLONNA_PREZZO] > 0].reset_index(drop=True) if COLONNA_PREZZO in blocco.columns else blocco
+        risultati = calculate_real_estate_investment_batch(listings_to_batch(blocco, valori_default), fallback_irr=False)
+        valori = np.broadcast_to(risultati[metrica], len(blocco))
+        candidati = np.flatnonzero(np.isfinite(valori))
+        if candidati.size > k:
+            candidati = candidati[np.argpartition(valori[candidati], -k)[-k:]]
+        for indice in candidati:
+            # Il secondo elemento favorisce l'annuncio letto prima a parità di metrica
+            voce = (float(valori[indice]), -(posizione + int(indice)))
+            if len(migliori) < k:
+                heapq.heappush(migliori, voce + (_riga_risultato(blocco, risultati, indice),))
+            elif voce > migliori[0][:2]:
+                heapq.heapreplace(migliori, voce + (_riga_risultato(blocco, risultati, indice),))
+        posizione += len(blocco)
+
+    righe = [riga for _, _, riga in sorted(migliori, key=lambda voce: voce[:2], reverse=True)]
+    return pd.DataFrame(righe), letti
+
+
+def screen_file(input_path, k=TOP_DEFAULT, metrica='tir_nominale', valori_default=None, chunk_size=CHUNK_SIZE_DEFAULT):
+    """Come screen_chunks, leggendo il file degli annunci a blocchi"""
+    return screen_chunks(read_chunks(input_path, chunk_size), k, metrica, valori_default)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migliori annunci immobiliari per TIR, CAGR o ROE")
+    parser.add_argument('input', help="File degli annunci (.csv o .parquet)")
+    parser.add_argument('output', help="File dei migliori annunci (.csv)")
+    parser.add_argument('--top', type=int, default=TOP_DEFAULT, help="Numero di annunci da tenere")
+    parser.add_argument('--metric', choices=METRICHE_SELEZIONE, default='tir_nominale', help="Metrica di ordinamento")
+    parser.add_argument('--defaults', help="File JSON con i valori di default dei parametri")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE_DEFAULT, help="Annunci valutati per blocco")
+    args = parser.parse_args(argv)
+    if args.top < 1 or args.chunk_size < 1:
+        parser.error("--top e --chunk-size devono essere almeno 1")
+
+    try:
+        valori_default = None
+        if args.defaults:
+            with open(args.defaults) as file:
+                valori_default = json.load(file)
+        migliori, letti = screen_file(args.input, args.top, args.metric, valori_default, args.chunk_size)
+        migliori.to_csv(args.output, index=False)
+    except (ValueError, OSError, ImportError) as e:
+        print(f"Errore: {e}", file=sys.stderr)
+        return 1
+    print(f"{letti} annunci valutati, {len(migliori)} migliori -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import numpy as np
+from batch import calculate_real_estate_investment_batch, params_to_batch, CHIAVI_NUMERICHE, CHIAVI_INTERE
+
+# Parametri perturbati di default: tutti gli input numerici della UI
+PARAMETRI_SENSIBILITA = CHIAVI_NUMERICHE
+
+METRICHE_SENSIBILITA = ('tir_nominale', 'tir_reale', 'cagr_nominale', 'cagr_reale', 'roe_nominale')
+
+# Valori minimi ammessi per i parametri interi
+MINIMI_INTERI = {'anni_investimento': 1, 'adeguamento_affitto_anni': 1, 'anni_restanti_mutuo': 0}
+
+
+def _valori_perturbati(chiave, valore, variazione_perc):
+    """Valori basso/alto del parametro; gli interi si spostano di almeno un'unità"""
+    delta = abs(valore) * variazione_perc / 100
+    if chiave in CHIAVI_INTERE:
+        delta = max(round(delta), 1)
+        return max(valore - delta, MINIMI_INTERI.get(chiave, 0)), valore + delta
+    return valore - delta, valore + delta
+
+
+def tornado_analysis(params, variazione_perc=10, chiavi=PARAMETRI_SENSIBILITA, metriche=METRICHE_SENSIBILITA):
+    """
+    Analisi di sensibilità a tornado: ogni parametro è variato di ±variazione_perc
+
+    Lo scenario base e tutti i 2 x N scenari perturbati sono costruiti come un unico
+    batch e valutati in un solo passaggio. I parametri con valore 0 sono esclusi
+    (una variazione percentuale non li modifica).
+
+    Args:
+        params: Dizionario params scalare
+        variazione_perc: Variazione percentuale applicata a ciascun parametro
+        chiavi: Parametri da perturbare
+        metriche: Metriche dei risultati da confrontare
+
+    Returns:
+        dict: 'base' (metrica -> valore dello scenario base) e 'classifiche'
+        (metrica -> lista di dict ordinata per impatto decrescente con chiave,
+        valore_basso, valore_alto, metrica_basso, metrica_alto, impatto)
+    """
+    chiavi = [chiave for chiave in chiavi if params.get(chiave, 0) != 0]
+    scenari = [dict(params)]
+    perturbazioni = []
+    for chiave in chiavi:
+        basso, alto = _valori_perturbati(chiave, params[chiave], variazione_perc)
+        perturbazioni.append((chiave, basso, alto))
+        scenari.append(dict(params, **{chiave: basso}))
+    for chiave, basso, alto in perturbazioni:
+        scenari.append(dict(params, **{chiave: alto}))
+
+    risultati = calculate_real_estate_investment_batch(params_to_batch(scenari))
+    n = len(perturbazioni)
+
+    base = {metrica: float(risultati[metrica][0]) for metrica in metriche}
+    classifiche = {}
+    for metrica in metriche:
+        valori = risultati[metrica]
+        bassi, alti = valori[1:n + 1], valori[n + 1:]
+        impatti = np.abs(alti - bassi)
+        # Impatto non calcolabile (TIR N/A) in fondo alla classifica
+        ordine = np.argsort(np.where(np.isnan(impatti), -np.inf, impatti))[::-1]
+        classifiche[metrica] = [
+            {
+                'chiave': perturbazioni[i][0],
+                'valore_basso': perturbazioni[i][1],
+                'valore_alto': perturbazioni[i][2],
+                'metrica_basso': float(bassi[i]),
+                'metrica_alto': float(alti[i]),
+                'impatto': float(impatti[i]),
+            }
+            for i in ordine
+        ]
+    return {'base': base, 'classifiche': classifiche, 'variazione_perc': variazione_perc}
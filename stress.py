@@ -0,0 +1,206 @@
+"""
+Prove di stress: scenari di shock con nome applicati a uno o più immobili
+
+Ogni shock è una variazione dei parametri params e/o dei percorsi annuali del motore
+(rivalutazione, inflazione, sfitto); tutte le combinazioni shock x immobile sono
+valutate in un'unica chiamata al motore vettoriale.
+
+Esempio:
+    python stress.py portafoglio.csv stress_tir.csv --metric tir_nominale
+"""
+import sys
+import numpy as np
+from batch import calculate_real_estate_investment_batch, normalize_batch, CHIAVI_PERCORSO, CHIAVI_INTERE
+from mortgage import calculate_payment, implied_rate_batch
+
+MODI_SHOCK = ('imposta', 'somma', 'scala', 'composto')
+
+# Libreria degli shock. 'params': chiave -> (modo, valore) sul parametro costante;
+# 'percorsi': chiave di CHIAVI_PERCORSO -> (modo, valore, primo anno, ultimo anno),
+# anni da 1 e inclusi; 'tasso_mutuo_bp': variazione del tasso del mutuo in punti base.
+# Modi: 'imposta' sostituisce, 'somma' aggiunge, 'scala' varia un importo del v%,
+# 'composto' applica v% al fattore di crescita di un tasso ((1 + x)(1 + v) - 1)
+SCENARI_STRESS = {
+    'tassi_+300bp': {'tasso_mutuo_bp': 300},
+    'prezzi_-20%_anno_3': {'percorsi': {'rivalutazione_annua': ('composto', -20.0, 3, 3)}},
+    'sfitto_25%_2_anni': {'percorsi': {'periodo_sfitto_perc': ('imposta', 25.0, 1, 2)}},
+    'inflazione_8%': {'percorsi': {'inflazione_perc': ('imposta', 8.0, 1, 2)}},
+    'costi_gestione_+30%': {'params': {'costi_gestione_euro': ('scala', 30.0)}},
+    'stagflazione': {
+        'tasso_mutuo_bp': 200,
+        'percorsi': {
+            'rivalutazione_annua': ('imposta', -5.0, 1, 3),
+            'inflazione_perc': ('imposta', 8.0, 1, 3),
+            'periodo_sfitto_perc': ('somma', 10.0, 1, 3),
+        },
+    },
+}
+
+METRICHE_STRESS = ('tir_nominale', 'tir_reale', 'cagr_nominale', 'cagr_reale', 'roe_nominale')
+
+
+def _applica(valori, modo, valore):
+    """Applica uno shock ai valori (array di importi o di percentuali)"""
+    if modo == 'imposta':
+        return np.full_like(valori, valore, dtype=float)
+    if modo == 'somma':
+        return valori + valore
+    if modo == 'scala':
+        return valori * (1 + valore / 100)
+    if modo == 'composto':
+        return ((1 + valori / 100) * (1 + valore / 100) - 1) * 100
+    raise ValueError(f"Modo di shock non supportato: {modo}. Valori ammessi: {MODI_SHOCK}")
+
+
+def _rata_con_shock(p, punti_base):
+    """
+    Rata ricalcolata con il tasso implicito del mutuo aumentato di punti_base
+
+    Returns:
+        tuple: (rata, non_applicato): non_applicato indica i mutui in corso il cui tasso
+        non è determinabile (debito_residuo_mutuo assente o incoerente con la rata),
+        dove lo shock non può essere applicato; senza mutuo la rata resta invariata
+    """
+    mesi = 12 * p['anni_restanti_mutuo']
+    con_mutuo = (p['rata_mutuo_mensile'] > 0) & (mesi > 0)
+    con_debito = con_mutuo & (p['debito_residuo_mutuo'] > 0)
+    tasso = np.full(len(mesi), np.nan)
+    if con_debito.any():
+        tasso[con_debito] = implied_rate_batch(
+            p['debito_residuo_mutuo'][con_debito], p['rata_mutuo_mensile'][con_debito], mesi[con_debito]
+        )
+    determinato = con_debito & np.isfinite(tasso)
+    with np.errstate(invalid='ignore'):
+        nuova = calculate_payment(p['debito_residuo_mutuo'], (tasso + punti_base / 100) / 1200, mesi)
+    return np.where(determinato, nuova, p['rata_mutuo_mensile']), con_mutuo & ~determinato
+
+
+def shock_batch(p, n, shock):
+    """
+    Parametri e percorsi di n immobili dopo uno shock
+
+    Args:
+        p: Dizionario normalizzato da batch.normalize_batch
+        n: Numero di immobili
+        shock: Specifica come i valori di SCENARI_STRESS
+
+    Returns:
+        tuple: (params_batch, percorsi (n, anni) di CHIAVI_PERCORSO o None,
+        non_applicato (n,): righe dove lo shock sui tassi non è applicabile)
+    """
+    q = dict(p)
+    for chiave, (modo, valore) in shock.get('params', {}).items():
+        nuovo = _applica(p[chiave].astype(float), modo, valore)
+        q[chiave] = np.rint(nuovo).astype(int) if chiave in CHIAVI_INTERE else nuovo
+    non_applicato = np.zeros(n, dtype=bool)
+    if shock.get('tasso_mutuo_bp'):
+        q['rata_mutuo_mensile'], non_applicato = _rata_con_shock(q, shock['tasso_mutuo_bp'])
+
+    variazioni = shock.get('percorsi', {})
+    if not variazioni:
+        return q, None, non_applicato
+    anni_max = int(q['anni_investimento'].max())
+    percorsi = {}
+    for chiave in CHIAVI_PERCORSO:
+        base = np.repeat(q[chiave].astype(float)[:, None], anni_max, axis=1)
+        if chiave in variazioni:
+            modo, valore, primo, ultimo = variazioni[chiave]
+            colonne = slice(primo - 1, min(ultimo, anni_max))
+            base[:, colonne] = _applica(base[:, colonne], modo, valore)
+        percorsi[chiave] = base
+    return q, percorsi, non_applicato
+
+
+def stress_test_batch(params_batch, scenari=None, metriche=METRICHE_STRESS):
+    """
+    Matrice shock x immobile delle variazioni delle metriche rispetto allo scenario base
+
+    Gli scenari sono impilati (base + uno per shock, n righe ciascuno) e valutati con
+    una sola chiamata al motore vettoriale; gli shock senza percorsi usano i valori
+    costanti di params come percorso. Gli shock sui tassi richiedono
+    debito_residuo_mutuo: per i mutui in corso senza debito valori e delta sono NaN.
+
+    Args:
+        params_batch: Come in batch.calculate_real_estate_investment_batch, un
+            immobile per riga
+        scenari: Nomi di SCENARI_STRESS o dizionario nome -> specifica; default tutti
+        metriche: Metriche da riportare
+
+    Returns:
+        dict: 'scenari' (nomi), 'base' (metrica -> (n,)), 'valori' e 'delta'
+        (metrica -> matrice (shock, n), delta = valore stressato - base; CAGR decimale,
+        TIR e ROE in percentuale) e 'non_applicato' (matrice (shock, n) booleana)
+    """
+    if scenari is None:
+        scenari = SCENARI_STRESS
+    elif not isinstance(scenari, dict):
+        mancanti = [nome for nome in scenari if nome not in SCENARI_STRESS]
+        if mancanti:
+            raise ValueError(f"Shock non definiti: {', '.join(mancanti)}")
+        scenari = {nome: SCENARI_STRESS[nome] for nome in scenari}
+    p, n = normalize_batch(params_batch)
+    anni_max = int(p['anni_investimento'].max())
+
+    # Blocco 0 = base, blocco k = shock k; i percorsi coprono tutti i blocchi
+    shockati = [shock_batch(p, n, shock) for shock in scenari.values()]
+    non_applicato = np.array([esclusi for _, _, esclusi in shockati], dtype=bool).reshape(len(shockati), n)
+    blocchi = [(p, None)] + [(q, percorsi_shock) for q, percorsi_shock, _ in shockati]
+    impilati = {chiave: np.concatenate([q[chiave] for q, _ in blocchi]) for chiave in p}
+    percorsi = None
+    if any(percorsi_shock is not None for _, percorsi_shock in blocchi):
+        percorsi = {
+            chiave: np.concatenate([
+                percorsi_shock[chiave] if percorsi_shock is not None
+                else np.repeat(q[chiave].astype(float)[:, None], anni_max, axis=1)
+                for q, percorsi_shock in blocchi
+            ])
+            for chiave in CHIAVI_PERCORSO
+        }
+    risultati = calculate_real_estate_investment_batch(impilati, percorsi)
+
+    esito = {'scenari': list(scenari), 'base': {}, 'valori': {}, 'delta': {}, 'non_applicato': non_applicato}
+    for metrica in metriche:
+        valori = np.asarray(risultati[metrica], dtype=float).reshape(len(blocchi), n)
+        stressati = np.where(non_applicato, np.nan, valori[1:])
+        esito['base'][metrica] = valori[0]
+        esito['valori'][metrica] = stressati
+        esito['delta'][metrica] = stressati - valori[0]
+    return esito
+
+
+def main(argv=None):
+    import argparse
+    import pandas as pd
+    from tables import read_chunks, frame_to_batch, CHUNK_SIZE_DEFAULT
+
+    parser = argparse.ArgumentParser(description="Prove di stress su un portafoglio immobiliare")
+    parser.add_argument('input', help="File del portafoglio (.csv o .parquet), una riga per immobile")
+    parser.add_argument('output', help="File CSV della matrice immobile x shock delle variazioni")
+    parser.add_argument('--metric', choices=METRICHE_STRESS, default='tir_nominale', help="Metrica riportata")
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARI_STRESS), help="Shock da applicare (default tutti)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE_DEFAULT, help="Immobili valutati per blocco")
+    args = parser.parse_args(argv)
+
+    try:
+        righe = 0
+        non_applicati = 0
+        with open(args.output, 'w', newline='') as file:
+            for numero, blocco in enumerate(read_chunks(args.input, args.chunk_size)):
+                esito = stress_test_batch(frame_to_batch(blocco), args.scenarios, (args.metric,))
+                non_applicati += int(esito['non_applicato'].any(axis=0).sum())
+                tabella = pd.DataFrame(esito['delta'][args.metric].T, columns=esito['scenari'])
+                tabella.insert(0, f'{args.metric}_base', esito['base'][args.metric])
+                tabella.to_csv(file, header=numero == 0, index=False)
+                righe += len(blocco)
+    except (ValueError, OSError, ImportError) as e:
+        print(f"Errore: {e}", file=sys.stderr)
+        return 1
+    print(f"{righe} immobili sottoposti a stress -> {args.output}")
+    if non_applicati:
+        print(f"Attenzione: {non_applicati} immobili con mutuo senza debito_residuo_mutuo, "
+              "shock sui tassi non applicati (valori vuoti)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import numpy as np
+from batch import calculate_real_estate_investment_batch, CHIAVI_INTERE
+from parallel import evaluate_parallel
+
+METRICHE_SWEEP = ('cagr_nominale', 'cagr_reale', 'tir_nominale', 'tir_reale', 'roi_nominale', 'roe_nominale')
+
+# Oltre questo numero di celle x anni la griglia è divisa in blocchi valutati
+# da un pool di processi (parallel.evaluate_parallel)
+MAX_ELEMENTI_BATCH = 4_000_000
+
+
+def build_grid(params, assi):
+    """
+    Costruisce il prodotto cartesiano di due o più chiavi params
+
+    Args:
+        params: Dizionario params scalare di riferimento (valori delle chiavi non variate)
+        assi: Dizionario chiave params -> sequenza di valori, nell'ordine degli assi
+
+    Returns:
+        tuple: (params_batch con un elemento per cella, forma della griglia)
+    """
+    if not assi:
+        raise ValueError("Indicare almeno un asse per la griglia")
+    for chiave in assi:
+        if chiave not in params:
+            raise KeyError(chiave)
+
+    valori_assi = [np.asarray(valori) for valori in assi.values()]
+    forma = tuple(len(valori) for valori in valori_assi)
+    griglie = np.meshgrid(*valori_assi, indexing='ij')
+
+    params_batch = dict(params)
+    for chiave, griglia in zip(assi, griglie):
+        griglia = griglia.ravel()
+        if chiave in CHIAVI_INTERE:
+            griglia = np.rint(griglia).astype(int)
+        params_batch[chiave] = griglia
+    return params_batch, forma
+
+
+def _evaluate_block(params_batch, metriche):
+    """Valuta un blocco e restituisce solo le metriche richieste (poco da serializzare)"""
+    risultati = calculate_real_estate_investment_batch(params_batch)
+    return {metrica: risultati[metrica] for metrica in metriche}
+
+
+def sweep_grid(params, assi, metriche=METRICHE_SWEEP, max_elementi=MAX_ELEMENTI_BATCH, max_workers=None):
+    """
+    Valuta il modello completo su una griglia cartesiana di parametri
+
+    La griglia è valutata in un unico batch vettoriale; se celle x anni supera
+    max_elementi viene divisa in blocchi distribuiti su un pool di processi.
+
+    Args:
+        params: Dizionario params scalare di riferimento
+        assi: Dizionario chiave params -> valori dell'asse (es. 200 prezzi x 200 affitti)
+        metriche: Chiavi dei risultati del batch da restituire come superfici
+        max_elementi: Limite celle x anni per un singolo passaggio vettoriale
+        max_workers: Processi del pool (None = numero di CPU; 1 = blocchi in sequenza)
+
+    Returns:
+        dict: 'assi' (valori per asse), 'forma' e per ogni metrica un array con la
+        forma della griglia (TIR NaN dove non calcolabile)
+    """
+    params_batch, forma = build_grid(params, assi)
+    n_celle = int(np.prod(forma))
+    anni_max = int(np.max(params_batch['anni_investimento']))
+    celle_per_blocco = max(1, max_elementi // anni_max)
+
+    if n_celle <= celle_per_blocco:
+        superfici = _evaluate_block(params_batch, metriche)
+    else:
+        # Input e superfici in memoria condivisa tra i processi del pool
+        superfici = evaluate_parallel(params_batch, metriche=metriche, workers=max_workers, max_elementi=max_elementi)
+
+    risultato = {
+        'assi': {chiave: np.asarray(valori) for chiave, valori in assi.items()},
+        'forma': forma,
+    }
+    for metrica in metriche:
+        risultato[metrica] = np.asarray(superfici[metrica]).reshape(forma)
+    return risultato
@@ -0,0 +1,48 @@
+"""
+File tabellari di immobili (CSV o Parquet): lettura a blocchi e conversione dei
+DataFrame nella struttura di array del motore vettoriale
+
+Usato dalla CLI, dalla UI, dal selettore di annunci e dalle prove di stress; pandas e
+pyarrow sono importati solo alla lettura, così il modulo resta nel motore.
+"""
+import numpy as np
+from batch import CHIAVI_NUMERICHE, CHIAVI_INTERE, CHIAVI_OPZIONALI
+
+CHUNK_SIZE_DEFAULT = 50_000
+
+COLONNE_RICHIESTE = tuple(chiave for chiave in CHIAVI_NUMERICHE if chiave not in CHIAVI_OPZIONALI) + ('tipo_adeguamento',)
+
+
+def _formato(percorso):
+    return 'parquet' if str(percorso).lower().endswith(('.parquet', '.pq')) else 'csv'
+
+
+def read_chunks(percorso, chunk_size):
+    """Legge il file di input a blocchi di DataFrame"""
+    if _formato(percorso) == 'parquet':
+        import pyarrow.parquet as pq
+        for record_batch in pq.ParquetFile(percorso).iter_batches(batch_size=chunk_size):
+            yield record_batch.to_pandas()
+    else:
+        import pandas as pd
+        yield from pd.read_csv(percorso, chunksize=chunk_size)
+
+
+def frame_to_batch(blocco):
+    """
+    Converte un DataFrame di immobili (colonne params) nella struttura di array del
+    motore vettoriale; le colonne di CHIAVI_OPZIONALI assenti valgono 0
+
+    Raises:
+        ValueError: Se mancano colonne di COLONNE_RICHIESTE
+    """
+    mancanti = [colonna for colonna in COLONNE_RICHIESTE if colonna not in blocco.columns]
+    if mancanti:
+        raise ValueError(f"Colonne mancanti nel file di input: {', '.join(mancanti)}")
+
+    params_batch = {}
+    for chiave in CHIAVI_NUMERICHE:
+        valori = blocco[chiave] if chiave in blocco.columns else 0
+        params_batch[chiave] = np.asarray(valori, dtype=int if chiave in CHIAVI_INTERE else float)
+    params_batch['tipo_adeguamento'] = blocco['tipo_adeguamento'].to_numpy(dtype=object)
+    return params_batch
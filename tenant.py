@@ -0,0 +1,192 @@
+import numpy as np
+from batch import (
+    calculate_real_estate_investment_batch,
+    calculate_annual_components_batch,
+    normalize_batch,
+    CHIAVE_FATTORE_AFFITTO,
+    CHIAVE_MESI_RILOCAZIONE,
+)
+from montecarlo import path_uniforms, summarize_distribution, PERCENTILI_DEFAULT
+from streaming import StreamingSummary, iter_blocks, METRICHE_STREAMING, COMPRESSIONE_DEFAULT
+
+# Stati mensili dell'immobile
+STATO_OCCUPATO = 0
+STATO_SFITTO = 1
+STATO_MOROSO = 2
+
+STATI_INQUILINO_LABELS = {
+    STATO_OCCUPATO: 'occupato',
+    STATO_SFITTO: 'sfitto',
+    STATO_MOROSO: 'moroso',
+}
+
+# Configurazione di default del ciclo di vita degli inquilini (probabilità in percentuale)
+CONFIGURAZIONE_INQUILINI_DEFAULT = {
+    'probabilita_disdetta_annua': 15.0,
+    'mesi_sfitto_medi': 3.0,
+    'probabilita_morosita_annua': 3.0,
+    'mesi_morosita_medi': 6.0,
+    # Quota delle morosità che si chiudono con l'inquilino che resta (le altre finiscono in sfratto)
+    'probabilita_sanatoria': 50.0,
+    # Costi di rilocazione (agenzia, piccoli lavori) in mesi di affitto lordo
+    'mesi_costi_rilocazione': 1.0,
+    # Crescita annua dei canoni di mercato; None = rivalutazione_annua di params
+    'crescita_canoni_mercato_perc': None,
+}
+
+MESI_ANNO = 12
+
+
+def _probabilita_mensile(probabilita_annua_perc):
+    """Probabilità mensile equivalente a una probabilità annua in percentuale"""
+    return 1 - (1 - probabilita_annua_perc / 100) ** (1 / MESI_ANNO)
+
+
+def transition_matrix(configurazione):
+    """
+    Matrice di transizione mensile 3x3 (righe: stato di partenza, ordine STATO_*)
+
+    Da occupato si passa a moroso o sfitto (disdetta); da sfitto si torna occupato
+    dopo mesi_sfitto_medi in media; la morosità dura mesi_morosita_medi in media e si
+    chiude con sanatoria (occupato) o sfratto (sfitto).
+    """
+    disdetta = _probabilita_mensile(configurazione['probabilita_disdetta_annua'])
+    morosita = _probabilita_mensile(configurazione['probabilita_morosita_annua'])
+    rilocazione = 1 / max(configurazione['mesi_sfitto_medi'], 1.0)
+    uscita_morosita = 1 / max(configurazione['mesi_morosita_medi'], 1.0)
+    sanatoria = configurazione['probabilita_sanatoria'] / 100
+    matrice = np.array([
+        [1 - disdetta - morosita, disdetta, morosita],
+        [rilocazione, 1 - rilocazione, 0.0],
+        [uscita_morosita * sanatoria, uscita_morosita * (1 - sanatoria), 1 - uscita_morosita],
+    ])
+    if np.any(matrice < 0):
+        raise ValueError("Probabilità di transizione non valide: la somma delle uscite supera il 100%")
+    return matrice
+
+
+def _rapporto_mercato(params, crescita_mercato_perc):
+    """
+    Rapporto tra canone di mercato e canone del contratto iniziale per ogni anno: a
+    ogni nuova locazione l'affitto riparte dal mercato
+    """
+    p, n = normalize_batch(params)
+    contratto = calculate_annual_components_batch(p, n)['affitti_lordi_annuali'][0]
+    anni = np.arange(len(contratto))
+    mercato = p['affitto_lordo'][0] * (1 + crescita_mercato_perc / 100) ** anni
+    positivo = contratto > 0
+    return np.where(positivo, mercato / np.where(positivo, contratto, 1.0), 1.0)
+
+
+def simulate_tenant_paths(params, configurazione, indici_percorso, seed=0):
+    """
+    Simula la catena di Markov mensile dello stato dell'immobile per i percorsi indicati
+
+    Tutti i percorsi avanzano insieme, un mese alla volta; le uniformi vengono da
+    montecarlo.path_uniforms (un flusso per percorso), quindi ogni percorso è lo stesso
+    qualunque sia la suddivisione in blocchi. Si parte da immobile occupato.
+
+    Args:
+        params: Dizionario params scalare
+        configurazione: Dizionario come CONFIGURAZIONE_INQUILINI_DEFAULT
+        indici_percorso: Array degli indici globali dei percorsi
+        seed: Seme della simulazione
+
+    Returns:
+        dict: Percorsi per il motore (n, anni_investimento): 'periodo_sfitto_perc' (mesi
+        sfitti o morosi in percentuale dell'anno), CHIAVE_FATTORE_AFFITTO e
+        CHIAVE_MESI_RILOCAZIONE; inoltre 'rilocazioni' (nuove locazioni per anno), da
+        togliere prima di passare i percorsi al motore
+    """
+    configurazione = {**CONFIGURAZIONE_INQUILINI_DEFAULT, **configurazione}
+    anni = int(params['anni_investimento'])
+    indici_percorso = np.asarray(indici_percorso)
+    n = len(indici_percorso)
+    soglie = np.cumsum(transition_matrix(configurazione), axis=1)
+    soglia_prima, soglia_seconda = soglie[:, 0], soglie[:, 1]
+    crescita_mercato = configurazione['crescita_canoni_mercato_perc']
+    if crescita_mercato is None:
+        crescita_mercato = params['rivalutazione_annua']
+    rapporto_mercato = _rapporto_mercato(params, crescita_mercato)
+
+    stato = np.full(n, STATO_OCCUPATO, dtype=np.intp)
+    fattore = np.ones(n)
+    mesi_persi = np.zeros((n, anni))
+    rilocazioni = np.zeros((n, anni))
+    fattore_affitto = np.empty((n, anni))
+    stati = np.empty((MESI_ANNO + 1, n), dtype=np.intp)
+    for anno in range(anni):
+        # Uniformi dell'anno per mese (righe contigue); stati[0] è lo stato a inizio anno
+        uniformi = np.ascontiguousarray(path_uniforms(seed, indici_percorso, MESI_ANNO, primo=anno * MESI_ANNO).T)
+        stati[0] = stato
+        for mese in range(MESI_ANNO):
+            u = uniformi[mese]
+            stato = (u >= soglia_prima[stato]).astype(np.intp) + (u >= soglia_seconda[stato])
+            stati[mese + 1] = stato
+        nuove = ((stati[:-1] == STATO_SFITTO) & (stati[1:] == STATO_OCCUPATO)).sum(axis=0)
+        # Nuova locazione nell'anno: il canone riparte dal mercato
+        fattore = np.where(nuove > 0, rapporto_mercato[anno], fattore)
+        mesi_persi[:, anno] = (stati[1:] != STATO_OCCUPATO).sum(axis=0)
+        rilocazioni[:, anno] = nuove
+        fattore_affitto[:, anno] = fattore
+
+    return {
+        'periodo_sfitto_perc': mesi_persi / MESI_ANNO * 100,
+        CHIAVE_FATTORE_AFFITTO: fattore_affitto,
+        CHIAVE_MESI_RILOCAZIONE: rilocazioni * configurazione['mesi_costi_rilocazione'],
+        'rilocazioni': rilocazioni,
+    }
+
+
+def simulate_tenant_model(params, configurazione=None, n_percorsi=10000, seed=0,
+                          percentili=PERCENTILI_DEFAULT, dimensione_blocco=None,
+                          compressione=COMPRESSIONE_DEFAULT):
+    """
+    Rendimento con sfitto, morosità e rilocazioni simulati invece del periodo_sfitto_perc fisso
+
+    I percorsi della catena (simulate_tenant_paths) entrano nel motore vettoriale come
+    percorsi annuali. Con dimensione_blocco l'elaborazione procede a blocchi e le
+    statistiche sono aggregate in streaming, come in montecarlo.simulate_monte_carlo.
+
+    Args:
+        params: Dizionario params scalare
+        configurazione: Aggiornamenti di CONFIGURAZIONE_INQUILINI_DEFAULT
+        n_percorsi: Numero di percorsi simulati
+        seed: Seme della simulazione
+        percentili: Percentili da riportare
+        dimensione_blocco: Percorsi per blocco; None = unico batch esatto
+        compressione: Compressione dei t-digest in modalità a blocchi
+
+    Returns:
+        dict: Statistiche per le metriche di streaming.METRICHE_STREAMING,
+        'sfitto_medio_annuo' (anni,) in percentuale, 'rilocazioni_medie' per percorso e
+        'matrice_transizione'
+    """
+    configurazione = {**CONFIGURAZIONE_INQUILINI_DEFAULT, **(configurazione or {})}
+    anni = int(params['anni_investimento'])
+    sintesi = {
+        'n_percorsi': n_percorsi,
+        'seed': seed,
+        'percentili': tuple(percentili),
+        'matrice_transizione': transition_matrix(configurazione),
+    }
+    aggregatore = StreamingSummary(serie=(), compressione=compressione) if dimensione_blocco is not None else None
+    blocchi = iter_blocks(n_percorsi, dimensione_blocco or max(n_percorsi, 1))
+    sfitto_totale = np.zeros(anni)
+    rilocazioni_totali = 0.0
+    for inizio, fine in blocchi:
+        percorsi = simulate_tenant_paths(params, configurazione, np.arange(inizio, fine), seed)
+        sfitto_totale += percorsi['periodo_sfitto_perc'].sum(axis=0)
+        rilocazioni_totali += percorsi.pop('rilocazioni').sum()
+        risultati = calculate_real_estate_investment_batch(params, percorsi)
+        if aggregatore is not None:
+            aggregatore.update(risultati)
+        else:
+            for metrica in METRICHE_STREAMING:
+                sintesi[metrica] = summarize_distribution(risultati[metrica], percentili)
+    if aggregatore is not None:
+        sintesi.update(aggregatore.summary(percentili))
+
+    sintesi['sfitto_medio_annuo'] = sfitto_totale / max(n_percorsi, 1)
+    sintesi['rilocazioni_medie'] = rilocazioni_totali / max(n_percorsi, 1)
+    return sintesi
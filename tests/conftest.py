@@ -0,0 +1,70 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+# I moduli dell'applicazione stanno nella radice del repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def params_base():
+    """Immobile da 200k con mutuo da 600 €/mese, come costruito dalla UI"""
+    return {
+        'valore_immobile': 200000.0,
+        'costo_acquisto': 0.0,
+        'costo_ristrutturazione': 0.0,
+        'affitto_lordo': 9600.0,
+        'rivalutazione_annua': 2.0,
+        'anni_investimento': 10,
+        'costi_assicurazione_euro': 300.0,
+        'costi_gestione_euro': 600.0,
+        'rata_mutuo_mensile': 600.0,
+        'anni_restanti_mutuo': 20,
+        'manutenzione_straordinaria_perc': 1.0,
+        'tassazione_affitti_perc': 21.0,
+        'tassa_catastale_perc': 0.8,
+        'periodo_sfitto_perc': 5.0,
+        'inflazione_perc': 2.0,
+        'adeguamento_affitto_anni': 1,
+        'tipo_adeguamento': 'Inflazione',
+        'commissione_iniziale': 0.0,
+        'commissione_finale': 0.0,
+    }
+
+
+def _params_casuali(generatore, n):
+    """n dizionari params casuali, con e senza costi di acquisto e mutuo"""
+    params = []
+    for _ in range(n):
+        con_costi = generatore.random() < 0.5
+        params.append({
+            'valore_immobile': float(generatore.uniform(50000, 500000)),
+            'costo_acquisto': float(generatore.uniform(40000, 400000)) if con_costi else 0.0,
+            'costo_ristrutturazione': float(generatore.uniform(0, 50000)) if con_costi else 0.0,
+            'affitto_lordo': float(generatore.uniform(300, 2500) * 12),
+            'rivalutazione_annua': float(generatore.uniform(0, 5)),
+            'anni_investimento': int(generatore.integers(1, 40)),
+            'costi_assicurazione_euro': float(generatore.uniform(0, 600)),
+            'costi_gestione_euro': float(generatore.uniform(0, 1500)),
+            'rata_mutuo_mensile': float(generatore.uniform(0, 900)) if generatore.random() < 0.5 else 0.0,
+            'anni_restanti_mutuo': int(generatore.integers(0, 30)),
+            'manutenzione_straordinaria_perc': float(generatore.uniform(0, 2)),
+            'tassazione_affitti_perc': float(generatore.uniform(0, 30)),
+            'tassa_catastale_perc': float(generatore.uniform(0, 1.2)),
+            'periodo_sfitto_perc': float(generatore.uniform(0, 20)),
+            'inflazione_perc': float(generatore.uniform(0, 5)),
+            'adeguamento_affitto_anni': int(generatore.integers(1, 8)),
+            'tipo_adeguamento': str(generatore.choice(['Valore Immobile', 'Inflazione', 'Nessun Adeguamento'])),
+            'commissione_iniziale': float(generatore.uniform(0, 10000)),
+            'commissione_finale': float(generatore.uniform(0, 10000)),
+        })
+    return params
+
+
+@pytest.fixture
+def params_casuali():
+    """Generatore di params casuali: params_casuali(n, seed=0)"""
+    def genera(n, seed=0):
+        return _params_casuali(np.random.default_rng(seed), n)
+    return genera
@@ -0,0 +1,59 @@
+import io
+import numpy as np
+import pytest
+from batch import calculate_real_estate_investment_batch, CHIAVE_CRESCITA_AFFITTI
+from backtest import backtest_rolling, load_series
+
+
+def _serie(anni, seed=0):
+    generatore = np.random.default_rng(seed)
+    return {
+        'anni': np.arange(1990, 1990 + anni),
+        'rivalutazione_annua': generatore.normal(2, 4, anni),
+        'inflazione_perc': generatore.normal(2, 1.5, anni),
+    }
+
+
+def test_serie_costanti_uguali_al_calcolo_deterministico(params_base):
+    serie = {
+        'anni': np.arange(2000, 2020),
+        'rivalutazione_annua': np.full(20, params_base['rivalutazione_annua']),
+        'inflazione_perc': np.full(20, params_base['inflazione_perc']),
+    }
+    esito = backtest_rolling(params_base, serie)
+    deterministico = calculate_real_estate_investment_batch(params_base)
+    assert esito['anni_partenza'].tolist() == list(range(2000, 2011))
+    for metrica in ('tir_nominale', 'tir_reale', 'valore_finale_nominale'):
+        np.testing.assert_allclose(esito[metrica], deterministico[metrica][0], rtol=1e-9)
+
+
+def test_finestra_uguale_al_percorso_singolo(params_base):
+    serie = _serie(30)
+    esito = backtest_rolling(params_base, serie)
+    anni = params_base['anni_investimento']
+    for partenza in (0, 7, 30 - anni):
+        percorsi = {nome: serie[nome][None, partenza:partenza + anni] for nome in ('rivalutazione_annua', 'inflazione_perc')}
+        singolo = calculate_real_estate_investment_batch(params_base, percorsi)
+        assert esito['tir_nominale'][partenza] == pytest.approx(singolo['tir_nominale'][0], rel=1e-12)
+        assert esito['valore_finale_nominale'][partenza] == pytest.approx(singolo['valore_finale_nominale'][0], rel=1e-12)
+
+
+def test_serie_troppo_corte(params_base):
+    with pytest.raises(ValueError):
+        backtest_rolling(params_base, _serie(params_base['anni_investimento'] - 1))
+
+
+def test_lettura_con_indice_affitti_e_citta():
+    testo = (
+        "anno,citta,rivalutazione_annua,indice_affitti\n"
+        "2000,Milano,3.0,100\n2001,Milano,2.0,102\n2002,Milano,1.0,104.04\n"
+        "2000,Roma,1.0,100\n2001,Roma,1.0,100\n"
+    )
+    serie = load_series(io.StringIO(testo), 'Milano')
+    # Il primo anno non ha crescita dei canoni ed è scartato
+    assert serie['anni'].tolist() == [2001, 2002]
+    np.testing.assert_allclose(serie[CHIAVE_CRESCITA_AFFITTI], [2.0, 2.0])
+    with pytest.raises(ValueError):
+        load_series(io.StringIO(testo))
+    with pytest.raises(ValueError):
+        load_series(io.StringIO(testo), 'Napoli')
@@ -0,0 +1,36 @@
+import numpy as np
+from calcoli import calculate_real_estate_investment_improved
+from batch import calculate_real_estate_investment_batch, params_to_batch
+
+
+def _confronta(scalare, batch, riga):
+    """Differenze tra i risultati scalari e la riga del batch (liste troncate all'orizzonte)"""
+    differenze = []
+    for chiave, valore in scalare.items():
+        if chiave == 'roe_note':
+            continue
+        atteso = batch[chiave][riga]
+        if isinstance(valore, list):
+            atteso = atteso[:len(valore)]
+        # CAGR di un valore finale negativo: complesso nel motore scalare, NaN nel batch
+        valore = np.nan if valore is None or isinstance(valore, complex) else valore
+        if not np.allclose(np.asarray(valore, dtype=float), np.asarray(atteso, dtype=float),
+                           rtol=1e-9, atol=1e-6, equal_nan=True):
+            differenze.append(chiave)
+    return differenze
+
+
+def test_batch_uguale_al_motore_scalare(params_casuali):
+    params = params_casuali(300, seed=1)
+    risultati = calculate_real_estate_investment_batch(params_to_batch(params))
+    differenze = {
+        riga: _confronta(calculate_real_estate_investment_improved(p), risultati, riga)
+        for riga, p in enumerate(params)
+    }
+    assert not {riga: chiavi for riga, chiavi in differenze.items() if chiavi}
+
+
+def test_batch_scalare_restituisce_una_riga(params_base):
+    risultati = calculate_real_estate_investment_batch(params_base)
+    assert risultati['valori_annuali'].shape == (1, params_base['anni_investimento'])
+    assert not _confronta(calculate_real_estate_investment_improved(params_base), risultati, 0)
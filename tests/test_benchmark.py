@@ -0,0 +1,30 @@
+import pytest
+import benchmark
+
+
+def _esecuzione(latenze):
+    return {'risultati': {nome: {'latenza_p50_ms': valore} for nome, valore in latenze.items()}}
+
+
+def test_confronto_segnala_solo_le_regressioni():
+    base = _esecuzione({'a': 1.0, 'b': 2.0, 'c': 1.0})
+    nuovo = _esecuzione({'a': 1.05, 'b': 2.5, 'd': 9.0})
+    confronto, regressioni = benchmark.compare_benchmarks(base, nuovo, soglia_perc=10.0)
+    assert [riga['caso'] for riga in confronto] == ['a', 'b']
+    assert [riga['caso'] for riga in regressioni] == ['b']
+    assert regressioni[0]['variazione_perc'] == pytest.approx(25.0)
+
+
+def test_misura_rispetta_le_ripetizioni_minime():
+    chiamate = []
+    misure = benchmark._misura(lambda: chiamate.append(1), tempo_minimo=0.0, min_ripetizioni=7)
+    assert misure['ripetizioni'] == 7
+    # riscaldamento e misura della memoria sono chiamate in più
+    assert len(chiamate) == 9
+    assert misure['latenza_p50_ms'] <= misure['latenza_p99_ms']
+
+
+@pytest.mark.parametrize('suite', [nome for nome in benchmark.SUITE if nome != 'ui'])
+def test_casi_eseguibili(suite):
+    for _, funzione in benchmark.CASI_SUITE[suite]():
+        funzione()
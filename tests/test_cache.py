@@ -0,0 +1,38 @@
+import numpy as np
+from cache import ResultCache, canonical_params, params_key, cached_real_estate_investment
+from calcoli import calculate_real_estate_investment_improved
+
+
+def test_chiave_stabile_per_arrotondamenti(params_base):
+    variante = dict(params_base, valore_immobile=200000.001, anni_investimento=10.0, commissione_iniziale=-0.0)
+    assert params_key(variante) == params_key(params_base)
+    assert params_key(dict(params_base, valore_immobile=200000.01)) != params_key(params_base)
+    assert canonical_params(params_base)['debito_residuo_mutuo'] == 0.0
+
+
+def test_risultato_in_cache_uguale_al_calcolo(params_base):
+    cache = ResultCache()
+    chiamate = []
+
+    def funzione(params):
+        chiamate.append(params)
+        return calculate_real_estate_investment_improved(params)
+
+    primo = cache.get_or_compute(params_base, funzione)
+    secondo = cache.get_or_compute(dict(params_base), funzione)
+    assert len(chiamate) == 1 and primo is secondo
+    diretto = calculate_real_estate_investment_improved(params_base)
+    for metrica in ('tir_nominale', 'roe_nominale', 'cagr_nominale'):
+        np.testing.assert_allclose(primo[metrica], diretto[metrica], rtol=1e-12)
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+    assert cached_real_estate_investment(params_base)['tir_nominale'] == primo['tir_nominale']
+
+
+def test_rimozione_lru_entro_il_limite():
+    cache = ResultCache(max_bytes=2000)
+    for i in range(50):
+        cache.put(i, list(range(20)))
+        assert cache.bytes <= cache.max_bytes
+    statistiche = cache.stats()
+    assert statistiche['evictions'] > 0
+    assert cache.get(49) is not None and cache.get(0) is None
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from calcoli import calculate_deflators, calculate_irr_for_real_estate, calculate_real_estate_investment_improved
+
+
+def test_deflatori():
+    np.testing.assert_allclose(calculate_deflators(2.0, 3), [1.02, 1.02 ** 2, 1.02 ** 3], rtol=1e-15)
+    assert calculate_deflators(0.0, 5).tolist() == [1.0] * 5
+
+
+@pytest.mark.parametrize('anni', [1, 10, 100, 400])
+def test_tir_reale_coerente_con_fisher(params_base, anni):
+    # Senza commissione finale i flussi reali sono i nominali scontati dell'inflazione
+    params = dict(params_base, anni_investimento=anni, commissione_finale=0.0)
+    risultato = calculate_real_estate_investment_improved(params)
+    inflazione = 1 + params['inflazione_perc'] / 100
+    assert risultato['valore_finale_reale'] == pytest.approx(risultato['valore_finale_nominale'] / inflazione ** anni, rel=1e-12)
+    tir_nominale = risultato['tir_nominale'] / 100
+    tir_reale = risultato['tir_reale'] / 100
+    assert (1 + tir_nominale) == pytest.approx((1 + tir_reale) * inflazione, rel=1e-9)
+
+
+def test_deflatori_passati_o_ricalcolati(params_base):
+    affitti = [8000.0 + 100 * anno for anno in range(params_base['anni_investimento'])]
+    deflatori = calculate_deflators(params_base['inflazione_perc'], params_base['anni_investimento'])
+    con = calculate_irr_for_real_estate(params_base, affitti, 250000.0, 200000.0, deflatori)
+    senza = calculate_irr_for_real_estate(params_base, affitti, 250000.0, 200000.0)
+    assert con == senza
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+from cli import score_file, score_chunk, main, METRICHE_CLI
+from calcoli import calculate_real_estate_investment_improved
+
+
+@pytest.fixture
+def portafoglio(params_casuali, tmp_path):
+    percorso = tmp_path / 'portafoglio.csv'
+    pd.DataFrame(params_casuali(23, seed=5)).to_csv(percorso, index=False)
+    return percorso
+
+
+@pytest.mark.parametrize('estensione', ['csv', 'parquet'])
+def test_file_a_blocchi_uguale_a_un_blocco_unico(portafoglio, tmp_path, estensione):
+    uscita = tmp_path / f'risultati.{estensione}'
+    assert score_file(portafoglio, uscita, chunk_size=5) == 23
+    letto = pd.read_csv(uscita) if estensione == 'csv' else pd.read_parquet(uscita)
+    atteso = score_chunk(pd.read_csv(portafoglio))
+    for metrica in METRICHE_CLI:
+        if metrica.startswith('tir_status'):
+            assert (letto[metrica].to_numpy() == atteso[metrica].to_numpy()).all()
+        else:
+            np.testing.assert_allclose(letto[metrica], atteso[metrica], rtol=1e-12, equal_nan=True)
+
+
+def test_riga_uguale_al_calcolo_scalare(params_base):
+    risultato = score_chunk(pd.DataFrame([params_base]))
+    scalare = calculate_real_estate_investment_improved(params_base)
+    for metrica in ('tir_nominale', 'roe_nominale', 'valore_finale_nominale'):
+        assert risultato[metrica][0] == pytest.approx(scalare[metrica], rel=1e-9)
+
+
+def test_colonne_mancanti(tmp_path, params_base, capsys):
+    percorso = tmp_path / 'incompleto.csv'
+    pd.DataFrame([params_base]).drop(columns=['affitto_lordo']).to_csv(percorso, index=False)
+    assert main([str(percorso), str(tmp_path / 'out.csv')]) == 1
+    assert 'affitto_lordo' in capsys.readouterr().err
+
+
+def test_goal_seek_da_riga_di_comando(portafoglio, tmp_path):
+    uscita = tmp_path / 'prezzi.csv'
+    argomenti = [str(portafoglio), str(uscita), '--goal-seek', 'costo_acquisto', '--goal-metric', 'tir_nominale', '--goal-target', '4']
+    assert main(argomenti) == 0
+    letto = pd.read_csv(uscita)
+    assert {'costo_acquisto_obiettivo', 'obiettivo_status'} <= set(letto.columns)
@@ -0,0 +1,29 @@
+import json
+import os
+import subprocess
+import sys
+
+RADICE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SCRIPT = """
+import sys, json
+import core
+prima = [m for m in core.MODULI_ESCLUSI if m in sys.modules]
+params = {
+    'valore_immobile': 200000.0, 'affitto_lordo': 9600.0, 'rivalutazione_annua': 2.0,
+    'anni_investimento': 10, 'costi_assicurazione_euro': 300.0, 'costi_gestione_euro': 600.0,
+    'rata_mutuo_mensile': 600.0, 'anni_restanti_mutuo': 20, 'manutenzione_straordinaria_perc': 1.0,
+    'tassazione_affitti_perc': 21.0, 'tassa_catastale_perc': 0.8, 'periodo_sfitto_perc': 5.0,
+    'inflazione_perc': 2.0, 'adeguamento_affitto_anni': 1, 'tipo_adeguamento': 'Inflazione',
+    'commissione_iniziale': 0.0, 'commissione_finale': 0.0,
+}
+core.calculate_real_estate_investment_improved(params)
+core.calculate_real_estate_investment_batch(core.params_to_batch([params] * 10))
+print(json.dumps({'import': prima, 'calcolo': [m for m in core.MODULI_ESCLUSI if m in sys.modules]}))
+"""
+
+
+def test_motore_senza_moduli_esclusi():
+    uscita = subprocess.run([sys.executable, '-c', _SCRIPT], capture_output=True, text=True, check=True, cwd=RADICE)
+    caricati = json.loads(uscita.stdout)
+    assert caricati == {'import': [], 'calcolo': []}
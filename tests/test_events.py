@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from batch import calculate_real_estate_investment_batch, params_to_batch, CHIAVE_EVENTI
+from events import make_events, events_from_lists, scatter_events_annual, scatter_events_monthly
+
+
+def _ciclo(eventi, indice_inflazione, mensile=False):
+    """Distribuzione di riferimento, un evento alla volta"""
+    n, anni = indice_inflazione.shape
+    flussi = np.zeros((n, 12 * anni if mensile else anni))
+    for i in range(len(eventi['anno'])):
+        anno = eventi['anno'][i] - 1
+        if anno >= anni:
+            continue
+        colonna = 12 * anno + eventi['mese'][i] if mensile else anno
+        righe = range(n) if eventi['riga'] is None else [eventi['riga'][i]]
+        for riga in righe:
+            fattore = indice_inflazione[riga, anno] if eventi['indicizzato'][i] else 1.0
+            flussi[riga, colonna] += eventi['importo'][i] * fattore
+    return flussi
+
+
+@pytest.mark.parametrize('comuni', [False, True])
+def test_distribuzione_uguale_al_ciclo(comuni):
+    generatore = np.random.default_rng(24)
+    n, anni, eventi = 40, 12, 500
+    indice_inflazione = np.cumprod(1 + generatore.uniform(0, 0.05, (n, anni)), axis=1)
+    calendario = make_events(
+        generatore.integers(1, anni + 3, eventi),
+        generatore.normal(0, 5000, eventi),
+        riga=None if comuni else generatore.integers(0, n, eventi),
+        mese=generatore.integers(0, 12, eventi),
+        indicizzato=generatore.random(eventi) < 0.5,
+    )
+    np.testing.assert_allclose(scatter_events_annual(calendario, indice_inflazione), _ciclo(calendario, indice_inflazione), rtol=1e-12, atol=1e-9)
+    np.testing.assert_allclose(scatter_events_monthly(calendario, indice_inflazione), _ciclo(calendario, indice_inflazione, True), rtol=1e-12, atol=1e-9)
+    # Le somme per anno dei flussi mensili coincidono con i flussi annuali
+    np.testing.assert_allclose(
+        scatter_events_monthly(calendario, indice_inflazione).reshape(n, anni, 12).sum(axis=2),
+        scatter_events_annual(calendario, indice_inflazione), rtol=1e-12, atol=1e-9,
+    )
+
+
+def test_nessun_evento_uguale_a_senza_eventi(params_casuali):
+    params_batch = params_to_batch(params_casuali(20, seed=25))
+    senza = calculate_real_estate_investment_batch(params_batch)
+    vuoti = calculate_real_estate_investment_batch(params_batch, {CHIAVE_EVENTI: events_from_lists([[]] * 20)})
+    for metrica in ('tir_nominale', 'roe_nominale', 'totale_affitti_netti'):
+        np.testing.assert_array_equal(vuoti[metrica], senza[metrica])
+
+
+def test_evento_nei_flussi_annuali(params_base):
+    eventi = events_from_lists([[{'anno': 3, 'importo': -10000.0, 'indicizzato': False}]])
+    senza = calculate_real_estate_investment_batch(params_base)
+    con = calculate_real_estate_investment_batch(params_base, {CHIAVE_EVENTI: eventi})
+    differenza = con['affitti_netti_annuali'][0] - senza['affitti_netti_annuali'][0]
+    atteso = np.zeros(params_base['anni_investimento'])
+    atteso[2] = -10000.0
+    np.testing.assert_allclose(differenza, atteso, atol=1e-9)
+    assert con['tir_nominale'][0] < senza['tir_nominale'][0]
+
+
+def test_eventi_non_validi():
+    with pytest.raises(ValueError):
+        make_events([0], [100.0])
+    with pytest.raises(ValueError):
+        make_events([1], [100.0], mese=12)
+    with pytest.raises(ValueError):
+        scatter_events_annual(make_events([1], [100.0], riga=[5]), np.ones((2, 3)))
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from batch import calculate_real_estate_investment_batch, params_to_batch
+from goalseek import goal_seek_batch, goal_seek, GOAL_CONVERGED, GOAL_NO_BRACKET
+
+
+@pytest.mark.parametrize('variabile, metrica', [
+    ('costo_acquisto', 'tir_nominale'),
+    ('affitto_lordo', 'roe_nominale'),
+    ('commissione_finale', 'cagr_nominale'),
+    ('rivalutazione_annua', 'tir_reale'),
+])
+def test_residuo_della_soluzione(params_casuali, variabile, metrica):
+    params = params_casuali(80, seed=17)
+    for p in params:
+        p['costo_acquisto'] = max(p['costo_acquisto'], 0.8 * p['valore_immobile'])
+    params_batch = params_to_batch(params)
+    # Obiettivi raggiungibili: la metrica con la variabile spostata del 20%
+    spostato = dict(params_batch, **{variabile: params_batch[variabile] * 1.2 + 1.0})
+    scala = 100.0 if metrica.startswith('cagr') else 1.0
+    obiettivo = calculate_real_estate_investment_batch(spostato)[metrica] * scala
+    calcolabile = np.isfinite(obiettivo)
+    obiettivo = np.where(calcolabile, obiettivo, 0.0)
+
+    soluzione = goal_seek_batch(params_batch, variabile, metrica, obiettivo)
+    convergente = soluzione['status'] == GOAL_CONVERGED
+    assert convergente[calcolabile].mean() > 0.9
+    verifica = calculate_real_estate_investment_batch(dict(params_batch, **{variabile: np.where(convergente, soluzione['valore'], params_batch[variabile])}))
+    residuo = np.abs(verifica[metrica][convergente] * scala - obiettivo[convergente])
+    assert residuo.max() <= 1e-6
+
+
+def test_obiettivo_non_raggiungibile(params_base):
+    # Nessun prezzo di acquisto positivo porta il TIR al 500%
+    risultato = goal_seek_batch(params_base, 'costo_acquisto', 'tir_nominale', 500.0)
+    assert risultato['status'][0] == GOAL_NO_BRACKET
+    assert np.isnan(risultato['valore'][0])
+    assert goal_seek(params_base, 'costo_acquisto', 'tir_nominale', 500.0)['valore'] is None
+
+
+def test_variabile_non_valida(params_base):
+    with pytest.raises(ValueError):
+        goal_seek_batch(params_base, 'anni_investimento', 'tir_nominale', 5.0)
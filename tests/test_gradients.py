@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from batch import calculate_real_estate_investment_batch, params_to_batch
+from gradients import calculate_gradients_batch, calculate_gradients, CHIAVI_GRADIENTE, METRICHE_GRADIENTE
+
+
+def _params_con_debito(params, generatore):
+    """Metà degli scenari con un mutuo e un debito residuo coerenti con un tasso 0,5-7%"""
+    for p in params[:len(params) // 2]:
+        p['rata_mutuo_mensile'] = float(generatore.uniform(200, 1500))
+        p['anni_restanti_mutuo'] = int(generatore.integers(1, 25))
+        tasso = generatore.uniform(0.5, 7) / 1200
+        p['debito_residuo_mutuo'] = p['rata_mutuo_mensile'] * (1 - (1 + tasso) ** -(12 * p['anni_restanti_mutuo'])) / tasso
+    return params
+
+
+def _derivabile(params_batch, chiave):
+    """Righe lontane dai punti di discontinuità del parametro"""
+    if chiave == 'rata_mutuo_mensile':
+        return params_batch[chiave] > 0
+    if chiave in ('costo_acquisto', 'costo_ristrutturazione'):
+        return (params_batch['costo_acquisto'] > 0) | (params_batch['costo_ristrutturazione'] > 0)
+    return np.ones(len(params_batch[chiave]), dtype=bool)
+
+
+def test_gradienti_uguali_alle_differenze_centrali(params_casuali):
+    params_batch = params_to_batch(_params_con_debito(params_casuali(200, seed=11), np.random.default_rng(4)))
+    gradienti = calculate_gradients_batch(params_batch)
+    base = calculate_real_estate_investment_batch(params_batch)
+    for metrica in METRICHE_GRADIENTE:
+        np.testing.assert_allclose(gradienti['valori'][metrica], base[metrica], rtol=1e-9, atol=1e-9)
+
+    for j, chiave in enumerate(CHIAVI_GRADIENTE):
+        passo = np.maximum(np.abs(params_batch[chiave]) * 1e-5, 1e-5)
+        sopra = calculate_real_estate_investment_batch(dict(params_batch, **{chiave: params_batch[chiave] + passo}))
+        sotto = calculate_real_estate_investment_batch(dict(params_batch, **{chiave: params_batch[chiave] - passo}))
+        for metrica in METRICHE_GRADIENTE:
+            differenze = (sopra[metrica] - sotto[metrica]) / (2 * passo)
+            analitico = gradienti['gradienti'][metrica][:, j]
+            righe = _derivabile(params_batch, chiave) & np.isfinite(differenze) & np.isfinite(analitico)
+            errore = np.abs(differenze - analitico)[righe] / (np.abs(differenze[righe]) + 1e-6)
+            assert errore.max(initial=0) < 1e-4, (chiave, metrica)
+
+
+def test_versione_scalare(params_base):
+    risultato = calculate_gradients(params_base)
+    assert set(risultato) == set(METRICHE_GRADIENTE)
+    assert set(risultato['tir_nominale']['gradiente']) == set(CHIAVI_GRADIENTE)
+    # Un affitto più alto aumenta il TIR
+    assert risultato['tir_nominale']['gradiente']['affitto_lordo'] > 0
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from batch import calculate_real_estate_investment_batch, params_to_batch
+from holding import calculate_holding_period_batch, calculate_holding_period, METRICHE_DETENZIONE
+
+METRICHE_CONFRONTO = tuple(metrica for metrica in METRICHE_DETENZIONE if metrica != 'incasso_netto_vendita')
+
+
+def test_anni_di_vendita_uguali_a_n_simulazioni(params_casuali):
+    params = params_casuali(40, seed=16)
+    # Alcuni scenari con debito residuo da rimborsare alla vendita
+    for p in params[:10]:
+        p['debito_residuo_mutuo'] = p['rata_mutuo_mensile'] * 12 * p['anni_restanti_mutuo'] * 0.8
+    params_batch = params_to_batch(params)
+    detenzione = calculate_holding_period_batch(params_batch)
+    anni = params_batch['anni_investimento']
+    for anno in range(1, anni.max() + 1):
+        righe = np.flatnonzero(anni >= anno)
+        ridotto = {chiave: valori[righe] for chiave, valori in params_batch.items()}
+        ridotto['anni_investimento'] = np.full(len(righe), anno)
+        singolo = calculate_real_estate_investment_batch(ridotto)
+        for metrica in METRICHE_CONFRONTO:
+            np.testing.assert_allclose(
+                detenzione[metrica][righe, anno - 1], singolo[metrica], rtol=1e-8, atol=1e-8, equal_nan=True,
+                err_msg=f"{metrica}, anno {anno}",
+            )
+        # Oltre l'orizzonte dello scenario le metriche non sono definite
+        assert np.isnan(detenzione['tir_nominale'][anni < anno, anno - 1]).all()
+
+
+def test_anno_ottimale(params_base):
+    scalare = calculate_holding_period(params_base)
+    assert len(scalare['tir_nominale']) == params_base['anni_investimento']
+    for metrica, anno in scalare['anno_ottimale'].items():
+        valori = [v if v is not None else -np.inf for v in scalare[metrica]]
+        assert anno == int(np.argmax(valori)) + 1
+    assert scalare['tir_nominale'][-1] == pytest.approx(
+        calculate_real_estate_investment_batch(params_to_batch([params_base]))['tir_nominale'][0], rel=1e-9
+    )
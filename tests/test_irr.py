@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from irr import solve_irr_batch, solve_xirr_batch, npv_horner, npv_potenze, IRR_CONVERGED, IRR_NO_SIGN_CHANGE
+
+
+def _flussi(lunghezza, crescita=1.02):
+    """Investimento iniziale e rientri crescenti, come i flussi del benchmark"""
+    flussi = 80.0 * crescita ** np.arange(lunghezza)
+    flussi[0] = -1000.0
+    flussi[-1] += 1200.0
+    return flussi
+
+
+@pytest.mark.parametrize('lunghezza', [10, 30, 100, 200, 1200])
+def test_residuo_e_iterazioni_su_orizzonti_lunghi(lunghezza):
+    flussi = _flussi(lunghezza)
+    risultato = solve_irr_batch(flussi)
+    assert risultato['status'][0] == IRR_CONVERGED
+    assert risultato['iterations'][0] <= 6
+    valore, derivata = npv_potenze(flussi[None, :], risultato['irr'])
+    # Residuo equivalente a un errore sul tasso sotto 1e-12
+    assert abs(valore[0] / derivata[0]) < 1e-12
+
+
+def test_radici_casuali():
+    generatore = np.random.default_rng(0)
+    for periodi in (5, 40, 400):
+        flussi = generatore.normal(100, 300, (2000, periodi))
+        flussi[:, 0] = -generatore.uniform(500, 5000, 2000)
+        risultato = solve_irr_batch(flussi, fallback=False)
+        convergenti = risultato['status'] == IRR_CONVERGED
+        assert convergenti.mean() > 0.5
+        valore, derivata = npv_potenze(flussi[convergenti], risultato['irr'][convergenti])
+        assert np.all(np.abs(valore / derivata) <= 1e-12 * (1 + np.abs(risultato['irr'][convergenti])))
+
+
+def test_tasso_noto_e_senza_cambio_di_segno():
+    # 1000 oggi, 1100 fra un anno: 10%
+    risultato = solve_irr_batch([[-1000.0, 1100.0], [100.0, 100.0]])
+    assert risultato['irr'][0] == pytest.approx(0.1, abs=1e-12)
+    assert risultato['status'][1] == IRR_NO_SIGN_CHANGE
+
+
+def test_xirr_su_date():
+    date = np.array(['2020-01-01', '2021-01-01', '2022-01-01'], dtype='datetime64[D]')
+    risultato = solve_xirr_batch([[-1000.0, 50.0, 1100.0]], date)
+    tempi = (date - date[0]) / np.timedelta64(1, 'D') / 365
+    valore, _ = npv_potenze(np.array([[-1000.0, 50.0, 1100.0]]), risultato['irr'], tempi=tempi)
+    assert abs(valore[0]) < 1e-8
+
+
+@pytest.mark.parametrize('lunghezza', [3, 60, 1200])
+def test_npv_potenze_uguale_a_horner(lunghezza):
+    generatore = np.random.default_rng(lunghezza)
+    flussi = generatore.normal(0, 100, (50, lunghezza))
+    tassi = generatore.uniform(-0.05, 0.3, 50)
+    valore_h, derivata_h = npv_horner(flussi, tassi)
+    valore_p, derivata_p = npv_potenze(flussi, tassi)
+    # Scala degli errori di arrotondamento: NPV e derivata dei flussi in valore assoluto
+    scala, scala_derivata = npv_potenze(np.abs(flussi), tassi)
+    np.testing.assert_array_less(np.abs(valore_p - valore_h), 1e-12 * scala)
+    np.testing.assert_array_less(np.abs(derivata_p - derivata_h), 1e-12 * np.abs(scala_derivata))
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from montecarlo import generate_paths, CONFIGURAZIONE_DEFAULT, LIMITI_DRIVER
+
+
+@pytest.mark.parametrize('sfitto', [0.5, 2.0, 5.0, 30.0])
+def test_media_sfitto_non_distorta_dai_limiti(params_base, sfitto):
+    params = dict(params_base, periodo_sfitto_perc=sfitto, anni_investimento=20)
+    percorsi = generate_paths(params, CONFIGURAZIONE_DEFAULT, np.arange(20000), seed=1)
+    valori = percorsi['periodo_sfitto_perc']
+    minimo, massimo = LIMITI_DRIVER['periodo_sfitto_perc']
+    assert valori.min() >= minimo and valori.max() <= massimo
+    # Errore standard della media su 400k valori (correlati solo tra driver)
+    errore = valori.std() / np.sqrt(valori.size)
+    assert abs(valori.mean() - sfitto) < 5 * errore + 1e-9
+
+
+def test_sfitto_nullo_resta_nullo(params_base):
+    params = dict(params_base, periodo_sfitto_perc=0.0)
+    percorsi = generate_paths(params, CONFIGURAZIONE_DEFAULT, np.arange(1000))
+    assert np.all(percorsi['periodo_sfitto_perc'] == 0)
+
+
+def test_percorsi_riproducibili_per_indice(params_base):
+    tutti = generate_paths(params_base, CONFIGURAZIONE_DEFAULT, np.arange(100), seed=3)
+    parte = generate_paths(params_base, CONFIGURAZIONE_DEFAULT, np.arange(40, 60), seed=3)
+    for chiave, valori in parte.items():
+        np.testing.assert_array_equal(valori, tutti[chiave][40:60])
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from batch import calculate_real_estate_investment_batch, params_to_batch
+from monthly import calculate_monthly_cash_flows_batch, calculate_monthly_cash_flows, monthly_dates, VOCI_MENSILI
+from irr import solve_xirr_batch, IRR_CONVERGED
+
+
+def test_somme_annuali_uguali_al_motore_annuale(params_casuali):
+    params_batch = params_to_batch(params_casuali(60, seed=14))
+    annuale = calculate_real_estate_investment_batch(params_batch)
+    mensile = calculate_monthly_cash_flows_batch(params_batch)
+    n = len(params_batch['anni_investimento'])
+    netto = sum(mensile[voce] for voce in VOCI_MENSILI).reshape(n, -1, 12).sum(axis=2)
+
+    # Flussi annuali al netto di vendita e commissione finale
+    atteso = annuale['cash_flows_nominal'][:, 1:].copy()
+    righe = np.arange(n)
+    atteso[righe, params_batch['anni_investimento'] - 1] -= annuale['valore_finale_nominale'] - params_batch['commissione_finale']
+    np.testing.assert_allclose(netto, atteso, rtol=1e-12, atol=1e-8)
+
+    # Investimento e vendita restano alle date di acquisto e di fine orizzonte
+    totale = mensile['flussi_nominali'].sum(axis=1)
+    np.testing.assert_allclose(totale, annuale['cash_flows_nominal'].sum(axis=1), rtol=1e-12, atol=1e-7)
+
+
+def test_date_a_fine_mese():
+    date = monthly_dates('2024-01-31', 3)
+    assert date.astype(str).tolist() == ['2024-01-31', '2024-02-29', '2024-03-31', '2024-04-30']
+
+
+def test_xirr_di_flussi_mensili_a_tasso_noto():
+    date = monthly_dates('2025-01-01', 120)
+    tempi = (date - date[0]) / np.timedelta64(1, 'D') / 365
+    flussi = np.full(121, 100.0)
+    # Investimento iniziale pari al valore attuale dei rientri al 6%
+    flussi[0] = -np.sum(flussi[1:] / 1.06 ** tempi[1:])
+    risultato = solve_xirr_batch(flussi[None, :], date)
+    assert risultato['status'][0] == IRR_CONVERGED
+    assert risultato['irr'][0] == pytest.approx(0.06, abs=1e-12)
+
+
+def test_versione_scalare(params_base):
+    scalare = calculate_monthly_cash_flows(params_base)
+    batch = calculate_monthly_cash_flows_batch(params_to_batch([params_base]))
+    assert len(scalare['flussi_nominali']) == 12 * params_base['anni_investimento'] + 1
+    assert scalare['xirr_nominale'] == pytest.approx(batch['xirr_nominale'][0], rel=1e-12)
+    assert scalare['rate_mutuo'][0] == -params_base['rata_mutuo_mensile']
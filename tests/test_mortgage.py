@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from mortgage import (
+    amortization_schedule_batch,
+    amortization_schedule,
+    calculate_payment,
+    outstanding_balance,
+    implied_rate_batch,
+    calculate_leverage_batch,
+)
+
+
+def _mutui(n, seed=0):
+    generatore = np.random.default_rng(seed)
+    return (
+        generatore.uniform(10000, 500000, n),
+        generatore.uniform(0, 8, n),
+        generatore.integers(12, 361, n),
+    )
+
+
+def test_debito_residuo_si_azzera_alla_scadenza():
+    capitale, tasso, durata = _mutui(300)
+    piano = amortization_schedule_batch(capitale, tasso, durata)
+    righe = np.arange(len(capitale))
+    assert np.all(piano['debito_residuo'][righe, durata - 1] == 0.0)
+    np.testing.assert_array_equal(piano['mesi_estinzione'], durata)
+    # Le quote capitale restituiscono esattamente il capitale
+    np.testing.assert_allclose(piano['quota_capitale'].sum(axis=1), capitale, rtol=1e-10)
+    np.testing.assert_allclose(piano['rata'].sum(axis=1), capitale + piano['totale_interessi'], rtol=1e-10)
+
+
+def test_piano_uguale_alla_ricorrenza_mese_per_mese():
+    capitale, tasso, durata = 150000.0, 3.6, 240
+    piano = amortization_schedule(capitale, tasso, durata // 12)
+    rata = float(calculate_payment(capitale, tasso / 1200, durata))
+    saldo = capitale
+    for mese in range(durata):
+        interessi = saldo * tasso / 1200
+        saldo -= rata - interessi
+        assert piano['interessi'][mese] == pytest.approx(interessi, rel=1e-9, abs=1e-9)
+        assert piano['debito_residuo'][mese] == pytest.approx(max(saldo, 0.0), rel=1e-8, abs=1e-6)
+
+
+def test_rimborso_anticipato():
+    capitale, tasso, durata = 100000.0, 4.0, 20
+    base = amortization_schedule(capitale, tasso, durata)
+    rata_ridotta = amortization_schedule(capitale, tasso, durata, {59: 20000.0}, 'rata')
+    durata_ridotta = amortization_schedule(capitale, tasso, durata, {59: 20000.0}, 'durata')
+    assert rata_ridotta['mesi_estinzione'] == base['mesi_estinzione'] == 240
+    assert rata_ridotta['rata'][60] < base['rata'][60]
+    assert durata_ridotta['mesi_estinzione'] < 240
+    assert durata_ridotta['rata'][60] == pytest.approx(base['rata'][60])
+    for piano in (rata_ridotta, durata_ridotta):
+        assert piano['debito_residuo'][-1] == 0.0
+        assert sum(piano['quota_capitale']) + sum(piano['rimborsi_anticipati']) == pytest.approx(capitale)
+        assert piano['totale_interessi'] < base['totale_interessi']
+
+
+def test_tasso_implicito_inverte_la_rata():
+    capitale, tasso, durata = _mutui(200, seed=1)
+    tasso = np.maximum(tasso, 0.1)
+    rata = calculate_payment(capitale, tasso / 1200, durata)
+    np.testing.assert_allclose(implied_rate_batch(capitale, rata, durata), tasso, rtol=1e-9)
+    np.testing.assert_allclose(outstanding_balance(capitale, tasso / 1200, rata, durata), 0.0, atol=1e-6)
+
+
+def test_leva_debito_finale():
+    leva = calculate_leverage_batch([100000.0, 0.0], [600.0, 600.0], [20, 20], [5, 5])
+    rata_pagate = 600.0 * 60
+    assert leva['valido'].tolist() == [True, False]
+    assert 100000.0 - rata_pagate < leva['debito_finale'][0] < 100000.0
+    assert leva['debito_finale'][1] == 0.0
+    # Oltre la durata del mutuo il debito è estinto
+    assert calculate_leverage_batch([100000.0], [600.0], [20], [30])['debito_finale'][0] == 0.0
@@ -0,0 +1,21 @@
+import pytest
+from optimizer import optimize_investment, default_variables, financing_variables, VARIABILI_MUTUO
+
+
+def test_default_finanzia_con_debito(params_base):
+    risultato = optimize_investment(params_base, generazioni=30)
+    assert risultato['ammissibile']
+    assert risultato['params']['debito_residuo_mutuo'] > 0
+    assert risultato['params']['rata_mutuo_mensile'] > 0
+
+
+def test_senza_tasso_il_mutuo_non_e_variabile(params_base):
+    assert not set(VARIABILI_MUTUO) & set(default_variables(params_base))
+    risultato = optimize_investment(params_base, metrica='tir_nominale', tasso_mutuo_perc=None, generazioni=10)
+    assert risultato['params']['rata_mutuo_mensile'] == params_base['rata_mutuo_mensile']
+
+
+def test_ristrutturazione_solo_con_costo_acquisto(params_base):
+    assert 'costo_ristrutturazione' not in financing_variables(params_base)
+    with pytest.raises(ValueError):
+        optimize_investment(params_base, {'costo_ristrutturazione': (0.0, 1000.0)})
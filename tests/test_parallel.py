@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from batch import calculate_real_estate_investment_batch, params_to_batch, CHIAVE_EVENTI
+from events import make_events
+from parallel import evaluate_parallel, split_rows
+
+
+@pytest.fixture
+def scenari(params_casuali):
+    params_batch = params_to_batch(params_casuali(300, seed=25))
+    generatore = np.random.default_rng(25)
+    anni_max = int(params_batch['anni_investimento'].max())
+    percorsi = {
+        'rivalutazione_annua': generatore.normal(2, 3, (300, anni_max)),
+        CHIAVE_EVENTI: make_events(generatore.integers(1, 10, 200), generatore.normal(0, 5000, 200), riga=generatore.integers(0, 300, 200)),
+    }
+    return params_batch, percorsi
+
+
+def _confronta(parallelo, unico):
+    for chiave, valori in parallelo.items():
+        atteso = np.asarray(unico[chiave])
+        if valori.dtype.kind == 'f':
+            np.testing.assert_allclose(valori, atteso, rtol=1e-12, equal_nan=True, err_msg=chiave)
+        else:
+            np.testing.assert_array_equal(valori, atteso, err_msg=chiave)
+
+
+def test_blocchi_in_sequenza_uguali_al_batch_unico(scenari):
+    params_batch, percorsi = scenari
+    unico = calculate_real_estate_investment_batch(params_batch, percorsi)
+    parallelo = evaluate_parallel(params_batch, percorsi, metriche=None, workers=1, max_elementi=500)
+    assert set(parallelo) == set(unico)
+    _confronta(parallelo, unico)
+
+
+def test_due_processi_uguali_al_batch_unico(scenari):
+    params_batch, percorsi = scenari
+    unico = calculate_real_estate_investment_batch(params_batch, percorsi)
+    _confronta(evaluate_parallel(params_batch, percorsi, metriche=('tir_nominale', 'cagr_reale', 'cash_flows_nominal', 'valori_annuali'), workers=2), unico)
+
+
+def test_suddivisione_delle_righe():
+    blocchi = split_rows(1000, 10, 3, max_elementi=1000)
+    assert blocchi[0][0] == 0 and blocchi[-1][1] == 1000
+    assert all(fine == inizio for (_, fine), (inizio, _) in zip(blocchi, blocchi[1:]))
+    assert all((fine - inizio) * 10 <= 1000 for inizio, fine in blocchi)
+    assert len(split_rows(1000, 10, 3)) == 12
+    assert split_rows(2, 10, 8) == [(0, 1), (1, 2)]
+    with pytest.raises(ValueError):
+        evaluate_parallel({'valore_immobile': 1.0}, workers=0)
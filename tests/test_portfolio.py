@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from batch import calculate_real_estate_investment_batch, params_to_batch
+from portfolio import calculate_portfolio_batch, calculate_portfolio
+
+
+def test_portafoglio_di_un_immobile_uguale_al_calcolo_singolo(params_casuali):
+    for params in params_casuali(30, seed=19):
+        portafoglio = calculate_portfolio([params], [2030])
+        singolo = calculate_real_estate_investment_batch(params_to_batch([params]))
+        np.testing.assert_allclose(portafoglio['flussi'], singolo['cash_flows_nominal'][0, :params['anni_investimento'] + 1], rtol=1e-12)
+        np.testing.assert_allclose(portafoglio['tir_nominale'], singolo['tir_nominale'][0], rtol=1e-9, equal_nan=True)
+        assert portafoglio['rendimento_totale_nominale'] == pytest.approx(singolo['rendimento_totale_nominale'][0], rel=1e-12)
+        np.testing.assert_allclose(portafoglio['cagr_nominale'], singolo['cagr_nominale'][0], rtol=1e-9, equal_nan=True)
+        assert portafoglio['calendario'].tolist() == list(range(2030, 2031 + params['anni_investimento']))
+        assert portafoglio['immobili_detenuti'].tolist() == [1] * (params['anni_investimento'] + 1)
+
+
+def test_flussi_sfalsati_e_contributi(params_casuali):
+    params = params_casuali(5, seed=20)
+    anni_acquisto = np.array([2020, 2022, 2020, 2025, 2021])
+    portafoglio = calculate_portfolio_batch(params_to_batch(params), anni_acquisto)
+    atteso = np.zeros(len(portafoglio['calendario']))
+    for p, anno in zip(params, anni_acquisto):
+        flussi = calculate_real_estate_investment_batch(params_to_batch([p]))['cash_flows_nominal'][0, :p['anni_investimento'] + 1]
+        atteso[anno - 2020:anno - 2020 + len(flussi)] += flussi
+    np.testing.assert_allclose(portafoglio['flussi'], atteso, rtol=1e-12, atol=1e-6)
+    # Al TIR del portafoglio la somma dei VAN dei singoli immobili è nulla
+    assert np.isfinite(portafoglio['tir_nominale'])
+    contributi = portafoglio['contributi']
+    assert abs(contributi['valore_attuale_netto'].sum()) < 1e-6 * np.abs(atteso).sum()
+    assert contributi['quota_investimento'].sum() == pytest.approx(100.0)
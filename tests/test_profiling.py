@@ -0,0 +1,50 @@
+import threading
+import pytest
+import profiling
+
+
+@pytest.mark.skipif(profiling._abilitato, reason="IMMOBILIARE_PROFILING attivo: la raccolta di processo non è vuota")
+def test_raccolta_di_sessione_isolata():
+    raccolte = [profiling.Collector() for _ in range(2)]
+    pronti = threading.Barrier(2)
+
+    def sessione(raccolta, chiamate):
+        with profiling.collecting(raccolta):
+            pronti.wait()
+            for _ in range(chiamate):
+                with profiling.span('calcolo'):
+                    pass
+                profiling.increment('richieste')
+
+    thread = [threading.Thread(target=sessione, args=(raccolta, chiamate)) for raccolta, chiamate in zip(raccolte, (3, 5))]
+    for t in thread:
+        t.start()
+    for t in thread:
+        t.join()
+
+    for raccolta, chiamate in zip(raccolte, (3, 5)):
+        stato = raccolta.snapshot()
+        assert stato['span']['calcolo']['chiamate'] == chiamate
+        assert stato['contatori'] == {'richieste': chiamate}
+    # Fuori dalle sessioni non si raccoglie nulla
+    assert not profiling.is_enabled()
+    assert profiling.snapshot()['span'] == {}
+
+
+def test_profiled_e_section_timer():
+    raccolta = profiling.Collector()
+
+    @profiling.profiled('funzione')
+    def funzione(x):
+        return x * 2
+
+    assert funzione(2) == 4
+    with profiling.collecting(raccolta):
+        assert funzione(3) == 6
+        timer = profiling.SectionTimer('pagina')
+        timer.tappa('a')
+        timer.tappa('b')
+    stato = raccolta.snapshot()
+    assert stato['span']['funzione']['chiamate'] == 1
+    assert {'pagina.a', 'pagina.b'} <= set(stato['span'])
+    assert [nome for nome, _ in stato['recenti']][0] == 'pagina.b'
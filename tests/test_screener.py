@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+from batch import calculate_real_estate_investment_batch
+from screener import screen_chunks, screen_file, listings_to_batch, COLONNA_PREZZO, COLONNA_AFFITTO
+
+
+@pytest.fixture
+def annunci():
+    generatore = np.random.default_rng(20)
+    n = 1000
+    annunci = pd.DataFrame({
+        'id': np.arange(n),
+        COLONNA_PREZZO: np.round(generatore.uniform(50000, 400000, n), -3),
+        COLONNA_AFFITTO: np.round(generatore.uniform(300, 1500, n), -2),
+        'citta': generatore.choice(['Milano', 'Roma', 'Torino'], n),
+        'superficie_mq': generatore.uniform(30, 150, n),
+    })
+    annunci.loc[::97, COLONNA_PREZZO] = 0.0
+    # Annunci ripetuti: a parità di metrica prevale quello letto prima
+    annunci.iloc[500:520, 1:] = annunci.iloc[0:20, 1:].to_numpy()
+    return annunci
+
+
+@pytest.mark.parametrize('metrica', ['tir_nominale', 'roe_nominale'])
+def test_migliori_k_a_blocchi_uguali_all_ordinamento_completo(annunci, metrica):
+    validi = annunci[annunci[COLONNA_PREZZO] > 0].reset_index(drop=True)
+    valori = calculate_real_estate_investment_batch(listings_to_batch(validi))[metrica]
+    ordine = sorted(range(len(validi)), key=lambda i: (-valori[i], i))[:25]
+
+    blocchi = (annunci.iloc[inizio:inizio + 64] for inizio in range(0, len(annunci), 64))
+    migliori, letti = screen_chunks(blocchi, k=25, metrica=metrica)
+    assert letti == len(annunci)
+    assert migliori['id'].tolist() == validi['id'].iloc[ordine].tolist()
+    np.testing.assert_allclose(migliori[metrica], valori[ordine], rtol=1e-12)
+
+
+def test_da_file(annunci, tmp_path):
+    percorso = tmp_path / 'annunci.csv'
+    annunci.to_csv(percorso, index=False)
+    da_file, letti = screen_file(percorso, k=10, chunk_size=100)
+    in_memoria, _ = screen_chunks([annunci], k=10)
+    assert letti == len(annunci)
+    assert da_file['id'].tolist() == in_memoria['id'].tolist()
+
+
+def test_colonne_mancanti(annunci):
+    with pytest.raises(ValueError):
+        screen_chunks([annunci.drop(columns=[COLONNA_AFFITTO])])
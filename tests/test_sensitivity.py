@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from calcoli import calculate_real_estate_investment_improved
+from sensitivity import tornado_analysis
+
+
+def test_tornado_uguale_alle_rivalutazioni_singole(params_base):
+    esito = tornado_analysis(params_base, variazione_perc=20, metriche=('tir_nominale', 'cagr_nominale'))
+    assert esito['base']['tir_nominale'] == pytest.approx(calculate_real_estate_investment_improved(params_base)['tir_nominale'])
+    for voce in esito['classifiche']['tir_nominale']:
+        basso = calculate_real_estate_investment_improved(dict(params_base, **{voce['chiave']: voce['valore_basso']}))
+        alto = calculate_real_estate_investment_improved(dict(params_base, **{voce['chiave']: voce['valore_alto']}))
+        assert voce['metrica_basso'] == pytest.approx(basso['tir_nominale'], rel=1e-9, abs=1e-9)
+        assert voce['metrica_alto'] == pytest.approx(alto['tir_nominale'], rel=1e-9, abs=1e-9)
+
+
+def test_classifica_ordinata_e_senza_parametri_nulli(params_base):
+    esito = tornado_analysis(params_base)
+    for classifica in esito['classifiche'].values():
+        impatti = np.array([voce['impatto'] for voce in classifica])
+        finiti = impatti[np.isfinite(impatti)]
+        assert np.all(np.diff(finiti) <= 0)
+        assert all(params_base[voce['chiave']] != 0 for voce in classifica)
+
+
+def test_interi_spostati_di_almeno_un_anno(params_base):
+    esito = tornado_analysis(dict(params_base, adeguamento_affitto_anni=1), variazione_perc=5)
+    voce = next(v for v in esito['classifiche']['tir_nominale'] if v['chiave'] == 'adeguamento_affitto_anni')
+    assert (voce['valore_basso'], voce['valore_alto']) == (1, 2)
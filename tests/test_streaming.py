@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from streaming import OnlineMoments, TDigest, iter_blocks, METRICHE_STREAMING
+from montecarlo import simulate_monte_carlo
+
+
+def test_momenti_a_blocchi_uguali_ai_momenti_esatti():
+    valori = np.random.default_rng(0).normal(5, 2, (10000, 3))
+    valori[::7, 1] = np.nan
+    momenti = OnlineMoments(forma=(3,))
+    altro = OnlineMoments(forma=(3,))
+    for inizio, fine in iter_blocks(6000, 1234):
+        momenti.update(valori[inizio:fine])
+    altro.update(valori[6000:])
+    momenti.merge(altro)
+    np.testing.assert_allclose(momenti.media, np.nanmean(valori, axis=0), rtol=1e-12)
+    np.testing.assert_allclose(momenti.dev_std, np.nanstd(valori, axis=0), rtol=1e-10)
+    assert momenti.mancanti[1] == np.isnan(valori[:, 1]).sum()
+
+
+def test_quantili_tdigest_entro_lo_0_1_percento_di_rango():
+    valori = np.random.default_rng(1).lognormal(0, 1, 200000)
+    digest = TDigest()
+    for inizio, fine in iter_blocks(valori.size, 10000):
+        digest.update(valori[inizio:fine])
+    q = np.array([0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99])
+    ranghi = np.searchsorted(np.sort(valori), digest.quantile(q)) / valori.size
+    assert np.max(np.abs(ranghi - q)) < 0.001
+
+
+def test_monte_carlo_a_blocchi_uguale_all_esatto(params_base):
+    esatto = simulate_monte_carlo(params_base, n_percorsi=6000, seed=2)
+    blocchi = simulate_monte_carlo(params_base, n_percorsi=6000, seed=2, dimensione_blocco=1000)
+    assert set(esatto) == set(blocchi)
+    for metrica in METRICHE_STREAMING:
+        assert blocchi[metrica]['media'] == pytest.approx(esatto[metrica]['media'], rel=1e-9, abs=1e-12)
+        assert blocchi[metrica]['dev_std'] == pytest.approx(esatto[metrica]['dev_std'], rel=1e-7, abs=1e-12)
+        assert blocchi[metrica]['quota_non_calcolabile'] == esatto[metrica]['quota_non_calcolabile']
+    for serie in ('valori_annuali', 'affitti_netti_annuali'):
+        np.testing.assert_allclose(blocchi[f'media_{serie}'], esatto[f'media_{serie}'], rtol=1e-10)
+        np.testing.assert_allclose(blocchi[f'bande_{serie}'], esatto[f'bande_{serie}'], rtol=1e-2)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from batch import calculate_real_estate_investment_batch, normalize_batch, params_to_batch
+from stress import stress_test_batch, shock_batch, SCENARI_STRESS, METRICHE_STRESS
+
+
+def _con_debito(params):
+    """Debito residuo coerente con la rata a un tasso del 3%"""
+    for p in params:
+        if p['rata_mutuo_mensile'] > 0 and p['anni_restanti_mutuo'] > 0:
+            mesi = 12 * p['anni_restanti_mutuo']
+            p['debito_residuo_mutuo'] = p['rata_mutuo_mensile'] * (1 - 1.0025 ** -mesi) / 0.0025
+    return params
+
+
+def test_batch_impilato_uguale_agli_scenari_separati(params_casuali):
+    params_batch = params_to_batch(_con_debito(params_casuali(30, seed=23)))
+    esito = stress_test_batch(params_batch)
+    base = calculate_real_estate_investment_batch(params_batch)
+    p, n = normalize_batch(params_batch)
+    assert esito['scenari'] == list(SCENARI_STRESS)
+    for metrica in METRICHE_STRESS:
+        np.testing.assert_allclose(esito['base'][metrica], base[metrica], rtol=1e-9, equal_nan=True)
+    for indice, shock in enumerate(SCENARI_STRESS.values()):
+        q, percorsi, non_applicato = shock_batch(p, n, shock)
+        assert not non_applicato.any()
+        singolo = calculate_real_estate_investment_batch(q, percorsi)
+        for metrica in METRICHE_STRESS:
+            np.testing.assert_allclose(esito['valori'][metrica][indice], singolo[metrica], rtol=1e-9, atol=1e-12, equal_nan=True)
+            np.testing.assert_allclose(esito['delta'][metrica][indice], singolo[metrica] - base[metrica], rtol=1e-7, atol=1e-9, equal_nan=True)
+
+
+def test_shock_nullo(params_casuali):
+    scenari = {'nullo': {'params': {'costi_gestione_euro': ('scala', 0.0)}, 'tasso_mutuo_bp': 0}}
+    esito = stress_test_batch(params_to_batch(params_casuali(20, seed=24)), scenari)
+    for metrica in METRICHE_STRESS:
+        finiti = np.isfinite(esito['delta'][metrica])
+        assert np.all(esito['delta'][metrica][finiti] == 0.0)
+
+
+def test_aumento_dei_tassi(params_base):
+    con_debito = _con_debito([dict(params_base)])[0]
+    esito = stress_test_batch(params_to_batch([con_debito, params_base]), ['tassi_+300bp'])
+    # Con il debito la rata sale e il TIR scende; senza debito lo shock non è applicabile
+    assert esito['delta']['tir_nominale'][0, 0] < 0
+    assert esito['non_applicato'][0].tolist() == [False, True]
+    assert np.isnan(esito['valori']['tir_nominale'][0, 1])
+    with pytest.raises(ValueError):
+        stress_test_batch(params_base, ['inesistente'])
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from calcoli import calculate_real_estate_investment_improved
+from sweep import sweep_grid, METRICHE_SWEEP
+
+ASSI = {
+    'valore_immobile': np.linspace(120000, 260000, 8),
+    'affitto_lordo': np.linspace(6000, 14000, 6),
+    'anni_investimento': [5, 12, 25],
+}
+
+
+def test_celle_uguali_al_calcolo_singolo(params_base):
+    griglia = sweep_grid(params_base, ASSI)
+    assert griglia['forma'] == (8, 6, 3)
+    for i, j, k in [(0, 0, 0), (3, 2, 1), (7, 5, 2)]:
+        params = dict(params_base, valore_immobile=float(ASSI['valore_immobile'][i]),
+                      affitto_lordo=float(ASSI['affitto_lordo'][j]), anni_investimento=ASSI['anni_investimento'][k])
+        atteso = calculate_real_estate_investment_improved(params)
+        for metrica in METRICHE_SWEEP:
+            assert griglia[metrica][i, j, k] == pytest.approx(atteso[metrica], rel=1e-9, abs=1e-9)
+
+
+def test_griglia_a_blocchi_uguale_al_batch_unico(params_base):
+    unico = sweep_grid(params_base, ASSI)
+    # Blocchi da 10 celle su 25 anni, valutati in sequenza nel processo corrente
+    blocchi = sweep_grid(params_base, ASSI, max_elementi=250, max_workers=1)
+    # Blocchi piccoli: NPV con le potenze invece di Horner, differenze all'ultima cifra
+    for metrica in METRICHE_SWEEP:
+        np.testing.assert_allclose(blocchi[metrica], unico[metrica], rtol=1e-9, atol=1e-12)
+
+
+def test_chiave_inesistente(params_base):
+    with pytest.raises(KeyError):
+        sweep_grid(params_base, {'prezzo': [1, 2]})
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from batch import calculate_real_estate_investment_batch
+from tenant import (
+    simulate_tenant_paths,
+    simulate_tenant_model,
+    transition_matrix,
+    CONFIGURAZIONE_INQUILINI_DEFAULT,
+)
+
+
+def test_matrice_di_transizione():
+    matrice = transition_matrix(CONFIGURAZIONE_INQUILINI_DEFAULT)
+    np.testing.assert_allclose(matrice.sum(axis=1), 1.0, rtol=1e-15)
+    assert np.all(matrice >= 0)
+    with pytest.raises(ValueError):
+        transition_matrix(dict(CONFIGURAZIONE_INQUILINI_DEFAULT, probabilita_disdetta_annua=100.0, probabilita_morosita_annua=50.0))
+
+
+def test_sfitto_di_lungo_periodo_uguale_alla_distribuzione_stazionaria(params_base):
+    params = dict(params_base, anni_investimento=20)
+    matrice = transition_matrix(CONFIGURAZIONE_INQUILINI_DEFAULT)
+    autovalori, autovettori = np.linalg.eig(matrice.T)
+    stazionaria = np.real(autovettori[:, np.argmin(np.abs(autovalori - 1))])
+    stazionaria /= stazionaria.sum()
+    percorsi = simulate_tenant_paths(params, {}, np.arange(20000), seed=3)
+    # Dopo i primi anni la catena ha dimenticato lo stato iniziale (occupato)
+    sfitto = percorsi['periodo_sfitto_perc'][:, 5:].mean()
+    assert sfitto == pytest.approx((1 - stazionaria[0]) * 100, abs=0.3)
+
+
+def test_percorsi_indipendenti_dai_blocchi(params_base):
+    interi = simulate_tenant_paths(params_base, {}, np.arange(200), seed=7)
+    parte = simulate_tenant_paths(params_base, {}, np.arange(120, 200), seed=7)
+    for chiave, valori in parte.items():
+        np.testing.assert_array_equal(valori, interi[chiave][120:])
+
+
+def test_senza_uscite_uguale_al_calcolo_senza_sfitto(params_base):
+    configurazione = {'probabilita_disdetta_annua': 0.0, 'probabilita_morosita_annua': 0.0}
+    sintesi = simulate_tenant_model(params_base, configurazione, n_percorsi=50)
+    deterministico = calculate_real_estate_investment_batch(dict(params_base, periodo_sfitto_perc=0.0))
+    assert sintesi['rilocazioni_medie'] == 0.0
+    assert np.all(sintesi['sfitto_medio_annuo'] == 0.0)
+    assert sintesi['tir_nominale']['media'] == pytest.approx(deterministico['tir_nominale'][0], rel=1e-9)
@@ -1,7 +1,61 @@
 import streamlit as st
+import pandas as pd
+import altair as alt
+import numpy as np
 from utils import format_currency, format_percentage
-from calcoli import calculate_real_estate_investment_improved
+from cache import cached_real_estate_investment
+from montecarlo import simulate_monte_carlo
+from sweep import sweep_grid
+from sensitivity import tornado_analysis
+from holding import calculate_holding_period_batch
+from goalseek import goal_seek, VARIABILI_OBIETTIVO
+from optimizer import optimize_investment, financing_variables, default_variables, METRICA_DEFAULT, TASSO_MUTUO_DEFAULT
+from portfolio import calculate_portfolio_batch
+from tables import frame_to_batch, CHUNK_SIZE_DEFAULT
+from screener import screen_chunks, TOP_DEFAULT
+from backtest import load_series, backtest_rolling, COLONNA_CITTA
+from tenant import simulate_tenant_model, CONFIGURAZIONE_INQUILINI_DEFAULT
+from stress import stress_test_batch, SCENARI_STRESS
+from events import make_events
+from batch import calculate_real_estate_investment_batch, CHIAVE_EVENTI
+from mortgage import implied_rate_batch, SOGLIA_RATA_SOSTENIBILE_PERC, SOGLIA_RATA_IMPEGNATIVA_PERC
 from i18n import get_text, render_language_selector
+import profiling
+from profiling import profiled, SectionTimer
+
+MC_BLOCCO_UI = 50000
+
+# Parametri numerici analizzabili (chiave params -> chiave di traduzione dell'etichetta)
+PARAMETRI_ANALISI = {
+    'valore_immobile': 'property_value',
+    'costo_acquisto': 'purchase_cost',
+    'costo_ristrutturazione': 'renovation_cost',
+    'affitto_lordo': 'annual_rent',
+    'rivalutazione_annua': 'annual_appreciation',
+    'anni_investimento': 'investment_years',
+    'costi_assicurazione_euro': 'insurance_costs',
+    'costi_gestione_euro': 'annual_fixed_costs',
+    'manutenzione_straordinaria_perc': 'extraordinary_maintenance',
+    'tassazione_affitti_perc': 'rent_taxation',
+    'tassa_catastale_perc': 'property_tax',
+    'rata_mutuo_mensile': 'monthly_mortgage',
+    'anni_restanti_mutuo': 'remaining_mortgage_years',
+    'debito_residuo_mutuo': 'mortgage_outstanding_debt',
+    'periodo_sfitto_perc': 'vacancy_period',
+    'inflazione_perc': 'annual_inflation',
+    'commissione_iniziale': 'initial_commission',
+    'commissione_finale': 'final_commission',
+    'adeguamento_affitto_anni': 'rent_adjustment_years',
+}
+
+# Metriche mostrate nelle analisi (chiave risultati -> chiave di traduzione)
+METRICHE_ANALISI = {
+    'tir_nominale': 'tir_nominal',
+    'tir_reale': 'tir_real',
+    'cagr_nominale': 'cagr_nominal_metric',
+    'cagr_reale': 'cagr_real_metric',
+    'roe_nominale': 'roe_nominal_label',
+}
 
 def render_header():
     # Selettore lingua in alto
@@ -39,7 +93,9 @@ def render_footer():
     st.markdown("---")
     st.markdown(f"*{get_text('developed_by')}*")
 
+@profiled('ui.display_real_estate_results_simplified')
 def display_real_estate_results_simplified(results, params):
+    cronometro = SectionTimer('ui.risultati')
     st.success(f"**{get_text('results_title')}**")
 
     # Analisi dell'affare fatto
@@ -78,6 +134,7 @@ def display_real_estate_results_simplified(results, params):
                 elif results['plusvalore_minusvalore_iniziale'] < 0:
                     st.error(f"• Sottratto dal rendimento: {format_currency(results['plusvalore_minusvalore_iniziale'])}")
 
+    cronometro.tappa('investimento_iniziale')
     res_col1, res_col2, res_col3 = st.columns(3)
 
     with res_col1:
@@ -120,6 +177,8 @@ def display_real_estate_results_simplified(results, params):
         rendimento_perc_reale = (results['rendimento_totale_reale'] / params['valore_immobile']) * 100 if params['valore_immobile'] > 0 else 0
         st.write(f"{get_text('return_perc_nominal')}{format_percentage(rendimento_perc_nominale)}")
 
+    cronometro.tappa('valore_affitti_rendimento')
+
     # Nuova sezione per le metriche di performance
     st.markdown("---")
     st.write("**📊 Metriche di Performance:**")
@@ -179,6 +238,8 @@ def display_real_estate_results_simplified(results, params):
         st.write(f"• ROE Annualizzato Nominale: {format_percentage(roe_annualizzato)}")
         st.info(results['roe_note'])
 
+    cronometro.tappa('metriche_performance')
+
     # Confronto metriche se TIR è disponibile
     if results.get('tir_nominale') is not None and results.get('tir_reale') is not None:
         st.markdown("### 🔍 Confronto Metriche:")
@@ -219,6 +280,8 @@ def display_real_estate_results_simplified(results, params):
         else:
             st.warning("⚠️ Differenza significativa tra CAGR e TIR - analizzare la distribuzione dei flussi di cassa")
 
+    cronometro.tappa('confronto_metriche')
+
     # Analisi mutuo se presente
     if results['totale_costi_mutuo'] > 0:
         st.markdown("---")
@@ -242,9 +305,9 @@ def display_real_estate_results_simplified(results, params):
                 
         with mortgage_col2:
             # Usa percentuale mensile per la valutazione
-            if percentuale_rata_mensile < 50:
+            if percentuale_rata_mensile < SOGLIA_RATA_SOSTENIBILE_PERC:
                 st.success(get_text('sustainable_mortgage_monthly'))
-            elif percentuale_rata_mensile < 70:
+            elif percentuale_rata_mensile < SOGLIA_RATA_IMPEGNATIVA_PERC:
                 st.warning(get_text('challenging_mortgage_monthly'))
             else:
                 st.error(get_text('risky_mortgage_monthly'))
@@ -253,6 +316,7 @@ def display_real_estate_results_simplified(results, params):
             miglioramento = rendimento_senza_mutuo - results['rendimento_totale_nominale']
             st.info(f"{get_text('return_without_mortgage')}{format_currency(miglioramento)}")
 
+    cronometro.tappa('mutuo')
     st.markdown("---")
     st.write(f"**{get_text('investment_summary')}**")
     summary_col1, summary_col2 = st.columns(2)
@@ -267,7 +331,9 @@ def display_real_estate_results_simplified(results, params):
             st.write(f"{get_text('total_commissions_deducted')}{format_currency(commissioni_totali)})*")
     with summary_col2:
         st.info(get_text('calculation_note'))
+    cronometro.tappa('riepilogo')
 
+@profiled('ui.render_real_estate_section')
 def render_real_estate_section():
     st.subheader(get_text('real_estate_analysis'))
     st.info(get_text('real_estate_info'))
@@ -343,6 +409,9 @@ def render_real_estate_section():
             get_text('monthly_mortgage'), min_value=0.00, max_value=10000.00, value=0.00, step=50.00, key="real_estate_mortgage_payment")
         anni_restanti_mutuo = st.number_input(
             get_text('remaining_mortgage_years'), min_value=0, max_value=50, value=0, step=1, key="real_estate_mortgage_years")
+        debito_residuo_mutuo = st.number_input(
+            get_text('mortgage_outstanding_debt'), min_value=0.00, max_value=100000000.00, value=0.00, step=1000.00,
+            key="real_estate_mortgage_debt", help=get_text('mortgage_outstanding_debt_help'))
     
     with col3:
         st.write(f"**{get_text('economic_params')}**")
@@ -366,6 +435,12 @@ def render_real_estate_section():
             if anni_restanti_mutuo > 0:
                 costo_totale_mutuo = rata_annua_mutuo * min(anni_restanti_mutuo, anni_investimento)
                 st.info(f"{get_text('total_mortgage_cost')}{format_currency(costo_totale_mutuo)}")
+                if debito_residuo_mutuo > 0:
+                    tasso_implicito = implied_rate_batch(debito_residuo_mutuo, rata_mutuo_mensile, 12 * anni_restanti_mutuo)[0]
+                    if np.isfinite(tasso_implicito):
+                        st.info(f"{get_text('mortgage_implied_rate')}{tasso_implicito:.2f}%")
+                    else:
+                        st.warning(get_text('mortgage_implied_rate_na'))
         if tipo_adeguamento == get_text('property_value_adj'):
             st.info(get_text('property_value_adj_info'))
         elif tipo_adeguamento == get_text('inflation_adj'):
@@ -390,41 +465,777 @@ def render_real_estate_section():
         st.write(get_text('mortgage_note'))
         st.write(get_text('fixed_mortgage_note'))
 
+    # Converti le opzioni tradotte nei valori originali per i calcoli
+    tipo_adeguamento_orig = tipo_adeguamento
+    if tipo_adeguamento == get_text('property_value_adj'):
+        tipo_adeguamento_orig = "Valore Immobile"
+    elif tipo_adeguamento == get_text('inflation_adj'):
+        tipo_adeguamento_orig = "Inflazione"
+    elif tipo_adeguamento == get_text('no_adjustment'):
+        tipo_adeguamento_orig = "Nessun Adeguamento"
+
+    params = {
+        'valore_immobile': valore_immobile,
+        'costo_acquisto': costo_acquisto,
+        'costo_ristrutturazione': costo_ristrutturazione,
+        'affitto_lordo': affitto_lordo,  # Usa l'affitto annuale calcolato
+        'rivalutazione_annua': rivalutazione_annua,
+        'anni_investimento': anni_investimento,
+        'costi_assicurazione_euro': costi_assicurazione_euro,
+        'costi_gestione_euro': costi_gestione_euro,
+        'rata_mutuo_mensile': rata_mutuo_mensile,
+        'anni_restanti_mutuo': anni_restanti_mutuo,
+        'debito_residuo_mutuo': debito_residuo_mutuo,
+        'manutenzione_straordinaria_perc': manutenzione_straordinaria_perc,
+        'tassazione_affitti_perc': tassazione_affitti_perc,
+        'tassa_catastale_perc': tassa_catastale_perc,
+        'periodo_sfitto_perc': periodo_sfitto_perc,
+        'inflazione_perc': inflazione_perc,
+        'adeguamento_affitto_anni': adeguamento_affitto_anni,
+        'tipo_adeguamento': tipo_adeguamento_orig,
+        'commissione_iniziale': commissione_iniziale,
+        'commissione_finale': commissione_finale
+    }
+
     if st.button(get_text('calculate_button'), key="calc_real_estate"):
         try:
-            # Converti le opzioni tradotte nei valori originali per i calcoli
-            tipo_adeguamento_orig = tipo_adeguamento
-            if tipo_adeguamento == get_text('property_value_adj'):
-                tipo_adeguamento_orig = "Valore Immobile"
-            elif tipo_adeguamento == get_text('inflation_adj'):
-                tipo_adeguamento_orig = "Inflazione"
-            elif tipo_adeguamento == get_text('no_adjustment'):
-                tipo_adeguamento_orig = "Nessun Adeguamento"
-            
-            params = {
-                'valore_immobile': valore_immobile,
-                'costo_acquisto': costo_acquisto,
-                'costo_ristrutturazione': costo_ristrutturazione,
-                'affitto_lordo': affitto_lordo,  # Usa l'affitto annuale calcolato
-                'rivalutazione_annua': rivalutazione_annua,
-                'anni_investimento': anni_investimento,
-                'costi_assicurazione_euro': costi_assicurazione_euro,
-                'costi_gestione_euro': costi_gestione_euro,
-                'rata_mutuo_mensile': rata_mutuo_mensile,
-                'anni_restanti_mutuo': anni_restanti_mutuo,
-                'manutenzione_straordinaria_perc': manutenzione_straordinaria_perc,
-                'tassazione_affitti_perc': tassazione_affitti_perc,
-                'tassa_catastale_perc': tassa_catastale_perc,
-                'periodo_sfitto_perc': periodo_sfitto_perc,
-                'inflazione_perc': inflazione_perc,
-                'adeguamento_affitto_anni': adeguamento_affitto_anni,
-                'tipo_adeguamento': tipo_adeguamento_orig,
-                'commissione_iniziale': commissione_iniziale,
-                'commissione_finale': commissione_finale
-            }
-            results = calculate_real_estate_investment_improved(params)
+            results = cached_real_estate_investment(params)
             display_real_estate_results_simplified(results, params)
         except Exception as e:
             st.error(f"{get_text('calculation_error')}{str(e)}")
             st.error(get_text('check_values'))
             st.exception(e)
+
+    render_monte_carlo_section(params)
+    render_tenant_section(params)
+    render_sweep_section(params)
+    render_sensitivity_section(params)
+    render_holding_period_section(params)
+    render_goal_seek_section(params)
+    render_optimizer_section(params)
+    render_screener_section(params)
+    render_backtest_section(params)
+    render_events_section(params)
+    render_stress_section(params)
+
+@profiled('ui.render_monte_carlo_section')
+def render_monte_carlo_section(params):
+    """
+    Sezione Monte Carlo: rivalutazione, inflazione e sfitto come variabili casuali
+    """
+    with st.expander(get_text('monte_carlo_title')):
+        st.info(get_text('monte_carlo_info'))
+        mc_col1, mc_col2, mc_col3 = st.columns(3)
+        with mc_col1:
+            n_percorsi = st.number_input(
+                get_text('mc_paths'), min_value=100, max_value=500000, value=10000, step=1000, key="mc_paths")
+            seed = st.number_input(get_text('mc_seed'), min_value=0, value=0, step=1, key="mc_seed")
+        with mc_col2:
+            dev_std_rivalutazione = st.number_input(
+                get_text('mc_appreciation_std'), min_value=0.0, max_value=50.0, value=3.0, step=0.5, key="mc_appreciation_std")
+            dev_std_inflazione = st.number_input(
+                get_text('mc_inflation_std'), min_value=0.0, max_value=50.0, value=1.0, step=0.5, key="mc_inflation_std")
+            dev_std_sfitto = st.number_input(
+                get_text('mc_vacancy_std'), min_value=0.0, max_value=50.0, value=3.0, step=0.5, key="mc_vacancy_std")
+        with mc_col3:
+            correlazione = st.slider(
+                get_text('mc_correlation'), min_value=-0.9, max_value=0.9, value=0.3, step=0.1, key="mc_correlation",
+                help=get_text('mc_correlation_help'))
+
+        if st.button(get_text('mc_run_button'), key="mc_run"):
+            configurazione = {
+                'rivalutazione_annua': {'distribuzione': 'normale', 'dev_std': dev_std_rivalutazione},
+                'inflazione_perc': {'distribuzione': 'lognormale', 'dev_std': dev_std_inflazione},
+                'periodo_sfitto_perc': {'distribuzione': 'normale', 'dev_std': dev_std_sfitto},
+                'correlazione': [
+                    [1.0, correlazione, 0.0],
+                    [correlazione, 1.0, 0.0],
+                    [0.0, 0.0, 1.0],
+                ],
+            }
+            try:
+                # Oltre MC_BLOCCO_UI percorsi la simulazione procede a blocchi in memoria costante
+                dimensione_blocco = MC_BLOCCO_UI if n_percorsi > MC_BLOCCO_UI else None
+                sintesi = simulate_monte_carlo(
+                    params, configurazione, n_percorsi=int(n_percorsi), seed=int(seed),
+                    dimensione_blocco=dimensione_blocco)
+            except Exception as e:
+                st.error(f"{get_text('calculation_error')}{str(e)}")
+                return
+            display_monte_carlo_results(sintesi)
+
+@profiled('ui.render_tenant_section')
+def render_tenant_section(params):
+    """
+    Ciclo di vita degli inquilini: sfitto, morosità e rilocazioni simulati come catena
+    di Markov mensile al posto del periodo di sfitto fisso
+    """
+    with st.expander(get_text('tenant_title')):
+        st.info(get_text('tenant_info'))
+        default = CONFIGURAZIONE_INQUILINI_DEFAULT
+        ten_col1, ten_col2, ten_col3 = st.columns(3)
+        with ten_col1:
+            disdetta = st.number_input(
+                get_text('tenant_turnover'), min_value=0.0, max_value=100.0,
+                value=default['probabilita_disdetta_annua'], step=1.0, key="tenant_turnover")
+            mesi_sfitto = st.number_input(
+                get_text('tenant_vacancy_months'), min_value=1.0, max_value=60.0,
+                value=default['mesi_sfitto_medi'], step=0.5, key="tenant_vacancy_months")
+            n_percorsi = st.number_input(
+                get_text('mc_paths'), min_value=100, max_value=500000, value=10000, step=1000, key="tenant_paths")
+        with ten_col2:
+            morosita = st.number_input(
+                get_text('tenant_arrears'), min_value=0.0, max_value=100.0,
+                value=default['probabilita_morosita_annua'], step=0.5, key="tenant_arrears")
+            mesi_morosita = st.number_input(
+                get_text('tenant_arrears_months'), min_value=1.0, max_value=60.0,
+                value=default['mesi_morosita_medi'], step=0.5, key="tenant_arrears_months")
+            sanatoria = st.number_input(
+                get_text('tenant_cure'), min_value=0.0, max_value=100.0,
+                value=default['probabilita_sanatoria'], step=5.0, key="tenant_cure")
+        with ten_col3:
+            costi_rilocazione = st.number_input(
+                get_text('tenant_reletting_cost'), min_value=0.0, max_value=24.0,
+                value=default['mesi_costi_rilocazione'], step=0.5, key="tenant_reletting_cost")
+            crescita_mercato = st.number_input(
+                get_text('tenant_market_growth'), min_value=-50.0, max_value=50.0,
+                value=float(params['rivalutazione_annua']), step=0.1, key="tenant_market_growth")
+            seed = st.number_input(get_text('mc_seed'), min_value=0, value=0, step=1, key="tenant_seed")
+
+        if st.button(get_text('tenant_run_button'), key="tenant_run"):
+            configurazione = {
+                'probabilita_disdetta_annua': disdetta,
+                'mesi_sfitto_medi': mesi_sfitto,
+                'probabilita_morosita_annua': morosita,
+                'mesi_morosita_medi': mesi_morosita,
+                'probabilita_sanatoria': sanatoria,
+                'mesi_costi_rilocazione': costi_rilocazione,
+                'crescita_canoni_mercato_perc': crescita_mercato,
+            }
+            try:
+                dimensione_blocco = MC_BLOCCO_UI if n_percorsi > MC_BLOCCO_UI else None
+                sintesi = simulate_tenant_model(
+                    params, configurazione, n_percorsi=int(n_percorsi), seed=int(seed),
+                    dimensione_blocco=dimensione_blocco)
+                deterministico = cached_real_estate_investment(params)
+            except Exception as e:
+                st.error(f"{get_text('calculation_error')}{str(e)}")
+                return
+            display_tenant_results(sintesi, deterministico)
+
+def display_tenant_results(sintesi, deterministico):
+    """Distribuzione del TIR con sfitto simulato, confrontata con lo sfitto fisso"""
+    ten_col1, ten_col2, ten_col3 = st.columns(3)
+    with ten_col1:
+        st.metric(get_text('tenant_median_tir'), format_percentage(sintesi['tir_nominale']['percentili'][2]))
+    with ten_col2:
+        tir_fisso = deterministico.get('tir_nominale')
+        st.metric(get_text('tenant_flat_tir'), format_percentage(tir_fisso) if tir_fisso is not None else "-")
+    with ten_col3:
+        st.metric(get_text('tenant_average_relettings'), f"{sintesi['rilocazioni_medie']:.1f}")
+
+    etichette = [f"P{p}" for p in sintesi['percentili']]
+    righe = {
+        get_text('tir_nominal'): [format_percentage(v) for v in sintesi['tir_nominale']['percentili']],
+        get_text('tir_real'): [format_percentage(v) for v in sintesi['tir_reale']['percentili']],
+        get_text('cagr_nominal_metric'): [format_percentage(v * 100) for v in sintesi['cagr_nominale']['percentili']],
+    }
+    st.write(f"**{get_text('mc_percentiles')}**")
+    st.dataframe(pd.DataFrame(righe, index=etichette).T)
+
+    st.write(f"**{get_text('tenant_vacancy_by_year')}**")
+    anni = range(1, len(sintesi['sfitto_medio_annuo']) + 1)
+    st.line_chart(pd.DataFrame({get_text('vacancy_period'): sintesi['sfitto_medio_annuo']}, index=anni))
+
+def display_monte_carlo_results(sintesi):
+    percentili = sintesi['percentili']
+    etichette = [f"P{p}" for p in percentili]
+
+    righe = {
+        get_text('final_value_nominal_label'): [format_currency(v) for v in sintesi['valore_finale_nominale']['percentili']],
+        get_text('cagr_nominal_metric'): [format_percentage(v * 100) for v in sintesi['cagr_nominale']['percentili']],
+        get_text('cagr_real_metric'): [format_percentage(v * 100) for v in sintesi['cagr_reale']['percentili']],
+        get_text('tir_nominal'): [format_percentage(v) for v in sintesi['tir_nominale']['percentili']],
+        get_text('tir_real'): [format_percentage(v) for v in sintesi['tir_reale']['percentili']],
+    }
+    st.write(f"**{get_text('mc_percentiles')}**")
+    st.dataframe(pd.DataFrame(righe, index=etichette).T)
+
+    quota_tir = sintesi['tir_nominale']['quota_non_calcolabile']
+    if quota_tir > 0:
+        st.warning(f"{get_text('mc_tir_not_available')}{format_percentage(quota_tir * 100)}")
+
+    st.write(f"**{get_text('mc_value_bands')}**")
+    bande = sintesi['bande_valori_annuali']
+    anni = range(1, bande.shape[1] + 1)
+    st.line_chart(pd.DataFrame({etichetta: banda for etichetta, banda in zip(etichette, bande)}, index=anni))
+
+def _metric_in_percent(metrica, valori):
+    """CAGR è un decimale nei risultati, TIR/ROI/ROE sono già percentuali"""
+    return valori * 100 if metrica.startswith('cagr') else valori
+
+def _default_range(valore):
+    """Intervallo di default ±20% attorno al valore corrente"""
+    if valore == 0:
+        return 0.0, 1.0
+    return float(valore) * 0.8, float(valore) * 1.2
+
+@profiled('ui.render_sweep_section')
+def render_sweep_section(params):
+    """
+    Mappa di calore: metrica su una griglia di due parametri
+    """
+    with st.expander(get_text('sweep_title')):
+        st.info(get_text('sweep_info'))
+        chiavi = list(PARAMETRI_ANALISI)
+        etichetta = lambda chiave: get_text(PARAMETRI_ANALISI[chiave])
+
+        assi = {}
+        sweep_col1, sweep_col2, sweep_col3 = st.columns(3)
+        for colonna, nome_asse, default in ((sweep_col1, 'x', 'valore_immobile'), (sweep_col2, 'y', 'affitto_lordo')):
+            with colonna:
+                chiave = st.selectbox(
+                    get_text(f'sweep_axis_{nome_asse}'), chiavi, index=chiavi.index(default),
+                    format_func=etichetta, key=f"sweep_key_{nome_asse}")
+                minimo_default, massimo_default = _default_range(params[chiave])
+                minimo = st.number_input(get_text('sweep_min'), value=minimo_default, key=f"sweep_min_{nome_asse}_{chiave}")
+                massimo = st.number_input(get_text('sweep_max'), value=massimo_default, key=f"sweep_max_{nome_asse}_{chiave}")
+                passi = st.slider(get_text('sweep_steps'), min_value=5, max_value=200, value=50, key=f"sweep_steps_{nome_asse}")
+                assi[chiave] = np.linspace(minimo, massimo, passi)
+        with sweep_col3:
+            metrica = st.selectbox(
+                get_text('sweep_metric'), list(METRICHE_ANALISI), format_func=lambda m: get_text(METRICHE_ANALISI[m]),
+                key="sweep_metric")
+
+        if len(assi) < 2:
+            st.warning(get_text('sweep_same_axis'))
+            return
+
+        if st.button(get_text('sweep_run_button'), key="sweep_run"):
+            try:
+                risultato = sweep_grid(params, assi, metriche=(metrica,))
+            except Exception as e:
+                st.error(f"{get_text('calculation_error')}{str(e)}")
+                return
+            display_sweep_heatmap(risultato, metrica)
+
+def display_sweep_heatmap(risultato, metrica):
+    (chiave_x, valori_x), (chiave_y, valori_y) = list(risultato['assi'].items())[:2]
+    griglia_x, griglia_y = np.meshgrid(valori_x, valori_y, indexing='ij')
+    valori = _metric_in_percent(metrica, risultato[metrica])
+    dati = pd.DataFrame({
+        'x': griglia_x.ravel(),
+        'y': griglia_y.ravel(),
+        'valore': valori.ravel(),
+    })
+    titolo_x = get_text(PARAMETRI_ANALISI[chiave_x])
+    titolo_y = get_text(PARAMETRI_ANALISI[chiave_y])
+    titolo_metrica = f"{get_text(METRICHE_ANALISI[metrica])} (%)"
+    grafico = alt.Chart(dati).mark_rect().encode(
+        x=alt.X('x:O', title=titolo_x, axis=alt.Axis(format=',.4~r', labelOverlap=True)),
+        y=alt.Y('y:O', title=titolo_y, sort='descending', axis=alt.Axis(format=',.4~r', labelOverlap=True)),
+        color=alt.Color('valore:Q', title=titolo_metrica, scale=alt.Scale(scheme='redyellowgreen')),
+        tooltip=[
+            alt.Tooltip('x:Q', title=titolo_x, format=',.2f'),
+            alt.Tooltip('y:Q', title=titolo_y, format=',.2f'),
+            alt.Tooltip('valore:Q', title=titolo_metrica, format='.2f'),
+        ],
+    )
+    st.altair_chart(grafico)
+
+    migliore = np.nanargmax(valori) if np.isfinite(valori).any() else None
+    if migliore is not None:
+        i, j = np.unravel_index(migliore, valori.shape)
+        st.success(
+            f"{get_text('sweep_best')}{titolo_x} = {valori_x[i]:,.2f}, {titolo_y} = {valori_y[j]:,.2f} "
+            f"→ {format_percentage(valori[i, j])}")
+
+@profiled('ui.render_sensitivity_section')
+def render_sensitivity_section(params):
+    """
+    Grafico a tornado: impatto di una variazione ±X% di ogni parametro
+    """
+    with st.expander(get_text('tornado_title')):
+        st.info(get_text('tornado_info'))
+        tornado_col1, tornado_col2 = st.columns(2)
+        with tornado_col1:
+            variazione = st.slider(
+                get_text('tornado_variation'), min_value=1, max_value=50, value=10, step=1, key="tornado_variation")
+        with tornado_col2:
+            metrica = st.selectbox(
+                get_text('sweep_metric'), list(METRICHE_ANALISI), format_func=lambda m: get_text(METRICHE_ANALISI[m]),
+                key="tornado_metric")
+
+        try:
+            analisi = tornado_analysis(params, variazione, metriche=(metrica,))
+        except Exception as e:
+            st.error(f"{get_text('calculation_error')}{str(e)}")
+            return
+        display_tornado_chart(analisi, metrica)
+
+def display_tornado_chart(analisi, metrica):
+    base = _metric_in_percent(metrica, analisi['base'][metrica])
+    classifica = [voce for voce in analisi['classifiche'][metrica] if np.isfinite(voce['impatto'])]
+    if not np.isfinite(base) or not classifica:
+        st.warning(get_text('tir_calculation_na'))
+        return
+
+    variazione = analisi['variazione_perc']
+    righe = []
+    for voce in classifica:
+        nome = get_text(PARAMETRI_ANALISI.get(voce['chiave'], voce['chiave']))
+        for caso, valore_parametro, valore_metrica in (
+            (f"-{variazione}%", voce['valore_basso'], voce['metrica_basso']),
+            (f"+{variazione}%", voce['valore_alto'], voce['metrica_alto']),
+        ):
+            valore_metrica = _metric_in_percent(metrica, valore_metrica)
+            righe.append({
+                'parametro': nome,
+                'caso': caso,
+                'valore_parametro': valore_parametro,
+                'valore': valore_metrica,
+                'delta': valore_metrica - base,
+            })
+    dati = pd.DataFrame(righe)
+    ordine_parametri = list(dict.fromkeys(dati['parametro']))
+
+    titolo_metrica = get_text(METRICHE_ANALISI[metrica])
+    grafico = alt.Chart(dati).mark_bar().encode(
+        x=alt.X('delta:Q', title=f"Δ {titolo_metrica} (%)"),
+        y=alt.Y('parametro:N', sort=ordine_parametri, title=None),
+        color=alt.Color('caso:N', title=None),
+        tooltip=[
+            alt.Tooltip('parametro:N', title=get_text('tornado_parameter')),
+            alt.Tooltip('caso:N', title=get_text('tornado_variation')),
+            alt.Tooltip('valore_parametro:Q', title=get_text('tornado_parameter_value'), format=',.2f'),
+            alt.Tooltip('valore:Q', title=f"{titolo_metrica} (%)", format='.2f'),
+        ],
+    )
+    st.altair_chart(grafico)
+    st.caption(f"{get_text('tornado_base')}{format_percentage(base)}")
+
+@profiled('ui.render_holding_period_section')
+def render_holding_period_section(params):
+    """
+    Periodo di detenzione ottimale: metriche per ogni anno di vendita possibile
+    """
+    with st.expander(get_text('holding_title')):
+        st.info(get_text('holding_info'))
+        metrica = st.selectbox(
+            get_text('sweep_metric'), list(METRICHE_ANALISI), format_func=lambda m: get_text(METRICHE_ANALISI[m]),
+            key="holding_metric")
+        try:
+            risultato = calculate_holding_period_batch(params)
+        except Exception as e:
+            st.error(f"{get_text('calculation_error')}{str(e)}")
+            return
+        display_holding_period_chart(risultato, metrica)
+
+def display_holding_period_chart(risultato, metrica):
+    anni = risultato['anni_vendita']
+    valori = _metric_in_percent(metrica, risultato[metrica][0])
+    anno_ottimale = int(risultato['anno_ottimale'][metrica][0])
+    if anno_ottimale == 0:
+        st.warning(get_text('tir_calculation_na'))
+        return
+
+    titolo_metrica = f"{get_text(METRICHE_ANALISI[metrica])} (%)"
+    dati = pd.DataFrame({
+        'anno': anni,
+        'valore': valori,
+        'incasso': risultato['incasso_netto_vendita'][0],
+    }).dropna(subset=['valore'])
+    tooltip = [
+        alt.Tooltip('anno:Q', title=get_text('holding_sale_year')),
+        alt.Tooltip('valore:Q', title=titolo_metrica, format='.2f'),
+        alt.Tooltip('incasso:Q', title=get_text('holding_net_proceeds'), format=',.2f'),
+    ]
+    curva = alt.Chart(dati).mark_line(point=True).encode(
+        x=alt.X('anno:Q', title=get_text('holding_sale_year'), axis=alt.Axis(tickMinStep=1)),
+        y=alt.Y('valore:Q', title=titolo_metrica),
+        tooltip=tooltip,
+    )
+    ottimo = alt.Chart(dati[dati['anno'] == anno_ottimale]).mark_point(
+        size=200, filled=True, color='red').encode(x='anno:Q', y='valore:Q', tooltip=tooltip)
+    st.altair_chart(curva + ottimo)
+
+    indice = anno_ottimale - 1
+    st.success(
+        f"{get_text('holding_best_year')}{anno_ottimale} → {format_percentage(valori[indice])}, "
+        f"{get_text('holding_net_proceeds')}: {format_currency(risultato['incasso_netto_vendita'][0, indice])}")
+
+@profiled('ui.render_goal_seek_section')
+def render_goal_seek_section(params):
+    """
+    Ricerca obiettivo: valore di un parametro che porta una metrica al valore desiderato
+    """
+    with st.expander(get_text('goal_seek_title')):
+        st.info(get_text('goal_seek_info'))
+        chiavi = [chiave for chiave in PARAMETRI_ANALISI if chiave in VARIABILI_OBIETTIVO]
+        goal_col1, goal_col2, goal_col3 = st.columns(3)
+        with goal_col1:
+            variabile = st.selectbox(
+                get_text('goal_seek_variable'), chiavi, index=chiavi.index('costo_acquisto'),
+                format_func=lambda chiave: get_text(PARAMETRI_ANALISI[chiave]), key="goal_seek_variable")
+        with goal_col2:
+            metrica = st.selectbox(
+                get_text('sweep_metric'), list(METRICHE_ANALISI), format_func=lambda m: get_text(METRICHE_ANALISI[m]),
+                key="goal_seek_metric")
+        with goal_col3:
+            obiettivo = st.number_input(
+                get_text('goal_seek_target'), min_value=-100.0, max_value=1000.0, value=6.0, step=0.5, key="goal_seek_target")
+
+        if st.button(get_text('goal_seek_run_button'), key="goal_seek_run"):
+            try:
+                risultato = goal_seek(params, variabile, metrica, obiettivo)
+            except Exception as e:
+                st.error(f"{get_text('calculation_error')}{str(e)}")
+                return
+            if risultato['valore'] is None:
+                st.warning(get_text('goal_seek_not_found'))
+            else:
+                st.success(
+                    f"{get_text(PARAMETRI_ANALISI[variabile])} = {risultato['valore']:,.2f} → "
+                    f"{get_text(METRICHE_ANALISI[metrica])} {format_percentage(risultato['metrica'])}")
+
+@profiled('ui.render_optimizer_section')
+def render_optimizer_section(params):
+    """
+    Ottimizzazione della struttura dell'investimento: più parametri insieme con vincolo sulla rata
+    """
+    with st.expander(get_text('optimizer_title')):
+        st.info(get_text('optimizer_info'))
+        finanziamento = st.toggle(get_text('optimizer_financing'), value=True, key="optimizer_financing")
+        opt_col1, opt_col2, opt_col3 = st.columns(3)
+        with opt_col1:
+            metrica = st.selectbox(
+                get_text('sweep_metric'), list(METRICHE_ANALISI), index=list(METRICHE_ANALISI).index(METRICA_DEFAULT),
+                format_func=lambda m: get_text(METRICHE_ANALISI[m]), key="optimizer_metric")
+        with opt_col2:
+            soglia = st.number_input(
+                get_text('optimizer_max_payment_ratio'), min_value=0.0, max_value=200.0,
+                value=float(SOGLIA_RATA_SOSTENIBILE_PERC), step=5.0, key="optimizer_max_payment_ratio")
+        with opt_col3:
+            tasso = st.number_input(
+                get_text('optimizer_mortgage_rate'), min_value=0.0, max_value=20.0, value=TASSO_MUTUO_DEFAULT, step=0.1,
+                disabled=not finanziamento, key="optimizer_mortgage_rate")
+
+        # Con il finanziamento la rata deriva da debito, tasso e durata
+        limiti = financing_variables(params) if finanziamento else default_variables(params)
+        chiavi = st.multiselect(
+            get_text('optimizer_variables'), list(limiti), default=list(limiti),
+            format_func=lambda chiave: get_text(PARAMETRI_ANALISI[chiave]), key=f"optimizer_variables_{finanziamento}")
+        if finanziamento and not {'debito_residuo_mutuo', 'anni_restanti_mutuo'} <= set(chiavi):
+            st.warning(get_text('optimizer_financing_variables'))
+            return
+
+        if st.button(get_text('optimizer_run_button'), key="optimizer_run"):
+            try:
+                risultato = optimize_investment(
+                    params, {chiave: limiti[chiave] for chiave in chiavi}, metrica,
+                    vincoli={'rata_su_affitto_perc': (None, soglia)}, tasso_mutuo_perc=tasso if finanziamento else None)
+            except Exception as e:
+                st.error(f"{get_text('calculation_error')}{str(e)}")
+                return
+            if not risultato['ammissibile']:
+                st.warning(get_text('optimizer_infeasible'))
+                return
+            st.success(f"{get_text(METRICHE_ANALISI[metrica])}: {format_percentage(risultato['valore'])}")
+            mostrate = chiavi + ['rata_mutuo_mensile'] if finanziamento else chiavi
+            st.dataframe(pd.DataFrame({
+                get_text('optimizer_parameter'): [get_text(PARAMETRI_ANALISI[chiave]) for chiave in mostrate],
+                get_text('optimizer_current'): [params[chiave] for chiave in mostrate],
+                get_text('optimizer_optimal'): [risultato['params'][chiave] for chiave in mostrate],
+            }).round(2), hide_index=True)
+            storia = pd.DataFrame({
+                get_text('optimizer_generation'): np.arange(1, len(risultato['storia']) + 1),
+                get_text(METRICHE_ANALISI[metrica]): risultato['storia'],
+            })
+            st.line_chart(storia, x=get_text('optimizer_generation'), y=get_text(METRICHE_ANALISI[metrica]))
+            st.caption(get_text('optimizer_evaluations').format(n=risultato['valutazioni']))
+
+@profiled('ui.render_screener_section')
+def render_screener_section(params):
+    """
+    Selezione annunci: migliori k da un file di annunci, con le ipotesi del modulo
+    per i parametri che l'annuncio non contiene
+    """
+    with st.expander(get_text('screener_title')):
+        st.info(get_text('screener_info'))
+        file = st.file_uploader(get_text('screener_file'), type=['csv', 'parquet'], key="screener_file")
+        scr_col1, scr_col2, scr_col3 = st.columns(3)
+        with scr_col1:
+            k = st.number_input(get_text('screener_top'), min_value=1, max_value=10000, value=TOP_DEFAULT, step=10, key="screener_top")
+        with scr_col2:
+            metrica = st.selectbox(
+                get_text('sweep_metric'), list(METRICHE_ANALISI), format_func=lambda m: get_text(METRICHE_ANALISI[m]),
+                key="screener_metric")
+        with scr_col3:
+            usa_modulo = st.checkbox(get_text('screener_use_form'), value=True, key="screener_use_form")
+        if file is None or not st.button(get_text('screener_run_button'), key="screener_run"):
+            return
+
+        # Prezzo e affitto vengono dall'annuncio, il resto dal modulo
+        valori_default = {
+            chiave: valore for chiave, valore in params.items()
+            if chiave not in ('valore_immobile', 'costo_acquisto', 'costo_ristrutturazione', 'affitto_lordo')
+        } if usa_modulo else None
+        try:
+            if file.name.lower().endswith('.parquet'):
+                blocchi = [pd.read_parquet(file)]
+            else:
+                blocchi = pd.read_csv(file, chunksize=CHUNK_SIZE_DEFAULT)
+            migliori, letti = screen_chunks(blocchi, int(k), metrica, valori_default)
+        except Exception as e:
+            st.error(f"{get_text('calculation_error')}{str(e)}")
+            return
+        st.success(get_text('screener_summary').format(letti=letti, migliori=len(migliori)))
+        st.dataframe(migliori.round(2), hide_index=True)
+
+@profiled('ui.render_backtest_section')
+def render_backtest_section(params):
+    """
+    Backtest storico: l'investimento ripetuto per ogni anno di partenza con le serie
+    realizzate di rivalutazione, inflazione e canoni
+    """
+    with st.expander(get_text('backtest_title')):
+        st.info(get_text('backtest_info'))
+        file = st.file_uploader(get_text('backtest_file'), type=['csv'], key="backtest_file")
+        if file is None:
+            return
+        citta = None
+        try:
+            colonne = pd.read_csv(file, nrows=0).columns
+            if COLONNA_CITTA in colonne:
+                file.seek(0)
+                elenco = sorted(pd.read_csv(file, usecols=[COLONNA_CITTA])[COLONNA_CITTA].dropna().unique())
+                citta = st.selectbox(get_text('backtest_city'), elenco, key="backtest_city")
+        except Exception as e:
+            st.error(f"{get_text('calculation_error')}{str(e)}")
+            return
+        if not st.button(get_text('backtest_run_button'), key="backtest_run"):
+            return
+        try:
+            file.seek(0)
+            serie = load_series(file, citta)
+            esito = backtest_rolling(params, serie)
+        except Exception as e:
+            st.error(f"{get_text('calculation_error')}{str(e)}")
+            return
+        display_backtest_results(esito)
+
+def display_backtest_results(esito):
+    """Distribuzione storica di TIR e CAGR e TIR per anno di partenza"""
+    anni_partenza = esito['anni_partenza']
+    tir = esito['tir_nominale']
+    st.caption(get_text('backtest_windows').format(
+        n=len(anni_partenza), primo=anni_partenza[0], ultimo=anni_partenza[-1]))
+    if np.isfinite(tir).any():
+        peggiore = int(np.nanargmin(tir))
+        migliore = int(np.nanargmax(tir))
+        bt_col1, bt_col2, bt_col3 = st.columns(3)
+        with bt_col1:
+            st.metric(get_text('backtest_worst'), format_percentage(tir[peggiore]), f"{anni_partenza[peggiore]}", delta_color="off")
+        with bt_col2:
+            st.metric(get_text('backtest_median'), format_percentage(float(np.nanmedian(tir))))
+        with bt_col3:
+            st.metric(get_text('backtest_best'), format_percentage(tir[migliore]), f"{anni_partenza[migliore]}", delta_color="off")
+
+    sintesi = esito['sintesi']
+    etichette = [f"P{p}" for p in esito['percentili']]
+    righe = {
+        get_text('tir_nominal'): [format_percentage(v) for v in sintesi['tir_nominale']['percentili']],
+        get_text('tir_real'): [format_percentage(v) for v in sintesi['tir_reale']['percentili']],
+        get_text('cagr_nominal_metric'): [format_percentage(v * 100) for v in sintesi['cagr_nominale']['percentili']],
+        get_text('cagr_real_metric'): [format_percentage(v * 100) for v in sintesi['cagr_reale']['percentili']],
+    }
+    st.write(f"**{get_text('mc_percentiles')}**")
+    st.dataframe(pd.DataFrame(righe, index=etichette).T)
+
+    st.write(f"**{get_text('backtest_by_start_year')}**")
+    st.bar_chart(pd.DataFrame({
+        get_text('tir_nominal'): tir, get_text('tir_real'): esito['tir_reale'],
+    }, index=pd.Index(anni_partenza, name=get_text('backtest_start_year'))))
+
+# Eventi di esempio proposti nella tabella (anno, importo, descrizione, indicizzato)
+EVENTI_ESEMPIO = [
+    {'anno': 2, 'importo': 8000.0, 'descrizione': 'Bonus facciate', 'indicizzato': False},
+    {'anno': 7, 'importo': -15000.0, 'descrizione': 'Rifacimento tetto', 'indicizzato': True},
+]
+
+@profiled('ui.render_events_section')
+def render_events_section(params):
+    """
+    Eventi straordinari: spese e incassi una tantum in anni precisi (lavori, bonus,
+    allestimenti) sommati ai flussi dell'immobile
+    """
+    with st.expander(get_text('events_title')):
+        st.info(get_text('events_info'))
+        tabella = st.data_editor(
+            pd.DataFrame(EVENTI_ESEMPIO), num_rows="dynamic", key="events_table",
+            column_config={
+                'anno': st.column_config.NumberColumn(get_text('events_year'), min_value=1, step=1),
+                'importo': st.column_config.NumberColumn(get_text('events_amount'), format="%.0f"),
+                'descrizione': st.column_config.TextColumn(get_text('events_description')),
+                'indicizzato': st.column_config.CheckboxColumn(get_text('events_indexed')),
+            })
+        tabella = tabella.dropna(subset=['anno', 'importo'])
+        if tabella.empty or not st.button(get_text('events_run_button'), key="events_run"):
+            return
+        try:
+            eventi = make_events(
+                tabella['anno'].to_numpy(dtype=int), tabella['importo'].to_numpy(dtype=float),
+                indicizzato=tabella['indicizzato'].fillna(False).to_numpy(dtype=bool))
+            senza = cached_real_estate_investment(params)
+            con = calculate_real_estate_investment_batch(params, {CHIAVE_EVENTI: eventi})
+        except Exception as e:
+            st.error(f"{get_text('calculation_error')}{str(e)}")
+            return
+        display_events_results(senza, con, params)
+
+def display_events_results(senza, con, params):
+    """TIR e rendimento con e senza eventi e flussi annuali degli eventi"""
+    ev_col1, ev_col2, ev_col3 = st.columns(3)
+    tir_senza = senza.get('tir_nominale')
+    tir_con = float(con['tir_nominale'][0])
+    with ev_col1:
+        st.metric(get_text('events_tir_without'), format_percentage(tir_senza) if tir_senza is not None else "-")
+    with ev_col2:
+        st.metric(
+            get_text('events_tir_with'), format_percentage(tir_con) if np.isfinite(tir_con) else "-",
+            f"{tir_con - tir_senza:+.2f} pp" if tir_senza is not None and np.isfinite(tir_con) else None)
+    with ev_col3:
+        st.metric(get_text('events_total'), format_currency(float(con['totale_affitti_netti'][0] - senza['totale_affitti_netti'])))
+
+    anni = int(params['anni_investimento'])
+    st.bar_chart(pd.DataFrame({
+        get_text('events_net_rent_with'): con['affitti_netti_annuali'][0, :anni],
+        get_text('events_net_rent_without'): senza['affitti_netti_annuali'][:anni],
+    }, index=pd.Index(range(1, anni + 1), name=get_text('events_year'))), stack=False)
+
+@profiled('ui.render_stress_section')
+def render_stress_section(params):
+    """Prove di stress: variazione delle metriche dell'immobile per ogni shock della libreria"""
+    with st.expander(get_text('stress_title')):
+        st.info(get_text('stress_info'))
+        scenari = st.multiselect(get_text('stress_scenarios'), list(SCENARI_STRESS), default=list(SCENARI_STRESS), key="stress_scenarios")
+        if not scenari or not st.button(get_text('stress_run_button'), key="stress_run"):
+            return
+        try:
+            esito = stress_test_batch(params, scenari)
+        except Exception as e:
+            st.error(f"{get_text('calculation_error')}{str(e)}")
+            return
+        righe = {}
+        for metrica, chiave in METRICHE_ANALISI.items():
+            base = _metric_in_percent(metrica, esito['base'][metrica][0])
+            righe[get_text(chiave)] = [base] + list(_metric_in_percent(metrica, esito['delta'][metrica][:, 0]))
+        tabella = pd.DataFrame(righe, index=[get_text('stress_base')] + esito['scenari'])
+        if esito['non_applicato'].any():
+            st.warning(get_text('stress_rate_needs_debt'))
+        st.dataframe(tabella.round(2))
+        st.caption(get_text('stress_delta_help'))
+
+def display_portfolio_stress(params_batch, immobili, metrica):
+    """Matrice immobile x shock delle variazioni della metrica scelta"""
+    st.write(get_text('stress_portfolio'))
+    esito = stress_test_batch(params_batch, metriche=(metrica,))
+    tabella = pd.DataFrame(_metric_in_percent(metrica, esito['delta'][metrica]).T, columns=esito['scenari'], index=immobili.index)
+    tabella.insert(0, get_text('stress_base'), _metric_in_percent(metrica, esito['base'][metrica]))
+    non_applicati = int(esito['non_applicato'].any(axis=0).sum())
+    if non_applicati:
+        st.warning(get_text('stress_rate_needs_debt_portfolio').format(n=non_applicati))
+    st.dataframe(tabella.round(2))
+    st.caption(get_text('stress_delta_help'))
+
+@profiled('ui.render_portfolio_section')
+def render_portfolio_section():
+    """
+    Portafoglio: immobili da file (una riga per immobile, colonna opzionale anno_acquisto)
+    con flussi consolidati su un calendario comune
+    """
+    with st.expander(get_text('portfolio_title')):
+        st.info(get_text('portfolio_info'))
+        file = st.file_uploader(get_text('portfolio_file'), type=['csv', 'parquet'], key="portfolio_file")
+        if file is None:
+            return
+        metrica_stress = st.selectbox(
+            get_text('portfolio_stress_metric'), list(METRICHE_ANALISI),
+            format_func=lambda chiave: get_text(METRICHE_ANALISI[chiave]), key="portfolio_stress_metric"
+        )
+        if not st.button(get_text('portfolio_run_button'), key="portfolio_run"):
+            return
+        try:
+            immobili = pd.read_parquet(file) if file.name.lower().endswith('.parquet') else pd.read_csv(file)
+            anno_corrente = pd.Timestamp.today().year
+            anni_acquisto = immobili['anno_acquisto'] if 'anno_acquisto' in immobili.columns else anno_corrente
+            params_batch = frame_to_batch(immobili)
+            risultato = calculate_portfolio_batch(params_batch, anni_acquisto)
+        except Exception as e:
+            st.error(f"{get_text('calculation_error')}{str(e)}")
+            return
+        display_portfolio_results(risultato, immobili)
+        try:
+            display_portfolio_stress(params_batch, immobili, metrica_stress)
+        except Exception as e:
+            st.error(f"{get_text('calculation_error')}{str(e)}")
+
+def display_portfolio_results(risultato, immobili):
+    """Metriche del portafoglio, serie consolidate per anno e contributo di ogni immobile"""
+    port_col1, port_col2, port_col3, port_col4 = st.columns(4)
+    with port_col1:
+        st.metric(get_text('portfolio_units'), f"{len(immobili):,}")
+    with port_col2:
+        st.metric(get_text('portfolio_total_investment'), format_currency(risultato['investimento_totale']))
+    with port_col3:
+        tir = risultato['tir_nominale']
+        st.metric(get_text('tir_nominal'), format_percentage(tir) if np.isfinite(tir) else get_text('portfolio_not_available'))
+    with port_col4:
+        cagr = risultato['cagr_nominale']
+        st.metric(get_text('cagr_nominal_metric'), format_percentage(cagr * 100) if np.isfinite(cagr) else get_text('portfolio_not_available'))
+
+    serie = pd.DataFrame({
+        get_text('portfolio_net_rent'): risultato['affitti_netti'],
+        get_text('portfolio_debt_service'): risultato['servizio_debito'],
+        get_text('portfolio_value'): risultato['valore'],
+    }, index=pd.Index(risultato['calendario'], name=get_text('portfolio_year')))
+    st.line_chart(serie)
+    serie[get_text('portfolio_cash_flow')] = risultato['flussi']
+    serie[get_text('portfolio_units_held')] = risultato['immobili_detenuti']
+    st.dataframe(serie.round(2))
+
+    st.write(get_text('portfolio_contributions'))
+    contributi = risultato['contributi']
+    st.dataframe(pd.DataFrame({
+        get_text('tir_nominal'): contributi['tir_nominale'],
+        get_text('portfolio_investment_share'): contributi['quota_investimento'],
+        get_text('portfolio_return_share'): contributi['quota_rendimento'],
+        get_text('portfolio_npv'): contributi['valore_attuale_netto'],
+    }, index=immobili.index).round(2))
+    st.caption(get_text('portfolio_npv_help'))
+
+def render_debug_panel():
+    """Pannello di debug: tempi degli span e contatori raccolti da profiling"""
+    with st.expander(get_text('debug_title')):
+        st.info(get_text('debug_info'))
+        # Lo stato del toggle è applicato all'inizio di ogni esecuzione (vedi REIT.main)
+        st.toggle(get_text('debug_enable'), value=False, key="debug_profiling")
+        raccolta = st.session_state.get('debug_raccolta')
+        if raccolta is None:
+            raccolta = st.session_state.debug_raccolta = profiling.Collector()
+        if st.button(get_text('debug_reset'), key="debug_reset"):
+            raccolta.reset()
+
+        stato = raccolta.snapshot()
+        if not stato['span'] and not stato['contatori']:
+            st.caption(get_text('debug_empty'))
+            return
+        if stato['span']:
+            st.write(get_text('debug_spans'))
+            span = pd.DataFrame.from_dict(stato['span'], orient='index').sort_values('totale_ms', ascending=False)
+            st.dataframe(span.round(3))
+        if stato['contatori']:
+            st.write(get_text('debug_counters'))
+            st.dataframe(pd.DataFrame.from_dict(stato['contatori'], orient='index', columns=['valore']))
+        st.write(get_text('debug_recent'))
+        st.dataframe(pd.DataFrame(stato['recenti'][:50], columns=['span', 'durata_ms']).round(3))